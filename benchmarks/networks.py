@@ -0,0 +1,94 @@
+'''Synthetic MRT networks for benchmarking
+
+Both generators return station rows in the format of `StationReader`, so
+they can be fed to `MRTMap` like the real data. Line codes are two
+characters and interchanges are stations of different lines sharing a
+name, same as in data/StationMap.csv.
+'''
+import random
+import string
+
+
+LINE_CHARS = string.ascii_uppercase + string.digits
+
+
+def line_code(index):
+    if index >= len(LINE_CHARS) ** 2:
+        raise ValueError('Too many lines: {}'.format(index + 1))
+    return (
+        LINE_CHARS[index // len(LINE_CHARS)] +
+        LINE_CHARS[index % len(LINE_CHARS)]
+    )
+
+
+def station_row(code, name):
+    return {
+        'Station Code': code,
+        'Station Name': name,
+        'Opening Date': '1 January 2000',
+    }
+
+
+def grid_network(size):
+    '''Grid of horizontal and vertical lines with about size stations
+
+    Every crossing of two lines is an interchange, so the network has
+    2 * side * side stations.
+    '''
+    side = max(2, int((size / 2) ** 0.5))
+    rows = []
+    for row in range(side):
+        code = line_code(row)
+        for column in range(side):
+            rows.append(station_row(
+                '{}{}'.format(code, column + 1),
+                'G{}-{}'.format(row, column),
+            ))
+    for column in range(side):
+        code = line_code(side + column)
+        for row in range(side):
+            rows.append(station_row(
+                '{}{}'.format(code, row + 1),
+                'G{}-{}'.format(row, column),
+            ))
+    return rows
+
+
+def scale_free_network(size, line_length=None, interchanges=3, seed=0):
+    '''Lines sharing stations chosen by preferential attachment
+
+    Each new line goes through a few existing stations picked with a
+    probability proportional to the number of lines already serving them,
+    which gives a few large hubs and many plain stations. Lines get longer
+    for large sizes to stay within the two character line codes.
+    '''
+    if line_length is None:
+        line_length = max(30, -(-size // 1200))
+    rand = random.Random(seed)
+    rows = []
+    # one entry per (line, station name), sampling it is preferential
+    served = []
+    names = 0
+    line = 0
+    while len(rows) < size:
+        hubs = set()
+        if served:
+            while len(hubs) < min(interchanges, len(set(served))):
+                hubs.add(rand.choice(served))
+        stops = list(hubs)
+        while len(stops) < line_length:
+            stops.append('S{}'.format(names))
+            names += 1
+        rand.shuffle(stops)
+        code = line_code(line)
+        for index, name in enumerate(stops):
+            rows.append(station_row('{}{}'.format(code, index + 1), name))
+            served.append(name)
+        line += 1
+    return rows
+
+
+NETWORKS = {
+    'grid': grid_network,
+    'scale_free': scale_free_network,
+}
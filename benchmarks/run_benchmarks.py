@@ -0,0 +1,308 @@
+'''Benchmarks of MRTMap construction and route search
+
+Measures `MRTMap.__init__` and `MRTMap.find_routes` on data/StationMap.csv
+for every weights profile of `WeightsFactory`, search strategy and limit,
+and on synthetic grid and scale free networks of growing size, and the
+startup of a `PathFinder` from the data file and from a graph file. For each
+case it reports latency percentiles, peak traced memory and the search
+counters of `SearchStats` per query (expansions, queue pushes and peak
+queue length), and can write the results as JSON and compare them with the
+results of a previous run. Counters are collected in a separate run so they
+do not weigh on the latencies.
+
+Run from the project root, for example:
+
+    python benchmarks/run_benchmarks.py --output bench.json
+    python benchmarks/run_benchmarks.py --compare bench.json
+'''
+import argparse
+import csv
+import gc
+import json
+import os
+import platform
+import random
+import sys
+import tempfile
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from mrt_guide.mrt_map import MRTMap  # noqa: E402
+from mrt_guide.path_finder import PathFinder  # noqa: E402
+from mrt_guide.stats import SearchStats  # noqa: E402
+from mrt_guide.stations_reader import COLUMNS, StationReader  # noqa: E402
+from mrt_guide.weights import WeightsFactory  # noqa: E402
+
+from networks import NETWORKS  # noqa: E402
+
+
+DATA_PATH = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+    'data', 'StationMap.csv',
+)
+# representative pairs: same line, one transfer, across the island
+REAL_PAIRS = [
+    ('Boon Lay', 'Jurong East'),
+    ('Boon Lay', 'Little India'),
+    ('Buona Vista', 'Serangoon'),
+    ('Punggol', 'Woodlands'),
+    ('Jurong East', 'Changi Airport'),
+]
+# enumerating all the routes (limit=None) is only tractable from stations
+# near the end of a line, most origins have millions of simple routes
+REAL_ALL_PAIRS = [
+    ('Boon Lay', 'Jurong East'),
+]
+# strategies finding more than the single best route
+MULTI_ROUTE_STRATEGIES = ('exhaustive', 'yen', 'alternatives')
+
+
+def percentile(samples, ratio):
+    samples = sorted(samples)
+    index = max(0, int(round(ratio * len(samples) + 0.5)) - 1)
+    return samples[min(index, len(samples) - 1)]
+
+
+def summarize(samples):
+    samples = [sample * 1000 for sample in samples]
+    return {
+        'p50': percentile(samples, 0.5),
+        'p90': percentile(samples, 0.9),
+        'p99': percentile(samples, 0.99),
+        'max': max(samples),
+        'mean': sum(samples) / len(samples),
+    }
+
+
+def peak_memory(func):
+    '''Peak memory in KiB allocated while running func
+    '''
+    tracemalloc.start()
+    try:
+        func()
+        return tracemalloc.get_traced_memory()[1] / 1024
+    finally:
+        tracemalloc.stop()
+
+
+def bench_init(name, rows, repeat):
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        MRTMap(rows)
+        samples.append(time.perf_counter() - started)
+    return {
+        'name': '{}/init'.format(name),
+        'stations': len(rows),
+        'samples': repeat,
+        'latency_ms': summarize(samples),
+        'peak_memory_kib': peak_memory(lambda: MRTMap(rows)),
+    }
+
+
+def bench_startup(name, rows, repeat):
+    '''Startup of a PathFinder from the data file and from the graph file
+    compiled from it, checked against the data file as on every start
+    '''
+    results = []
+    with tempfile.TemporaryDirectory() as directory:
+        data_path = os.path.join(directory, 'stations.csv')
+        with open(data_path, 'w', newline='') as ofile:
+            writer = csv.writer(ofile)
+            writer.writerow(COLUMNS)
+            for row in rows:
+                writer.writerow([row.get(column) or '' for column in COLUMNS])
+        graph_path = os.path.join(directory, 'stations.graph')
+        PathFinder(data_path, graph_path=graph_path)
+        for source, path in [('csv', None), ('graph', graph_path)]:
+            def start():
+                return PathFinder(data_path, cache_size=0, graph_path=path)
+            samples = []
+            for _ in range(repeat):
+                gc.collect()
+                started = time.perf_counter()
+                finder = start()
+                samples.append(time.perf_counter() - started)
+                # freed out of the measure
+                finder = None
+            results.append({
+                'name': '{}/startup/{}'.format(name, source),
+                'stations': len(rows),
+                'samples': repeat,
+                'latency_ms': summarize(samples),
+                'peak_memory_kib': peak_memory(start),
+            })
+    return results
+
+
+def bench_query(name, graph, pairs, weights, strategy, limit, repeat):
+    # compile the cost table and warm up before measuring
+    graph.find_routes(pairs[0][0], pairs[0][1], weights, limit, strategy)
+    samples = []
+    for _ in range(repeat):
+        for start, end in pairs:
+            started = time.perf_counter()
+            graph.find_routes(start, end, weights, limit, strategy)
+            samples.append(time.perf_counter() - started)
+    stats = SearchStats()
+    peak_queue = 0
+    for start, end in pairs:
+        stats.peak_queue = 0
+        graph.find_routes(start, end, weights, limit, strategy, stats=stats)
+        peak_queue = max(peak_queue, stats.peak_queue)
+
+    def run_once():
+        for start, end in pairs:
+            graph.find_routes(start, end, weights, limit, strategy)
+    return {
+        'name': '{}/{}/{}/limit={}'.format(
+            name, weights.profile, strategy, limit,
+        ),
+        'samples': len(samples),
+        'latency_ms': summarize(samples),
+        'peak_memory_kib': peak_memory(run_once),
+        'expansions': stats.expansions / len(pairs),
+        'heap_pushes': stats.pushes / len(pairs),
+        'peak_queue': peak_queue,
+    }
+
+
+def random_pairs(rows, count, seed=0):
+    rand = random.Random(seed)
+    codes = [row['Station Code'] for row in rows]
+    return [(rand.choice(codes), rand.choice(codes)) for _ in range(count)]
+
+
+def run(args):
+    results = []
+    rows = StationReader(DATA_PATH).read_stations()
+    results.append(bench_init('real', rows, args.repeat))
+    report(results[-1])
+    for result in bench_startup('real', rows, args.repeat):
+        results.append(result)
+        report(result)
+    graph = MRTMap(rows)
+    for weights in WeightsFactory.get_all_weights():
+        for strategy in args.strategies:
+            for limit in [1, 5, None]:
+                if strategy not in MULTI_ROUTE_STRATEGIES and limit != 1:
+                    continue
+                if strategy != 'exhaustive' and limit is None:
+                    continue
+                pairs = REAL_PAIRS if limit is not None else REAL_ALL_PAIRS
+                results.append(bench_query(
+                    'real', graph, pairs, weights, strategy, limit,
+                    args.repeat,
+                ))
+                report(results[-1])
+    for network in args.networks:
+        for size in args.sizes:
+            rows = NETWORKS[network](size)
+            name = '{}-{}'.format(network, size)
+            results.append(bench_init(name, rows, 1))
+            report(results[-1])
+            for result in bench_startup(name, rows, 3):
+                results.append(result)
+                report(result)
+            graph = MRTMap(rows)
+            pairs = random_pairs(rows, args.pairs)
+            for weights in WeightsFactory.get_all_weights():
+                for limit in [1, 5]:
+                    if limit > 1 and size > args.max_size_for_alternatives:
+                        continue
+                    results.append(bench_query(
+                        name, graph, pairs, weights,
+                        args.synthetic_strategy, limit, 1,
+                    ))
+                    report(results[-1])
+    return {
+        'meta': {
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'time': time.strftime('%Y-%m-%dT%H:%M:%S'),
+            'args': vars(args),
+        },
+        'results': results,
+    }
+
+
+def report(result):
+    line = '{:<50} p50 {:>9.3f} ms  p99 {:>9.3f} ms  mem {:>9.1f} KiB'.format(
+        result['name'],
+        result['latency_ms']['p50'],
+        result['latency_ms']['p99'],
+        result['peak_memory_kib'],
+    )
+    if 'heap_pushes' in result:
+        line += '  pushes {:>10.1f}  peak queue {:>7}'.format(
+            result['heap_pushes'], result['peak_queue'],
+        )
+    print(line)
+
+
+def compare(baseline, current):
+    '''Print the p50 latency change of every case found in both runs
+    '''
+    baseline = {result['name']: result for result in baseline['results']}
+    for result in current['results']:
+        previous = baseline.get(result['name'])
+        if previous is None:
+            continue
+        before = previous['latency_ms']['p50']
+        after = result['latency_ms']['p50']
+        change = (after - before) / before * 100 if before else 0.0
+        print('{:<50} {:>9.3f} -> {:>9.3f} ms ({:+.1f}%)'.format(
+            result['name'], before, after, change,
+        ))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[0])
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument(
+        '--strategies', nargs='+', default=[
+            'exhaustive',
+            'yen',
+            'astar',
+            'bidirectional',
+            'hub',
+            'alternatives',
+            'fewest_transfers',
+            'contraction',
+            'table',
+        ],
+        help='strategies to run on the real map',
+    )
+    parser.add_argument(
+        '--networks', nargs='*', default=sorted(NETWORKS),
+        choices=sorted(NETWORKS),
+    )
+    parser.add_argument(
+        '--sizes', nargs='*', type=int, default=[1000, 5000],
+        help='number of stations of the synthetic networks',
+    )
+    parser.add_argument(
+        '--pairs', type=int, default=20,
+        help='random pairs queried on synthetic networks',
+    )
+    parser.add_argument('--synthetic-strategy', default='yen')
+    parser.add_argument(
+        '--max-size-for-alternatives', type=int, default=5000,
+        help='largest synthetic network queried with limit=5',
+    )
+    parser.add_argument('--output', help='write results as JSON to this file')
+    parser.add_argument('--compare', help='JSON results of a previous run')
+    args = parser.parse_args()
+    results = run(args)
+    if args.output:
+        with open(args.output, 'w') as ofile:
+            json.dump(results, ofile, indent=2)
+    if args.compare:
+        with open(args.compare) as ifile:
+            compare(json.load(ifile), results)
+
+
+if __name__ == '__main__':
+    main()
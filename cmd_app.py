@@ -8,8 +8,8 @@ from mrt_guide.formatter import FormatterFactory
 
 
 class SimpleCommandLineApp:
-    def __init__(self, data_path, limit):
-        self.path_finder = PathFinder(data_path)
+    def __init__(self, data_path, limit, graph_path=None):
+        self.path_finder = PathFinder(data_path, graph_path=graph_path)
         self.formatter = FormatterFactory.get_formatter()
         self.limit = limit
 
@@ -61,6 +61,7 @@ if __name__ == '__main__':
     config_path = './mrt_guide.ini'
     data_path = './data/StationMap.csv'
     limit = 1
+    graph_path = None
     if os.path.exists(config_path):
         config = ConfigParser()
         config.read(config_path)
@@ -68,5 +69,6 @@ if __name__ == '__main__':
         limit = int(config['mrt_guide'].get(
             'limit_of_recommended_routes', limit
         ))
-    app = SimpleCommandLineApp(data_path, limit)
+        graph_path = config['mrt_guide'].get('graph_path', graph_path)
+    app = SimpleCommandLineApp(data_path, limit, graph_path)
     app.run()
@@ -0,0 +1,32 @@
+'''HTTP app serving path finding in MRT stations as JSON.
+'''
+import os
+from configparser import ConfigParser
+
+from mrt_guide.path_finder import PathFinder
+from mrt_guide.server import RoutingServer
+
+
+if __name__ == '__main__':
+    config_path = './mrt_guide.ini'
+    data_path = './data/StationMap.csv'
+    limit = 1
+    graph_path = None
+    host = '127.0.0.1'
+    port = 8080
+    if os.path.exists(config_path):
+        config = ConfigParser()
+        config.read(config_path)
+        data_path = config['mrt_guide'].get('data_path', data_path)
+        limit = int(config['mrt_guide'].get(
+            'limit_of_recommended_routes', limit
+        ))
+        graph_path = config['mrt_guide'].get('graph_path', graph_path)
+        if config.has_section('http_app'):
+            host = config['http_app'].get('host', host)
+            port = int(config['http_app'].get('port', port))
+    server = RoutingServer(
+        PathFinder(data_path, graph_path=graph_path), limit,
+    )
+    print('Serving MRT Guide on http://{}:{}/routes'.format(host, port))
+    server.run(host, port)
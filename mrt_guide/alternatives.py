@@ -0,0 +1,163 @@
+'''Diverse alternative routes, registered as "alternatives" search strategy
+
+The k best routes are mostly the best route with a detour of a station or
+a different platform of the same interchange. `AlternativeRoutes` uses the
+penalty method instead: it finds the best route, makes the connections it
+took more expensive and searches again, so that every search is pushed off
+the routes found so far. A route is kept when at most max_overlap of its
+rides along a line are shared with any route kept before and it costs at
+most max_stretch times the best route, and the search stops after max_runs
+single best route searches (see `shortest_route`).
+
+Penalties only make connections more expensive, so the remaining costs of
+the original weights (see `mrt_guide.bounds`) direct all the searches.
+The parameters can be changed per query with the options of
+`MRTMap.find_routes`, e.g. `options={'max_overlap': 0.2}`, or registered as
+strategies of their own, e.g.
+`register_strategy('distinct')(AlternativeRoutes(max_overlap=0.2))`.
+'''
+from .bounds import remaining_costs
+from .graph import TRANSFER
+from .shortest_path import shortest_route
+from .strategies import register_strategy
+
+
+class AlternativeRoutes:
+    def __init__(
+            self, max_overlap=0.5, max_stretch=1.5, penalty=1.4, max_runs=10):
+        '''Search strategy finding dissimilar routes
+
+        max_overlap: max share of the rides along a line of a route also
+            taken by a route kept before it
+        max_stretch: max cost of a route as a multiple of the best one
+        penalty: factor applied to the weight of a connection every time a
+            found route takes it
+        max_runs: max number of single best route searches per query
+        '''
+        if not 0 <= max_overlap <= 1:
+            raise ValueError('max_overlap must be between 0 and 1')
+        if max_stretch < 1:
+            raise ValueError('max_stretch must be at least 1')
+        if penalty <= 1:
+            raise ValueError('penalty must be greater than 1')
+        if max_runs < 1:
+            raise ValueError('max_runs must be positive')
+        self.max_overlap = max_overlap
+        self.max_stretch = max_stretch
+        self.penalty = penalty
+        self.max_runs = max_runs
+
+    def __call__(
+            self, mrt_map, start, end, table, limit=None, stats=None,
+            max_overlap=None, max_stretch=None, penalty=None,
+            max_runs=None):
+        '''Find up to limit dissimilar routes from start to end ranked by
+        cost, as many as max_runs searches find if limit is None
+
+        max_overlap, max_stretch, penalty, max_runs: parameters of this
+            query only, those of the strategy if None
+        '''
+        overrides = (max_overlap, max_stretch, penalty, max_runs)
+        if any(value is not None for value in overrides):
+            strategy = AlternativeRoutes(*(
+                default if value is None else value
+                for default, value in zip(
+                    (self.max_overlap, self.max_stretch, self.penalty,
+                     self.max_runs),
+                    overrides)
+            ))
+            return strategy(mrt_map, start, end, table, limit, stats)
+        remaining = remaining_costs(table, end)
+        penalized = _PenalizedTable(table)
+        sources = [(station_id, False) for station_id in start]
+        routes = []
+        kept_rides = []
+        seen = set()
+        max_cost = None
+        for _ in range(self.max_runs):
+            if limit is not None and len(routes) >= limit:
+                break
+            found = shortest_route(
+                penalized, sources, end,
+                heuristic=remaining.__getitem__, stats=stats,
+            )
+            if found is None:
+                break
+            route = found[0]
+            edges = list(zip(route, route[1:]))
+            penalized.add_penalty(edges, self.penalty)
+            if tuple(route) in seen:
+                continue
+            seen.add(tuple(route))
+            cost = _route_cost(table, edges)
+            if max_cost is None:
+                max_cost = cost * self.max_stretch
+            elif cost > max_cost:
+                continue
+            rides = _ride_edges(table, edges)
+            if any(
+                    _overlap(rides, kept) > self.max_overlap
+                    for kept in kept_rides):
+                continue
+            routes.append((route, cost))
+            kept_rides.append(rides)
+        routes.sort(key=lambda route: (route[1], len(route[0])))
+        return routes
+
+
+register_strategy(
+    'alternatives',
+    options=('max_overlap', 'max_stretch', 'penalty', 'max_runs'),
+)(AlternativeRoutes())
+
+
+class _PenalizedTable:
+    '''Rows of a CostTable with penalized weights, for `shortest_route`
+    '''
+    def __init__(self, table):
+        self.table = table
+        self.rows = list(table.rows)
+        self.factors = {}
+
+    def add_penalty(self, edges, penalty):
+        changed = set()
+        for edge in edges:
+            self.factors[edge] = self.factors.get(edge, 1) * penalty
+            changed.add(edge[0])
+        for station_id in changed:
+            self.rows[station_id] = tuple(
+                (next_id, weight * self.factors.get((station_id, next_id), 1),
+                 kind)
+                for next_id, weight, kind in self.table.rows[station_id]
+            )
+
+
+def _route_cost(table, edges):
+    cost = 0
+    for station_id, next_station_id in edges:
+        for next_id, weight, _ in table.rows[station_id]:
+            if next_id == next_station_id:
+                cost += weight
+                break
+    return cost
+
+
+def _ride_edges(table, edges):
+    '''Connections along a line among edges, transfers are left out so
+    that routes only told apart by where they change lines overlap
+    '''
+    rides = set()
+    for station_id, next_station_id in edges:
+        for next_id, _, kind in table.rows[station_id]:
+            if next_id == next_station_id and kind != TRANSFER:
+                rides.add((station_id, next_station_id))
+                break
+    return rides
+
+
+def _overlap(rides, kept):
+    '''Share of rides also in kept, 0 for a route without any ride
+    '''
+    if not rides:
+        return 0
+    return len(rides & kept) / len(rides)
@@ -0,0 +1,225 @@
+'''Routing of many origin-destination pairs at once
+
+`BatchRouter` answers a stream of (start, end) pairs. Datetime parsing,
+weights and station lookups are done once per distinct value. For the best
+route (limit=1) it runs a single `shortest_route_tree` per origin station
+and weights profile, which answers every destination from that origin.
+Pairs are read in chunks which are processed grouped by origin, and results
+are yielded in the order of the input, so memory does not grow with the
+number of pairs. A pair with an unknown station gets None as routes and
+the other pairs are still routed.
+
+`route_in_processes` spreads each chunk over a pool of worker processes.
+The PathFinder is handed to every worker once, when the worker starts
+(inherited without copying where processes are forked), and each worker
+keeps its own BatchRouter. A chunk is sharded by origin so the route trees
+of an origin are computed by one worker only, and the results are put back
+in input order, so the output does not depend on the number of workers.
+'''
+from itertools import islice
+import multiprocessing
+
+from .route_cache import RouteCache
+from .shortest_path import shortest_route_tree, tree_route
+from .strategies import StrategyFactory
+from .weights import get_profile
+
+
+class BatchRouter:
+    def __init__(
+            self, path_finder, limit=1, strategy=None, cache_size=1024):
+        '''Route pairs with the map and weights of path_finder
+
+        limit: max number of routes per pair
+        strategy: search strategy for limit other than 1, exhaustive if None
+        cache_size: max number of datetimes and route trees kept between
+            chunks
+        '''
+        self.path_finder = path_finder
+        self.mrt_map = path_finder.mrt_map
+        self.limit = limit
+        self.strategy = strategy
+        self._station_ids = {}
+        self._tables = RouteCache(cache_size)
+        self._trees = RouteCache(cache_size)
+        self._version = self.mrt_map.version
+
+    def route(self, pairs, dt=None, chunk_size=1024):
+        '''Yield (start, end, routes) for each pair in pairs
+
+        routes is None if start or end is not a valid station.
+        pairs: iterable of (start, end) or (start, end, dt)
+        dt: datetime string for the pairs without one
+        '''
+        pairs = iter(pairs)
+        while True:
+            chunk = list(islice(pairs, chunk_size))
+            if not chunk:
+                break
+            for result in self.route_chunk(chunk, dt):
+                yield result
+
+    def route_chunk(self, chunk, dt=None):
+        '''List of (start, end, routes) for a list of pairs
+        '''
+        if self.mrt_map.version != self._version:
+            # the map changed, ids and trees may be stale
+            self._station_ids.clear()
+            self._tables.clear()
+            self._trees.clear()
+            self._version = self.mrt_map.version
+        queries = []
+        for pair in chunk:
+            start, end = pair[0], pair[1]
+            table_key, table = self._get_table(
+                pair[2] if len(pair) > 2 else dt
+            )
+            queries.append((
+                table_key,
+                table,
+                self._get_station_ids(start),
+                self._get_station_ids(end),
+            ))
+        # group by weights and origin so their route trees are reused
+        order = sorted(
+            range(len(chunk)),
+            key=lambda index: (
+                str(queries[index][0]), sorted(queries[index][2] or ()),
+            ),
+        )
+        results = [None] * len(chunk)
+        for index in order:
+            if None in queries[index][2:]:
+                results[index] = (chunk[index][0], chunk[index][1], None)
+                continue
+            routes = self._find_routes(*queries[index])
+            results[index] = (chunk[index][0], chunk[index][1], [
+                (self.mrt_map.to_stations(route), cost)
+                for route, cost in routes
+            ])
+        return results
+
+    def _find_routes(self, table_key, table, start, end):
+        if self.limit != 1 or self.strategy is not None:
+            search = StrategyFactory.get_strategy(
+                self.strategy or 'exhaustive'
+            )
+            return search(self.mrt_map, start, end, table, self.limit)
+        route_table = table.route_table
+        if route_table is not None:
+            route = route_table.find_route(start, end)
+        else:
+            route = tree_route(
+                lambda source: self._get_tree(table_key, table, source),
+                start, end,
+            )
+        if route is None:
+            return []
+        return [route]
+
+    def _get_tree(self, table_key, table, source):
+        key = (table_key, source)
+        tree = self._trees.get(key)
+        if tree is None:
+            tree = shortest_route_tree(table, source) + (0,)
+            self._trees.put(key, tree)
+        return tree
+
+    def _get_table(self, dt):
+        '''(key, CostTable) for datetime string dt
+
+        Datetimes falling in the same weights profile share the key.
+        '''
+        entry = self._tables.get(dt)
+        if entry is None:
+            weights = self.path_finder.get_weights(dt)
+            profile = get_profile(weights)
+            table_key = profile if profile is not None else ('dt', dt)
+            entry = (table_key, self.mrt_map.get_cost_table(weights))
+            self._tables.put(dt, entry)
+        return entry
+
+    def _get_station_ids(self, param):
+        '''Ids of the stations of name or code param, None if not valid
+        '''
+        station_ids = self._station_ids.get(param)
+        if station_ids is None:
+            try:
+                station_ids = frozenset(
+                    self.mrt_map.map_to_station_ids(param)
+                )
+            except ValueError:
+                # not kept, so invalid input does not fill the map
+                return None
+            self._station_ids[param] = station_ids
+        return station_ids
+
+
+# BatchRouter of the current worker process, see `route_in_processes`
+_worker_router = None
+
+
+def route_in_processes(
+        path_finder, pairs, dt=None, limit=1, strategy=None,
+        chunk_size=1024, workers=None):
+    '''Same as `BatchRouter.route` with a pool of worker processes
+
+    workers: number of processes, the number of CPUs if None
+    '''
+    if workers is None:
+        workers = multiprocessing.cpu_count()
+    methods = multiprocessing.get_all_start_methods()
+    context = multiprocessing.get_context(
+        'fork' if 'fork' in methods else None
+    )
+    pool = context.Pool(
+        workers,
+        initializer=_init_worker,
+        initargs=(path_finder, limit, strategy),
+    )
+    try:
+        pairs = iter(pairs)
+        while True:
+            chunk = list(islice(pairs, chunk_size))
+            if not chunk:
+                break
+            results = [None] * len(chunk)
+            shards = _shard_by_origin(chunk, workers)
+            for shard_results in pool.map(_route_shard, [
+                    (shard, dt) for shard in shards]):
+                for index, result in shard_results:
+                    results[index] = result
+            for result in results:
+                yield result
+    finally:
+        pool.terminate()
+        pool.join()
+
+
+def _shard_by_origin(chunk, workers):
+    '''Split chunk into at most workers lists of (index, pair)
+
+    All the pairs of an origin go to the same shard. Origins are placed
+    largest first on the smallest shard, which only depends on the chunk.
+    '''
+    origins = {}
+    for index, pair in enumerate(chunk):
+        origins.setdefault(pair[0], []).append((index, pair))
+    groups = sorted(
+        origins.values(), key=lambda group: (-len(group), group[0][0])
+    )
+    shards = [[] for _ in range(min(workers, len(groups)))]
+    for group in groups:
+        min(shards, key=len).extend(group)
+    return shards
+
+
+def _init_worker(path_finder, limit, strategy):
+    global _worker_router
+    _worker_router = BatchRouter(path_finder, limit, strategy)
+
+
+def _route_shard(task):
+    shard, dt = task
+    results = _worker_router.route_chunk([pair for _, pair in shard], dt)
+    return [(index, result) for (index, _), result in zip(shard, results)]
@@ -0,0 +1,179 @@
+'''Bidirectional Dijkstra search for the single best route
+
+The search runs forward from all the start stations and backward over the
+reversed connections (`CostTable.get_reverse_rows`) from all the end
+stations at once, which matters for interchanges given by name. Forward
+states are (station id, reached by transfer) as in `shortest_route` and
+backward states are (station id, left by transfer), so the two searches
+only meet where the route does not take two transfers in a row. The two
+searches take turns expanding the cheaper of their next states and stop
+once the keys at the top of both queues add up to at least the best route
+found where the searches met, which proves the route optimal. For long
+routes each side only explores about half the cost radius.
+
+Keys are (cost, steps) pairs added component by component and compared in
+order, so routes are ranked by cost first and steps second as everywhere
+else.
+'''
+import heapq
+
+from .graph import TRANSFER
+from .shortest_path import shortest_route
+from .strategies import register_strategy
+
+
+def bidirectional_route(table, start, end, stats=None):
+    '''Find the best route from any station id in start to any in end
+
+    stats: SearchStats to count the work of both sides in
+
+    Returns (list of station ids, cost) or None when no route is available.
+    '''
+    rows = table.rows
+    reverse_rows = table.get_reverse_rows()
+    # states are numbered 2 * station id + transferred, where transferred
+    # tells whether the station is reached (forward) or left (backward)
+    # with a transfer
+    forward = _Side([2 * station_id for station_id in start], stats)
+    backward = _Side([2 * station_id for station_id in end], stats)
+    best = None
+    meeting = None
+    for state in forward.keys:
+        if state in backward.keys:
+            best = (0, 0)
+            meeting = (state, state)
+    while forward.pq and backward.pq:
+        forward_top = forward.pq[0]
+        backward_top = backward.pq[0]
+        if best is not None and (
+                forward_top[0] + backward_top[0],
+                forward_top[1] + backward_top[1]) >= best:
+            break
+        if forward_top[:2] <= backward_top[:2]:
+            side, other = forward, backward
+        else:
+            side, other = backward, forward
+        cost, steps, state = heapq.heappop(side.pq)
+        if state in side.settled:
+            if stats is not None:
+                stats.discarded += 1
+            continue
+        side.settled.add(state)
+        if stats is not None:
+            stats.expanded(len(forward.pq) + len(backward.pq) + 1, state)
+        station_id = state >> 1
+        if side is forward:
+            # routes stop at the first end station they reach
+            if station_id in end:
+                continue
+            next_states = _next_states(rows, state)
+        else:
+            next_states = _previous_states(reverse_rows, state, end)
+        for next_state, weight in next_states:
+            if next_state in side.settled:
+                continue
+            key = (cost + weight, steps + 1)
+            if not side.relax(next_state, key, state):
+                continue
+            base = next_state & ~1
+            for other_state in (base, base + 1):
+                other_key = other.keys.get(other_state)
+                # a transfer into the station followed by one out of it
+                if other_key is None or next_state & other_state & 1:
+                    continue
+                total = (key[0] + other_key[0], key[1] + other_key[1])
+                if best is None or total < best:
+                    best = total
+                    if side is forward:
+                        meeting = (next_state, other_state)
+                    else:
+                        meeting = (other_state, next_state)
+    if best is None:
+        return None
+    route = forward.to_route(meeting[0])
+    route.reverse()
+    route.extend(backward.to_route(meeting[1])[1:])
+    if len(set(route)) < len(route):
+        # the best walk revisits a station, which the exhaustive search
+        # does not allow, fall back to the loop aware search
+        return shortest_route(
+            table, [(station_id, False) for station_id in start], end,
+            stats=stats,
+        )
+    return route, best[0]
+
+
+class _Side:
+    def __init__(self, sources, stats=None):
+        '''Queue, best keys and parents of one direction of the search
+        '''
+        self.stats = stats
+        self.keys = {}
+        self.parents = {}
+        self.settled = set()
+        self.pq = []
+        for state in sources:
+            self.keys[state] = (0, 0)
+            self.parents[state] = -1
+            self.pq.append((0, 0, state))
+        heapq.heapify(self.pq)
+        if stats is not None:
+            stats.pushes += len(self.pq)
+
+    def relax(self, state, key, parent):
+        '''Record key for state if better than known, True if recorded
+        '''
+        known = self.keys.get(state)
+        if known is not None and known <= key:
+            return False
+        self.keys[state] = key
+        self.parents[state] = parent
+        heapq.heappush(self.pq, key + (state,))
+        if self.stats is not None:
+            self.stats.pushes += 1
+        return True
+
+    def to_route(self, state):
+        '''Station ids from state back to the source of this side
+        '''
+        route = []
+        while state >= 0:
+            route.append(state >> 1)
+            state = self.parents[state]
+        return route
+
+
+def _next_states(rows, state):
+    transferred = state & 1
+    for next_station_id, weight, kind in rows[state >> 1]:
+        is_transfer = kind == TRANSFER
+        if is_transfer and transferred:
+            continue
+        yield 2 * next_station_id + is_transfer, weight
+
+
+def _previous_states(reverse_rows, state, end):
+    '''Backward states of the stations with an edge leading to state
+    '''
+    transferred = state & 1
+    for station_id, weight, kind in reverse_rows[state >> 1]:
+        is_transfer = kind == TRANSFER
+        if is_transfer and transferred:
+            continue
+        # no route goes through an end station
+        if station_id in end:
+            continue
+        yield 2 * station_id + is_transfer, weight
+
+
+@register_strategy('bidirectional')
+def bidirectional_strategy(
+        mrt_map, start, end, table, limit=None, stats=None):
+    '''Find the single best route searching from both start and end
+
+    Only the best route is returned.
+    '''
+    route = bidirectional_route(table, start, end, stats)
+    if route is None:
+        return []
+    return [route]
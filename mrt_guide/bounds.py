@@ -0,0 +1,128 @@
+'''Bounds cutting multi-route searches short
+
+Asking for a few alternatives between far away stations makes the
+exhaustive search expand every partial route cheaper than the last route
+found, most of them long detours. `SearchBounds` limits which routes are
+wanted and how much work may be spent finding them:
+
+    max_cost_ratio: only routes costing at most this times the best route
+        within the max transfers
+    max_transfers: only routes with at most this number of transfers
+    max_expansions: stop after expanding this number of search states
+    time_budget: stop after this number of seconds
+
+Routes outside the first two bounds are left out exactly. Partial routes
+are pruned with `remaining_costs`, a lower bound of the cost left to reach
+the end computed by one backward Dijkstra search per query: a partial
+route whose cost plus bound exceeds the ratio can not lead to a wanted
+route. When a budget runs out the routes found so far are returned and
+`SearchStats.truncated` is set. Strategies supporting bounds are registered
+with `bounded=True`, see `mrt_guide.strategies`.
+'''
+import heapq
+import time
+
+
+class SearchBounds:
+    def __init__(
+            self, max_cost_ratio=None, max_transfers=None,
+            max_expansions=None, time_budget=None):
+        '''Bounds of a search, None for no bound
+        '''
+        if max_cost_ratio is not None and not max_cost_ratio >= 1:
+            raise ValueError('max_cost_ratio must be at least 1')
+        if max_transfers is not None and max_transfers < 0:
+            raise ValueError('max_transfers must not be negative')
+        if max_expansions is not None and max_expansions < 1:
+            raise ValueError('max_expansions must be positive')
+        if time_budget is not None and not time_budget > 0:
+            raise ValueError('time_budget must be positive')
+        self.max_cost_ratio = max_cost_ratio
+        self.max_transfers = max_transfers
+        self.max_expansions = max_expansions
+        self.time_budget = time_budget
+
+    def __repr__(self):
+        return 'SearchBounds[{},{},{},{}]'.format(
+            self.max_cost_ratio, self.max_transfers, self.max_expansions,
+            self.time_budget,
+        )
+
+    def get_key(self):
+        '''Key for caching the routes found
+
+        Budgets are left out: the routes found within a budget that was
+        not exhausted are the same as without it, and the others are not
+        to be cached.
+        '''
+        return (self.max_cost_ratio, self.max_transfers)
+
+    def has_budget(self):
+        return self.max_expansions is not None or self.time_budget is not None
+
+    def limits_routes(self):
+        '''Whether some routes are left out, besides those not found within
+        a budget
+        '''
+        return self.max_cost_ratio is not None or (
+            self.max_transfers is not None
+        )
+
+    def get_max_cost(self, best_cost):
+        '''Max cost of the wanted routes given the cost of the best one
+        '''
+        if self.max_cost_ratio is None:
+            return None
+        return best_cost * self.max_cost_ratio
+
+    def get_budget(self, check_every=1):
+        '''Budget of the search starting now
+
+        check_every: number of calls to `Budget.exhausted` between two
+            reads of the clock
+        '''
+        return Budget(self, check_every)
+
+
+class Budget:
+    def __init__(self, bounds, check_every=1):
+        self.max_expansions = bounds.max_expansions
+        self.deadline = None
+        if bounds.time_budget is not None:
+            self.deadline = time.perf_counter() + bounds.time_budget
+        self.check_every = check_every
+        self._calls = 0
+
+    def exhausted(self, expansions):
+        '''True once expansions reach the max or the time is over
+        '''
+        if self.max_expansions is not None and (
+                expansions >= self.max_expansions):
+            return True
+        if self.deadline is not None:
+            self._calls += 1
+            if self._calls % self.check_every == 0:
+                return time.perf_counter() > self.deadline
+        return False
+
+
+def remaining_costs(table, end):
+    '''Lower bound of the cost from every station id to any in end
+
+    Returns a list indexed by station id, None for the stations which can
+    not reach end. Rules of the routes (no two transfers in a row, no loop)
+    are ignored, which only makes the bounds lower.
+    '''
+    reverse_rows = table.get_reverse_rows()
+    costs = [None] * len(reverse_rows)
+    pq = [(0, station_id) for station_id in end]
+    heapq.heapify(pq)
+    while pq:
+        cost, station_id = heapq.heappop(pq)
+        if costs[station_id] is not None:
+            continue
+        costs[station_id] = cost
+        for previous_id, weight, _ in reverse_rows[station_id]:
+            if costs[previous_id] is None:
+                heapq.heappush(pq, (cost + weight, previous_id))
+    return costs
@@ -0,0 +1,464 @@
+'''Contraction hierarchies, registered as "contraction" search strategy
+
+On networks far larger than the MRT, every query of the other strategies
+still settles a large part of the graph. A `ContractionHierarchy` is
+preprocessed once per `CostTable`: states are contracted one by one in
+order of importance, and whenever a best route went through a contracted
+state, a shortcut edge replaces it between its remaining neighbours. A
+query then only climbs towards more important states, with a Dijkstra
+search from start and one from end meeting at the top, which settles a few
+hundred states even on networks of tens of thousands of stations.
+
+The hierarchy is built over the states of `shortest_route_tree`, state
+`2 * station id + transferred`, so routes never take two transfers in a
+row. Edges are keyed by cost and then number of steps, the order of the
+other strategies. A shortcut records the state it skips, which is how
+routes are unpacked back into stations. When the best route goes through a
+station twice, under both states, the query falls back to `shortest_route`
+as the loop aware search.
+
+Building is the expensive part. The shortcuts a state needs are found by
+witness searches and kept until one of its neighbours is contracted, as
+only then can they change, so the order of contraction is kept up to date
+without searching again for every state taken off the queue. Interchanges
+served by many lines still end up in a dense core of the last states,
+whose contraction takes most of the time: minutes for tens of thousands of
+stations. Hierarchies are meant to be built ahead of time, see
+`PathFinder.precompute_hierarchies`, and are saved to and loaded from
+binary files the same way as route tables: loading maps the file and reads
+the arrays in place.
+'''
+from array import array
+import heapq
+import mmap
+import struct
+
+from .graph import TRANSFER
+from .shortest_path import shortest_route
+from .strategies import register_strategy
+
+
+MAGIC = b'MRTCHIER'
+VERSION = 2
+# magic, version, number of states, number of upward and downward edges,
+# weight typecode, length of codes, checksum of the CostTable
+HEADER = struct.Struct('<8sHIIIcxI32s')
+ALIGNMENT = 8
+# max number of states a witness search settles before giving up and
+# adding the shortcut
+WITNESS_LIMIT = 200
+
+
+class ContractionHierarchy:
+    def __init__(self, codes, ranks, up, down, checksum=b''):
+        '''Upward and downward edges of the contracted states
+
+        codes: station codes in station id order, to check compatibility
+        ranks: order of contraction of each state
+        up: (offsets, targets, weights, middles) in CSR form of the edges
+            from each state to more important states
+        down: (offsets, sources, weights, middles) in CSR form of the edges
+            into each state from more important states
+        Weights are cost * (number of states + 1) + steps, middles are the
+        state a shortcut skips or -1 for edges of the CostTable.
+        checksum: `CostTable.get_checksum` of the table it was built for
+        '''
+        self.codes = codes
+        self.ranks = ranks
+        self.up = up
+        self.down = down
+        self.checksum = checksum
+        # file the hierarchy is mapped from, if loaded
+        self.path = None
+        # (state, weight) tuples of the up and down edges of each state,
+        # made from the arrays on first use by a query
+        self._up_rows = [None] * len(ranks)
+        self._down_rows = [None] * len(ranks)
+
+    def __reduce__(self):
+        # same as RouteTable, mapped again instead of copied
+        if self.path is not None:
+            return (ContractionHierarchy.load, (self.path,))
+        return (
+            ContractionHierarchy,
+            (self.codes, self.ranks, self.up, self.down, self.checksum),
+        )
+
+    @classmethod
+    def build(cls, mrt_map, table):
+        '''Contract the states of a CostTable of mrt_map
+        '''
+        rows = table.rows
+        size = 2 * len(rows)
+        scale = size + 1
+        integral = all(
+            isinstance(weight, int)
+            for row in rows for _, weight, _ in row
+        )
+        out_edges = [{} for _ in range(size)]
+        in_edges = [{} for _ in range(size)]
+        # stations reached by transfer, the other ones never are in the
+        # transferred state and it gets no edge
+        transferred = set(
+            2 * next_station_id + 1
+            for row in rows for next_station_id, _, kind in row
+            if kind == TRANSFER
+        )
+        for station_id, row in enumerate(rows):
+            for next_station_id, weight, kind in row:
+                is_transfer = kind == TRANSFER
+                key = weight * scale + 1
+                next_state = 2 * next_station_id + is_transfer
+                for state in (2 * station_id, 2 * station_id + 1):
+                    if state & 1 and (
+                            is_transfer or state not in transferred):
+                        continue
+                    if key < out_edges[state].get(next_state, key + 1):
+                        out_edges[state][next_state] = key
+                        in_edges[next_state][state] = key
+        middles = {}
+        deleted = [0] * size
+        # shortcuts needed to contract each state, None once a neighbour
+        # was contracted since they were computed
+        shortcuts = [
+            _shortcuts(out_edges, in_edges, state) for state in range(size)
+        ]
+        pq = [
+            (_priority(out_edges, in_edges, deleted, state, shortcuts[state]),
+             state)
+            for state in range(size)
+        ]
+        heapq.heapify(pq)
+        ranks = [0] * size
+        up_rows = [None] * size
+        down_rows = [None] * size
+        rank = 0
+        while pq:
+            priority, state = heapq.heappop(pq)
+            if shortcuts[state] is None:
+                # priorities change as neighbours get contracted, contract
+                # the state only if it still comes first
+                shortcuts[state] = _shortcuts(out_edges, in_edges, state)
+                priority = _priority(
+                    out_edges, in_edges, deleted, state, shortcuts[state],
+                )
+                if pq and priority > pq[0][0]:
+                    heapq.heappush(pq, (priority, state))
+                    continue
+            for previous, next_state, key in shortcuts[state]:
+                if key < out_edges[previous].get(next_state, key + 1):
+                    out_edges[previous][next_state] = key
+                    in_edges[next_state][previous] = key
+                    middles[(previous, next_state)] = state
+            up_rows[state] = [
+                (next_state, key, middles.get((state, next_state), -1))
+                for next_state, key in sorted(out_edges[state].items())
+            ]
+            down_rows[state] = [
+                (previous, key, middles.get((previous, state), -1))
+                for previous, key in sorted(in_edges[state].items())
+            ]
+            for previous in in_edges[state]:
+                del out_edges[previous][state]
+                deleted[previous] += 1
+                shortcuts[previous] = None
+            for next_state in out_edges[state]:
+                del in_edges[next_state][state]
+                deleted[next_state] += 1
+                shortcuts[next_state] = None
+            out_edges[state] = in_edges[state] = None
+            ranks[state] = rank
+            rank += 1
+        typecode = 'q' if integral else 'd'
+        codes = [station.code for station in mrt_map.stations]
+        return cls(
+            codes, array('i', ranks),
+            _to_csr(up_rows, typecode), _to_csr(down_rows, typecode),
+            table.get_checksum(),
+        )
+
+    def check(self, mrt_map, table=None):
+        '''Raise ValueError if the hierarchy was built for another map, or
+        another CostTable if given, see `RouteTable.check`
+        '''
+        codes = [station.code for station in mrt_map.stations]
+        if codes != self.codes:
+            raise ValueError('Hierarchy does not match the MRT map')
+        if table is not None and table.get_checksum() != self.checksum:
+            raise ValueError('Hierarchy does not match the cost table')
+
+    def count_edges(self):
+        return len(self.up[1]) + len(self.down[1])
+
+    def find_route(self, table, start, end, stats=None):
+        '''Best route from any station id in start to any in end
+
+        table: the CostTable the hierarchy was built for, to cost the route
+        stats: SearchStats to count the work of the search in
+
+        Returns (list of station ids, cost) or None if no route.
+        '''
+        forward = dict((2 * station_id, 0) for station_id in start)
+        backward = {}
+        for station_id in end:
+            backward[2 * station_id] = 0
+            backward[2 * station_id + 1] = 0
+        forward_parents = dict((state, -1) for state in forward)
+        backward_parents = dict((state, -1) for state in backward)
+        forward_pq = [(0, state) for state in sorted(forward)]
+        backward_pq = [(0, state) for state in sorted(backward)]
+        if stats is not None:
+            stats.pushes += len(forward_pq) + len(backward_pq)
+        best = None
+        meeting = None
+        sides = [
+            (forward_pq, forward, forward_parents, backward, self._up_rows,
+             self.up),
+            (backward_pq, backward, backward_parents, forward,
+             self._down_rows, self.down),
+        ]
+        while forward_pq or backward_pq:
+            if not backward_pq or (
+                    forward_pq and forward_pq[0][0] <= backward_pq[0][0]):
+                side = sides[0]
+            else:
+                side = sides[1]
+            pq, dists, parents, other, rows, edges = side
+            if best is not None and pq[0][0] >= best:
+                # nothing cheaper is left on this side
+                del pq[:]
+                continue
+            dist, state = heapq.heappop(pq)
+            if dist > dists[state]:
+                if stats is not None:
+                    stats.discarded += 1
+                continue
+            if stats is not None:
+                stats.expanded(len(forward_pq) + len(backward_pq) + 1, state)
+            if state in other and (
+                    best is None or dist + other[state] < best):
+                best = dist + other[state]
+                meeting = state
+            row = rows[state]
+            if row is None:
+                offsets, targets, weights, _ = edges
+                first, last = offsets[state], offsets[state + 1]
+                row = rows[state] = tuple(
+                    zip(targets[first:last], weights[first:last])
+                )
+            for next_state, weight in row:
+                next_dist = dist + weight
+                if best is not None and next_dist >= best:
+                    continue
+                if next_dist < dists.get(next_state, next_dist + 1):
+                    dists[next_state] = next_dist
+                    parents[next_state] = state
+                    heapq.heappush(pq, (next_dist, next_state))
+                    if stats is not None:
+                        stats.pushes += 1
+        if meeting is None:
+            return None
+        path = []
+        state = meeting
+        while state >= 0:
+            path.append(state)
+            state = forward_parents[state]
+        path.reverse()
+        state = backward_parents[meeting]
+        while state >= 0:
+            path.append(state)
+            state = backward_parents[state]
+        states = [path[0]]
+        for state, next_state in zip(path, path[1:]):
+            states.extend(self._unpack(state, next_state))
+        route = [state >> 1 for state in states]
+        if len(set(route)) < len(route):
+            return shortest_route(
+                table, [(station_id, False) for station_id in start], end,
+                stats=stats,
+            )
+        return route, _route_cost(table, route)
+
+    def _unpack(self, state, next_state):
+        '''States after state on the edge to next_state, shortcuts expanded
+        '''
+        states = []
+        stack = [(state, next_state)]
+        while stack:
+            state, next_state = stack.pop()
+            middle = self._get_middle(state, next_state)
+            if middle < 0:
+                states.append(next_state)
+            else:
+                stack.append((middle, next_state))
+                stack.append((state, middle))
+        return states
+
+    def _get_middle(self, state, next_state):
+        if self.ranks[state] < self.ranks[next_state]:
+            offsets, targets, _, middles = self.up
+            row, other = state, next_state
+        else:
+            offsets, targets, _, middles = self.down
+            row, other = next_state, state
+        for i in range(offsets[row], offsets[row + 1]):
+            if targets[i] == other:
+                return middles[i]
+        raise ValueError('No edge from {} to {}'.format(state, next_state))
+
+    def save(self, path):
+        codes = ','.join(self.codes).encode('utf-8')
+        typecode = self.up[2].typecode
+        with open(path, 'wb') as ofile:
+            ofile.write(HEADER.pack(
+                MAGIC, VERSION, len(self.ranks), len(self.up[1]),
+                len(self.down[1]), typecode.encode('ascii'), len(codes),
+                self.checksum,
+            ))
+            ofile.write(codes)
+            for values in (self.ranks,) + tuple(self.up) + tuple(self.down):
+                ofile.write(b'\0' * (_align(ofile.tell()) - ofile.tell()))
+                values.tofile(ofile)
+
+    @classmethod
+    def load(cls, path):
+        '''Memory map a hierarchy written by `save`
+        '''
+        with open(path, 'rb') as ifile:
+            buffer = mmap.mmap(ifile.fileno(), 0, access=mmap.ACCESS_READ)
+        view = memoryview(buffer)
+        if len(view) < HEADER.size:
+            raise ValueError('Invalid hierarchy file: {}'.format(path))
+        (magic, version, size, up_count, down_count, typecode, codes_len,
+         checksum) = HEADER.unpack_from(view)
+        if magic != MAGIC or version != VERSION:
+            raise ValueError('Invalid hierarchy file: {}'.format(path))
+        typecode = typecode.decode('ascii')
+        offset = HEADER.size
+        codes = bytes(view[offset:offset + codes_len]).decode('utf-8')
+        offset += codes_len
+        layout = [('i', size)]
+        for count in (up_count, down_count):
+            layout.extend([
+                ('i', size + 1), ('i', count), (typecode, count),
+                ('i', count),
+            ])
+        arrays = []
+        for fmt, count in layout:
+            offset = _align(offset)
+            end = offset + count * struct.calcsize(fmt)
+            arrays.append(view[offset:end].cast(fmt))
+            offset = end
+        hierarchy = cls(
+            codes.split(',') if codes else [], arrays[0],
+            tuple(arrays[1:5]), tuple(arrays[5:9]), checksum,
+        )
+        hierarchy.path = path
+        return hierarchy
+
+
+def _shortcuts(out_edges, in_edges, state):
+    '''(previous, next state, key) of the shortcuts needed to contract state
+
+    A shortcut is not needed when a witness search finds a route as good
+    that avoids state. Witness searches are bounded, so some shortcuts are
+    added without being needed, which only costs an edge.
+    '''
+    shortcuts = []
+    for previous, in_key in in_edges[state].items():
+        targets = dict(
+            (next_state, in_key + out_key)
+            for next_state, out_key in out_edges[state].items()
+            if next_state != previous
+        )
+        if not targets:
+            continue
+        dists = _witness_search(out_edges, previous, state, targets)
+        for next_state, key in targets.items():
+            if dists.get(next_state, key + 1) > key:
+                shortcuts.append((previous, next_state, key))
+    return shortcuts
+
+
+def _witness_search(out_edges, source, avoided, targets):
+    '''Costs from source avoiding a state, exact for the targets settled
+    before the search gives up
+    '''
+    max_key = max(targets.values())
+    left = len(targets)
+    dists = {source: 0}
+    pq = [(0, source)]
+    settled = 0
+    while pq and settled < WITNESS_LIMIT:
+        dist, state = heapq.heappop(pq)
+        if dist > dists[state]:
+            continue
+        if dist > max_key:
+            break
+        if state in targets:
+            left -= 1
+            if not left:
+                break
+        settled += 1
+        for next_state, key in out_edges[state].items():
+            if next_state == avoided:
+                continue
+            next_dist = dist + key
+            if next_dist < dists.get(next_state, next_dist + 1):
+                dists[next_state] = next_dist
+                heapq.heappush(pq, (next_dist, next_state))
+    return dists
+
+
+def _priority(out_edges, in_edges, deleted, state, shortcuts):
+    '''Order of contraction, lower first: states adding fewer shortcuts
+    than edges they remove, and with fewer neighbours contracted already,
+    the edge difference weighing twice as much
+    '''
+    edges = len(out_edges[state]) + len(in_edges[state])
+    return 2 * (len(shortcuts) - edges) + deleted[state]
+
+
+def _to_csr(rows, typecode):
+    offsets = array('i', [0])
+    targets = array('i')
+    weights = array(typecode)
+    middles = array('i')
+    for row in rows:
+        for target, weight, middle in row:
+            targets.append(target)
+            weights.append(weight)
+            middles.append(middle)
+        offsets.append(len(targets))
+    return offsets, targets, weights, middles
+
+
+def _route_cost(table, route):
+    cost = 0
+    for station_id, next_station_id in zip(route, route[1:]):
+        for next_id, weight, _ in table.rows[station_id]:
+            if next_id == next_station_id:
+                cost += weight
+                break
+    return cost
+
+
+def _align(offset):
+    return (offset + ALIGNMENT - 1) // ALIGNMENT * ALIGNMENT
+
+
+@register_strategy('contraction')
+def contraction_route(mrt_map, start, end, table, limit=None, stats=None):
+    '''Find the single best route on the ContractionHierarchy of the
+    CostTable
+
+    The hierarchy is built on first use if it was not precomputed or
+    loaded before, which takes a while on large networks. Only the best
+    route is returned.
+    '''
+    if table.hierarchy is None:
+        table.hierarchy = ContractionHierarchy.build(mrt_map, table)
+    route = table.hierarchy.find_route(table, start, end, stats)
+    if route is None:
+        return []
+    return [route]
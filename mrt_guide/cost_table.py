@@ -0,0 +1,125 @@
+'''Edge costs of the MRT graph compiled for a given Weights
+
+Asking a `Weights` for the cost of every connection on every expansion means
+a method call per edge, and an exception for each closed connection at
+night. `CostTable` evaluates the weights once over the whole `CompactGraph`
+and keeps, for each station id, a tuple of (next station id, weight, edge
+kind). Closed connections are simply left out, so a search only iterates
+over plain tuples.
+
+When the map changes (see `MRTMap.add_station`), `CostTable.update` only
+evaluates the weights again for the rows of the stations involved.
+'''
+import hashlib
+
+from .exceptions import DoNotOperateException
+from .graph import TRANSFER
+
+
+class CostTable:
+    def __init__(self, rows, weights=None):
+        '''Pruned adjacency with costs
+
+        rows: list indexed by station id of tuples of
+            (next station id, weight, edge kind)
+        weights: Weights the rows were evaluated with, needed by `update`
+        '''
+        self.rows = rows
+        self.weights = weights
+        # precomputed RouteTable over this table, see `mrt_guide.route_table`
+        self.route_table = None
+        # ContractionHierarchy over this table, see `mrt_guide.contraction`
+        self.hierarchy = None
+        # landmark lower bounds over this table, see `mrt_guide.landmarks`
+        self.landmarks = None
+        # interchanges as hub nodes, see `mrt_guide.hub_graph`
+        self.hub_graph = None
+        # lines as nodes, see `mrt_guide.line_graph`
+        self.line_graph = None
+        self._reverse_rows = None
+
+    @classmethod
+    def compile(cls, mrt_map, weights):
+        '''Evaluate weights over every connection of mrt_map
+        '''
+        graph = mrt_map.graph
+        rows = [
+            _compile_row(mrt_map, weights, station_id,
+                         graph.edges(station_id))
+            for station_id in range(len(mrt_map.stations))
+        ]
+        return cls(rows, weights)
+
+    def update(self, mrt_map, station_ids):
+        '''Evaluate the weights again for the rows of station ids
+
+        Rows are added for stations added to mrt_map since compiled. Tables
+        derived from the rows are dropped.
+        '''
+        while len(self.rows) < len(mrt_map.stations):
+            self.rows.append(())
+        for station_id in station_ids:
+            self.rows[station_id] = _compile_row(
+                mrt_map, self.weights, station_id,
+                mrt_map.get_edges(station_id),
+            )
+        self.route_table = None
+        self.hierarchy = None
+        self.landmarks = None
+        self.hub_graph = None
+        self.line_graph = None
+        self._reverse_rows = None
+
+    def __len__(self):
+        return len(self.rows)
+
+    def get_reverse_rows(self):
+        '''Rows of the connections into each station id
+
+        Same as rows with every connection reversed: a list indexed by
+        station id of tuples of (previous station id, weight, edge kind).
+        '''
+        if self._reverse_rows is None:
+            reverse_rows = [[] for _ in self.rows]
+            for station_id, row in enumerate(self.rows):
+                for next_station_id, weight, kind in row:
+                    reverse_rows[next_station_id].append(
+                        (station_id, weight, kind)
+                    )
+            self._reverse_rows = [tuple(row) for row in reverse_rows]
+        return self._reverse_rows
+
+    def get_checksum(self):
+        '''sha256 digest of the rows, to tell whether a table saved to a
+        file was computed from the same connections and weights
+        '''
+        digest = hashlib.sha256()
+        for row in self.rows:
+            digest.update(repr(row).encode('utf-8'))
+            digest.update(b'\n')
+        return digest.digest()
+
+    def get_cost(self, station_id, next_station_id):
+        '''Weight of the connection, None if closed or not connected
+        '''
+        for connected, weight, _ in self.rows[station_id]:
+            if connected == next_station_id:
+                return weight
+        return None
+
+
+def _compile_row(mrt_map, weights, station_id, edges):
+    stations = mrt_map.stations
+    station = stations[station_id]
+    row = []
+    for next_station_id, kind in edges:
+        next_station = stations[next_station_id]
+        try:
+            if kind == TRANSFER:
+                weight = weights.get_transfer_cost(station, next_station)
+            else:
+                weight = weights.get_direct_cost(station, next_station)
+        except DoNotOperateException:
+            continue
+        row.append((next_station_id, weight, kind))
+    return tuple(row)
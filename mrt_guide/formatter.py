@@ -5,6 +5,7 @@ future extension to the package or self extension to formatters,
 simply inherit from Formatter and register with use of `regiester_formatter'
 decorator.
 '''
+import json
 
 
 _formatters = {}
@@ -90,3 +91,50 @@ class ConsoleFormatter(Formatter):
                 ))
             prev = station
         return results
+
+
+@register_formatter('json')
+class JsonFormatter(Formatter):
+    def __init__(self):
+        super().__init__()
+
+    def format_routes(self, start, end, routes, simple=True, limit=1):
+        '''Format given routes to a JSON document
+
+        Same parameters as `ConsoleFormatter.format_routes`. Each route
+        lists its station codes and steps, plus its cost unless simple.
+        '''
+        results = []
+        for index in range(min(limit, len(routes))):
+            results.append(self.format_route(routes[index], simple))
+        return json.dumps({
+            'start': str(start),
+            'end': str(end),
+            'routes': results,
+        })
+
+    def format_route(self, route, simple):
+        prev = None
+        stations, cost = route
+        steps = []
+        for station in stations:
+            if not prev:
+                prev = station
+                continue
+            if prev.line == station.line:
+                steps.append({
+                    'type': 'take',
+                    'line': station.line,
+                    'from': prev.code,
+                    'to': station.code,
+                })
+            else:
+                steps.append({'type': 'transfer', 'line': station.line})
+            prev = station
+        result = {
+            'stations': [station.code for station in stations],
+            'steps': steps,
+        }
+        if not simple:
+            result['cost'] = cost
+        return result
@@ -0,0 +1,59 @@
+'''Compact integer indexed representation of the MRT graph
+
+Every station gets a dense integer id and connections are stored in
+compressed sparse row (CSR) form: the connections of station id `i` are
+`targets[offsets[i]:offsets[i + 1]]` with the matching `edge_kinds`. The
+arrays hold plain integers, so searches running on them never hash or
+compare `Station` objects.
+'''
+from array import array
+
+
+# kinds of edges in the compact graph
+DIRECT = 0
+TRANSFER = 1
+
+
+class CompactGraph:
+    def __init__(self, offsets, targets, edge_kinds):
+        '''CSR adjacency over station ids
+
+        offsets: array of len(stations) + 1 positions into targets
+        targets: array of connected station ids
+        edge_kinds: array of DIRECT/TRANSFER, one per target
+        '''
+        self.offsets = offsets
+        self.targets = targets
+        self.edge_kinds = edge_kinds
+
+    @classmethod
+    def from_adjacency(cls, stations, station_ids, transfers, neighbors):
+        '''Build from the Station keyed transfers and neighbors maps
+
+        Connections of a station are ordered by kind and then by id, so the
+        layout only depends on the input rows.
+        '''
+        offsets = array('l', [0])
+        targets = array('l')
+        edge_kinds = array('b')
+        for station in stations:
+            for kind, connected in [
+                    (TRANSFER, transfers.get(station, ())),
+                    (DIRECT, neighbors.get(station, ()))]:
+                ids = sorted(station_ids[other] for other in connected)
+                targets.extend(ids)
+                edge_kinds.extend([kind] * len(ids))
+            offsets.append(len(targets))
+        return cls(offsets, targets, edge_kinds)
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+    def edges(self, station_id):
+        '''Yield (next station id, edge kind) from station id
+        '''
+        targets = self.targets
+        edge_kinds = self.edge_kinds
+        for index in range(
+                self.offsets[station_id], self.offsets[station_id + 1]):
+            yield targets[index], edge_kinds[index]
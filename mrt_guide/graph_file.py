@@ -0,0 +1,181 @@
+'''Precompiled binary graph files
+
+Building a PathFinder reads the data file with `csv.DictReader` and builds
+all the maps and the `CompactGraph` of the network again. A graph file holds
+the result instead: the station rows, with every distinct string (column
+names, codes, names, dates) stored once, and the CSR arrays of the graph.
+Only the columns of `StationRow` are kept.
+Loading memory maps the file, so the arrays are used as they are and shared
+between processes mapping the same file. The MRTMap of a loaded file only
+builds its stations up front, the name map and the connections are built
+on first use. Stations and the CostTable of each weights profile are still
+built in every process, which is most of what is left of the startup.
+
+Files record the sha256 of the data file they were compiled from, so a
+stale file is told apart from an up to date one without parsing the data
+file. Layout, with every array aligned to 8 bytes:
+
+    header: magic, format version, number of stations, number of edges,
+        number of rows, number of columns, length of the strings, checksum
+    strings: utf-8 strings separated by newlines
+    cells: array('i') of indices into the strings, the column names
+        followed by the cells of each station row
+    offsets/targets/edge_kinds: arrays of the CompactGraph as 'i'/'i'/'b'
+'''
+from array import array
+import hashlib
+import mmap
+import os
+from pathlib import Path
+import struct
+
+from .graph import CompactGraph
+from .mrt_map import MRTMap
+from .stations_reader import COLUMNS, StationRow
+
+
+MAGIC = b'MRTGRAPH'
+VERSION = 1
+# magic, version, stations, edges, rows, columns, length of strings,
+# checksum
+HEADER = struct.Struct('<8sHxxIIIII32s')
+ALIGNMENT = 8
+
+
+class MappedGraph(CompactGraph):
+    '''CompactGraph over the arrays of a memory mapped graph file
+    '''
+
+    def __init__(self, offsets, targets, edge_kinds, path):
+        super().__init__(offsets, targets, edge_kinds)
+        self.path = path
+
+    def __reduce__(self):
+        # mapped again by other processes instead of copying the arrays
+        return (_load_graph, (self.path,))
+
+
+class GraphFile:
+    def __init__(self, station_rows, graph, checksum=b''):
+        '''Station rows and CompactGraph of a network
+
+        checksum: sha256 digest of the data file the rows were read from
+        '''
+        self.station_rows = station_rows
+        self.graph = graph
+        self.checksum = checksum
+
+    @classmethod
+    def compile(cls, station_rows, checksum=b''):
+        '''Build the graph of station rows
+        '''
+        station_rows = list(station_rows)
+        return cls(station_rows, MRTMap(station_rows).graph, checksum)
+
+    def is_stale(self, data_path):
+        '''True if data_path changed since the file was compiled
+        '''
+        return self.checksum != file_checksum(data_path)
+
+    def to_mrt_map(self):
+        '''MRTMap of the rows searching on the compiled graph
+        '''
+        return MRTMap(self.station_rows, graph=self.graph)
+
+    def save(self, path):
+        '''Write the file, replacing any file at path at once
+        '''
+        columns = list(COLUMNS)
+        strings = {}
+        cells = array('i')
+        for value in columns + [
+                row.get(column) or ''
+                for row in self.station_rows for column in columns]:
+            if '\n' in value:
+                raise ValueError('Invalid value in station rows: {!r}'.format(
+                    value,
+                ))
+            cells.append(strings.setdefault(value, len(strings)))
+        blob = '\n'.join(strings).encode('utf-8')
+        graph = self.graph
+        tmp_path = '{}.{}.tmp'.format(path, os.getpid())
+        with open(tmp_path, 'wb') as ofile:
+            ofile.write(HEADER.pack(
+                MAGIC, VERSION, len(graph), len(graph.targets),
+                len(self.station_rows), len(columns), len(blob),
+                self.checksum,
+            ))
+            ofile.write(blob)
+            for values, typecode in (
+                    (cells, 'i'), (graph.offsets, 'i'), (graph.targets, 'i'),
+                    (graph.edge_kinds, 'b')):
+                ofile.write(b'\0' * (_align(ofile.tell()) - ofile.tell()))
+                array(typecode, values).tofile(ofile)
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path):
+        '''Memory map a file written by `save`
+        '''
+        with open(path, 'rb') as ifile:
+            buffer = mmap.mmap(ifile.fileno(), 0, access=mmap.ACCESS_READ)
+        view = memoryview(buffer)
+        if len(view) < HEADER.size:
+            raise ValueError('Invalid graph file: {}'.format(path))
+        (magic, version, size, edges, rows_len, columns_len, blob_len,
+         checksum) = HEADER.unpack_from(view)
+        if magic != MAGIC or version != VERSION:
+            raise ValueError('Invalid graph file: {}'.format(path))
+        offset = HEADER.size
+        blob = bytes(view[offset:offset + blob_len]).decode('utf-8')
+        strings = blob.split('\n')
+        offset += blob_len
+        arrays = []
+        for count, fmt in (
+                ((rows_len + 1) * columns_len, 'i'), (size + 1, 'i'),
+                (edges, 'i'), (edges, 'b')):
+            offset = _align(offset)
+            end = offset + count * struct.calcsize(fmt)
+            arrays.append(view[offset:end].cast(fmt))
+            offset = end
+        cells = arrays[0].tolist()
+        # values of each column, rows share the strings decoded once
+        values = {}
+        for position, cell in enumerate(cells[:columns_len]):
+            values[strings[cell]] = [
+                strings[value]
+                for value in cells[columns_len + position::columns_len]
+            ]
+        station_rows = list(map(StationRow, *[
+            values.get(column, [''] * rows_len) for column in COLUMNS
+        ]))
+        graph = MappedGraph(arrays[1], arrays[2], arrays[3], path)
+        return cls(station_rows, graph, checksum)
+
+
+def file_checksum(path):
+    '''sha256 digest of the content of the file at path
+
+    A directory, e.g. a GTFS feed, is hashed with the names and content of
+    its files.
+    '''
+    path = Path(path)
+    digest = hashlib.sha256()
+    paths = [path]
+    if path.is_dir():
+        paths = sorted(child for child in path.iterdir() if child.is_file())
+    for file_path in paths:
+        if file_path != path:
+            digest.update(file_path.name.encode('utf-8') + b'\0')
+        with open(file_path, 'rb') as ifile:
+            for block in iter(lambda: ifile.read(1 << 16), b''):
+                digest.update(block)
+    return digest.digest()
+
+
+def _load_graph(path):
+    return GraphFile.load(path).graph
+
+
+def _align(offset):
+    return (offset + ALIGNMENT - 1) // ALIGNMENT * ALIGNMENT
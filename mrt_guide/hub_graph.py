@@ -0,0 +1,199 @@
+'''Interchanges as hub nodes, registered as "hub" search strategy
+
+In the `CostTable` the stations of an interchange are connected pairwise by
+transfers, so an interchange of k lines has k * (k - 1) transfer edges, and
+searches keep a flag per station to forbid taking two transfers in a row.
+
+`HubGraph` models an interchange instead as one hub node. Every station has
+an arrival node, which it is reached at along its line and which leads to
+the hub of its interchange, and stations that can be transferred to get a
+boarded node, reached from the hub and only leading along the line. An
+interchange has 2 * k edges to its hub, and since a boarded node has no
+edge back to the hub, two transfers in a row can not be taken by
+construction: searches run a plain Dijkstra over nodes.
+
+A transfer costs the edge out of the hub, so the hub only replaces the
+transfers of an interchange whose cost only depends on the station
+transferred to, and which are open between all the stations having one
+open in and one open out, which holds for all the weights of the package.
+It also has to save edges, which takes interchanges of 4 lines or more.
+Other interchanges keep their transfers, from arrival to boarded nodes.
+Edges into a hub count no step, so routes rank the same as in the other
+strategies.
+'''
+import heapq
+
+from .graph import TRANSFER
+from .shortest_path import shortest_route
+from .strategies import register_strategy
+
+
+class HubGraph:
+    def __init__(self, rows, node_stations):
+        '''Adjacency over nodes
+
+        rows: list indexed by node of tuples of (next node, weight, steps)
+        node_stations: station id of each node, -1 for hubs. Node i is the
+            arrival node of station id i
+        '''
+        self.rows = rows
+        self.node_stations = node_stations
+
+    @classmethod
+    def compile(cls, mrt_map, table):
+        '''Build from a CostTable of mrt_map
+        '''
+        size = len(table.rows)
+        node_stations = list(range(size))
+        transfers = {}
+        for station_id, row in enumerate(table.rows):
+            for next_station_id, weight, kind in row:
+                if kind == TRANSFER:
+                    transfers[(station_id, next_station_id)] = weight
+        boarded = {}
+        hub_edges = []
+        for stations in mrt_map.station_name_map.values():
+            ids = sorted(mrt_map.station_ids[station] for station in stations)
+            pairs = [
+                (station_id, other_id)
+                for station_id in ids for other_id in ids
+                if (station_id, other_id) in transfers
+            ]
+            if not pairs:
+                continue
+            for _, other_id in pairs:
+                if other_id not in boarded:
+                    boarded[other_id] = len(node_stations)
+                    node_stations.append(other_id)
+            hub_edges.append(_hub_edges(transfers, pairs))
+        rows = [[] for _ in node_stations]
+        for station_id, row in enumerate(table.rows):
+            direct = [
+                (next_station_id, weight, 1)
+                for next_station_id, weight, kind in row
+                if kind != TRANSFER
+            ]
+            rows[station_id].extend(direct)
+            if station_id in boarded:
+                rows[boarded[station_id]].extend(direct)
+        for edges in hub_edges:
+            if edges[0] == 'hub':
+                hub = len(node_stations)
+                node_stations.append(-1)
+                rows.append([
+                    (boarded[other_id], weight, 1)
+                    for other_id, weight in edges[2]
+                ])
+                for station_id in edges[1]:
+                    rows[station_id].append((hub, 0, 0))
+            else:
+                for station_id, other_id, weight in edges[1]:
+                    rows[station_id].append((boarded[other_id], weight, 1))
+        return cls([tuple(row) for row in rows], node_stations)
+
+    def __len__(self):
+        return len(self.rows)
+
+    def count_edges(self):
+        return sum(len(row) for row in self.rows)
+
+
+def _hub_edges(transfers, pairs):
+    '''Edges replacing the transfers pairs of an interchange
+
+    Returns ('hub', station ids leading to the hub, list of (station id,
+    weight) out of the hub) when the transfers can go through a hub with
+    fewer edges and ('pairs', list of (station id, next station id,
+    weight)) otherwise.
+    '''
+    sources = sorted(set(station_id for station_id, _ in pairs))
+    weights = {}
+    for station_id, other_id in pairs:
+        weights.setdefault(other_id, set()).add(
+            transfers[(station_id, other_id)]
+        )
+    targets = sorted(weights)
+    if len(sources) + len(targets) < len(pairs) and all(
+            len(values) == 1 for values in weights.values()) and all(
+            (station_id, other_id) in transfers
+            for station_id in sources for other_id in targets
+            if station_id != other_id):
+        return ('hub', sources, [
+            (other_id, next(iter(weights[other_id]))) for other_id in targets
+        ])
+    return ('pairs', [
+        (station_id, other_id, transfers[(station_id, other_id)])
+        for station_id, other_id in pairs
+    ])
+
+
+def hub_route(hub_graph, start, end, stats=None):
+    '''Find the best route from any station id in start to any in end
+
+    stats: SearchStats to count the work of the search in
+
+    Returns (list of station ids, cost) or None when no route is available.
+    The route may go through a station twice, at its arrival and boarded
+    nodes, which other strategies do not allow.
+    '''
+    rows = hub_graph.rows
+    node_stations = hub_graph.node_stations
+    best = {}
+    parents = {}
+    pq = []
+    for node in start:
+        best[node] = (0, 0)
+        pq.append((0, 0, node, -1))
+    heapq.heapify(pq)
+    if stats is not None:
+        stats.pushes += len(pq)
+    while pq:
+        cost, steps, node, parent = heapq.heappop(pq)
+        if node in parents:
+            if stats is not None:
+                stats.discarded += 1
+            continue
+        parents[node] = parent
+        if stats is not None:
+            stats.expanded(len(pq) + 1, node)
+        if node_stations[node] in end:
+            route = []
+            while node >= 0:
+                if node_stations[node] >= 0:
+                    route.append(node_stations[node])
+                node = parents[node]
+            route.reverse()
+            return route, cost
+        for next_node, weight, step in rows[node]:
+            if next_node in parents:
+                continue
+            key = (cost + weight, steps + step)
+            known = best.get(next_node)
+            if known is not None and known <= key:
+                continue
+            best[next_node] = key
+            heapq.heappush(pq, key + (next_node, node))
+            if stats is not None:
+                stats.pushes += 1
+    return None
+
+
+@register_strategy('hub')
+def hub_strategy(mrt_map, start, end, table, limit=None, stats=None):
+    '''Find the single best route on the HubGraph of the CostTable
+
+    The HubGraph is built on first use. Only the best route is returned.
+    '''
+    if table.hub_graph is None:
+        table.hub_graph = HubGraph.compile(mrt_map, table)
+    route = hub_route(table.hub_graph, start, end, stats)
+    if route is not None and len(set(route[0])) < len(route[0]):
+        # the best walk revisits a station, fall back to the loop aware
+        # search
+        route = shortest_route(
+            table, [(station_id, False) for station_id in start], end,
+            stats=stats,
+        )
+    if route is None:
+        return []
+    return [route]
@@ -0,0 +1,137 @@
+'''K shortest loopless routes with Yen's algorithm
+
+Instead of enumerating every partial route in cost order, Yen's algorithm
+derives the k-th best route from the (k-1) routes found so far: for every
+station on the previous route it bans the already used continuations and
+runs a single best route search (see `shortest_route`) from that station.
+Asking for the top k routes therefore costs O(k * n) Dijkstra runs no matter
+how many routes exist between start and end.
+
+Multiple start stations (e.g. an interchange given by name) are handled as a
+virtual source connected to every start station, which is the spur point
+with index -1 below.
+
+With bounds, spur searches are goal directed by `remaining_costs`, those
+whose root alone exceeds the max cost are skipped and the search stops at
+the first candidate costing more than it, once the best route within the
+max transfers is known. Routes with too many transfers
+are still used to derive the next ones but are not returned.
+'''
+from itertools import count
+import heapq
+
+from .bounds import remaining_costs
+from .graph import TRANSFER
+from .shortest_path import shortest_route
+from .stats import SearchStats
+from .strategies import register_strategy
+
+
+@register_strategy('yen', bounded=True)
+def yen_k_shortest_routes(
+        mrt_map, start, end, table, limit=None, stats=None, bounds=None):
+    '''Find up to limit loopless routes from start to end ranked by cost
+    '''
+    heuristic = None
+    max_cost = None
+    if bounds is not None:
+        remaining = remaining_costs(table, end)
+        heuristic = remaining.__getitem__
+        budget = bounds.get_budget()
+        if stats is None and budget.max_expansions is not None:
+            # the budget counts expansions of the spur searches
+            stats = SearchStats()
+    first = shortest_route(
+        table, [(station_id, False) for station_id in start], end,
+        heuristic=heuristic, stats=stats,
+    )
+    if first is None:
+        return []
+    routes = [first]
+    prefixes = [_prefixes(table, first[0])]
+    found = []
+    if _within_transfers(prefixes[0], bounds):
+        found.append(first)
+        if bounds is not None:
+            max_cost = bounds.get_max_cost(first[1])
+    tie_breaker = count()
+    candidates = []
+    seen = set([tuple(first[0])])
+    while limit is None or len(found) < limit:
+        prev_route = routes[-1][0]
+        for i in range(-1, len(prev_route) - 1):
+            if bounds is not None and budget.exhausted(
+                    stats.expansions if stats is not None else 0):
+                if stats is not None:
+                    stats.truncated = True
+                return found
+            root = prev_route[:i + 1]
+            banned_edges = set()
+            banned_firsts = set()
+            for route, _ in routes:
+                if route[:i + 1] != root:
+                    continue
+                if i < 0:
+                    banned_firsts.add(route[0])
+                else:
+                    banned_edges.add((route[i], route[i + 1]))
+            if i < 0:
+                sources = [
+                    (station_id, False) for station_id in start
+                    if station_id not in banned_firsts
+                ]
+                root_cost = 0
+            else:
+                root_cost, transferred = prefixes[-1][i]
+                sources = [(root[-1], transferred)]
+                if max_cost is not None and (
+                        remaining[root[-1]] is None or
+                        root_cost + remaining[root[-1]] > max_cost):
+                    continue
+            spur_route = shortest_route(
+                table, sources, end,
+                banned_stations=set(root[:-1]),
+                banned_edges=banned_edges,
+                heuristic=heuristic, stats=stats,
+            )
+            if spur_route is None:
+                continue
+            route = root[:-1] + spur_route[0]
+            if tuple(route) in seen:
+                continue
+            seen.add(tuple(route))
+            heapq.heappush(candidates, (
+                root_cost + spur_route[1], len(route),
+                next(tie_breaker), route,
+            ))
+        if not candidates:
+            break
+        cost, _, _, route = heapq.heappop(candidates)
+        if max_cost is not None and cost > max_cost:
+            break
+        routes.append((route, cost))
+        prefixes.append(_prefixes(table, route))
+        if _within_transfers(prefixes[-1], bounds):
+            if not found and bounds is not None:
+                max_cost = bounds.get_max_cost(cost)
+            found.append((route, cost))
+    return found
+
+
+def _within_transfers(prefixes, bounds):
+    if bounds is None or bounds.max_transfers is None:
+        return True
+    transfers = sum(transferred for _, transferred in prefixes)
+    return transfers <= bounds.max_transfers
+
+
+def _prefixes(table, route):
+    '''(cost so far, reached by transfer) for each station of the route
+    '''
+    prefixes = [(0, False)]
+    for station, next_station in zip(route, route[1:]):
+        for connected, weight, kind in table.rows[station]:
+            if connected == next_station:
+                prefixes.append((prefixes[-1][0] + weight, kind == TRANSFER))
+                break
+    return prefixes
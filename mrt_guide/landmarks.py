@@ -0,0 +1,157 @@
+'''Landmark lower bounds and the A* search strategy built on them
+
+A few far apart stations are picked as landmarks and the cost from every
+station to each landmark and back is computed once per CostTable. By the
+triangle inequality, `cost(v, L) - cost(t, L)` and `cost(L, t) - cost(L, v)`
+are lower bounds of the cost from v to t for any landmark L (the ALT
+heuristic). The landmark costs ignore the rule against taking two transfers
+in a row, which only makes them smaller, so the bounds hold for the routes
+MRTMap allows too.
+
+The "astar" strategy uses the bounds to run `shortest_route` as an A*
+search, which only finds the single best route but expands a fraction of
+the stations the other strategies do.
+'''
+import heapq
+
+from .shortest_path import shortest_route
+from .strategies import register_strategy
+
+
+DEFAULT_LANDMARKS = 8
+
+
+class Landmarks:
+    def __init__(self, landmark_ids, costs_from, costs_to):
+        '''Costs between landmarks and all the stations
+
+        landmark_ids: list of station ids used as landmarks
+        costs_from: per landmark, list indexed by station id of the cost
+            from the landmark to the station, None if unreachable
+        costs_to: same as costs_from, from the station to the landmark
+        '''
+        self.landmark_ids = landmark_ids
+        self.costs_from = costs_from
+        self.costs_to = costs_to
+
+    @classmethod
+    def build(cls, table, count=DEFAULT_LANDMARKS):
+        '''Pick up to count landmarks on table and compute their costs
+
+        Landmarks are picked farthest first: each one is the station the
+        farthest from the landmarks picked before.
+        '''
+        rows = table.rows
+        reverse_rows = table.get_reverse_rows()
+        landmark_ids = []
+        costs_from = []
+        costs_to = []
+        if not rows:
+            return cls(landmark_ids, costs_from, costs_to)
+        # start from the station the farthest from an arbitrary one
+        closest = _distances(_costs(rows, 0))
+        while len(landmark_ids) < count:
+            candidate = max(range(len(rows)), key=lambda i: closest[i])
+            if landmark_ids and closest[candidate] == 0:
+                break
+            landmark_ids.append(candidate)
+            costs_from.append(_costs(rows, candidate))
+            costs_to.append(_costs(reverse_rows, candidate))
+            distances = _distances(costs_from[-1])
+            if len(landmark_ids) == 1:
+                closest = distances
+            else:
+                closest = [min(pair) for pair in zip(closest, distances)]
+        return cls(landmark_ids, costs_from, costs_to)
+
+    def get_heuristic(self, end):
+        '''Callable giving a lower bound of the cost from a station id to end
+
+        It returns None for stations from which end can not be reached.
+        '''
+        targets = [
+            [
+                (costs_from, costs_to, costs_from[target], costs_to[target])
+                for costs_from, costs_to in zip(
+                    self.costs_from, self.costs_to)
+            ]
+            for target in end
+        ]
+        bounds = {}
+
+        def heuristic(station_id):
+            if station_id in bounds:
+                return bounds[station_id]
+            best = None
+            for landmarks in targets:
+                bound = _lower_bound(landmarks, station_id)
+                if bound is not None and (best is None or bound < best):
+                    best = bound
+            bounds[station_id] = best
+            return best
+        return heuristic
+
+
+def _lower_bound(landmarks, station_id):
+    '''Lower bound of the cost from station id to a target, None if the
+    target can not be reached from it
+
+    landmarks: list of (costs from landmark, costs to landmark, cost from
+        landmark to target, cost from target to landmark)
+    '''
+    bound = 0
+    for costs_from, costs_to, target_from, target_to in landmarks:
+        # the target reaches the landmark but the station does not
+        station_to = costs_to[station_id]
+        if target_to is not None:
+            if station_to is None:
+                return None
+            if station_to - target_to > bound:
+                bound = station_to - target_to
+        # the landmark reaches the station but not the target
+        station_from = costs_from[station_id]
+        if station_from is not None:
+            if target_from is None:
+                return None
+            if target_from - station_from > bound:
+                bound = target_from - station_from
+    return bound
+
+
+def _distances(costs):
+    # unreachable stations are the farthest
+    return [float('inf') if cost is None else cost for cost in costs]
+
+
+def _costs(rows, source):
+    '''Cost from source to every station id, None for the unreachable ones
+    '''
+    costs = [None] * len(rows)
+    pq = [(0, source)]
+    while pq:
+        cost, station_id = heapq.heappop(pq)
+        if costs[station_id] is not None:
+            continue
+        costs[station_id] = cost
+        for next_station_id, weight, _ in rows[station_id]:
+            if costs[next_station_id] is None:
+                heapq.heappush(pq, (cost + weight, next_station_id))
+    return costs
+
+
+@register_strategy('astar')
+def astar_route(mrt_map, start, end, table, limit=None, stats=None):
+    '''Find the single best route with A* over landmark lower bounds
+
+    The Landmarks of the CostTable are built on first use. Only the best
+    route is returned.
+    '''
+    if table.landmarks is None:
+        table.landmarks = Landmarks.build(table)
+    route = shortest_route(
+        table, [(station_id, False) for station_id in start], end,
+        heuristic=table.landmarks.get_heuristic(end), stats=stats,
+    )
+    if route is None:
+        return []
+    return [route]
@@ -0,0 +1,313 @@
+'''Lines as nodes, registered as "fewest_transfers" search strategy
+
+Riders often prefer the route with the fewest transfers, and only then the
+cheapest one. On the station graph that takes a search keyed by (transfers,
+cost) crawling every stop. `LineGraph` splits the CostTable into segments,
+the runs of stations of a line still connected along it, and links two
+segments when a transfer leads from one to the other. Since the stations of
+a segment are ordered, the cost of riding between two of them is a
+difference of cumulative costs.
+
+A query is answered in two levels. A breadth first search over segments
+finds the fewest transfers needed and the segments on some line sequence
+using that many. A search keyed by (transfers, cost) then runs over the
+points a segment is entered at, only following transfers along those
+sequences, and only stopping at the stations leaving the segment (by
+transfer or as the end) on the way. Rides are expanded back into stations
+once the best sequence is known. As in the other strategies a route does
+not take two transfers in a row: when the best sequences all need one, the
+second level runs again over all the segments.
+
+Connections are expected to be open in both directions, which holds for
+the weights and closures of the package. Only the best route is returned.
+'''
+from collections import deque
+import heapq
+
+from .graph import DIRECT, TRANSFER
+from .strategies import register_strategy
+
+
+class LineGraph:
+    def __init__(self, segments, positions, forward, backward, transfers):
+        '''Segments of lines and the transfers between them
+
+        segments: list of lists of station ids ordered along the line
+        positions: (segment, position in segment) of each station id
+        forward: cumulative costs of riding each segment from its first
+            station, backward from its last one
+        transfers: list indexed by segment of tuples of (station id, next
+            segment, next station id, weight)
+        '''
+        self.segments = segments
+        self.positions = positions
+        self.forward = forward
+        self.backward = backward
+        self.transfers = transfers
+        self.next_segments = [
+            frozenset(next_segment for _, next_segment, _, _ in row)
+            for row in transfers
+        ]
+        self.previous_segments = [set() for _ in segments]
+        for segment, next_segments in enumerate(self.next_segments):
+            for next_segment in next_segments:
+                self.previous_segments[next_segment].add(segment)
+
+    @classmethod
+    def compile(cls, mrt_map, table):
+        '''Build from a CostTable of mrt_map
+        '''
+        rows = table.rows
+        along = {}
+        for station_id, row in enumerate(rows):
+            for next_station_id, weight, kind in row:
+                if kind == DIRECT:
+                    along[(station_id, next_station_id)] = weight
+        segments = []
+        positions = [None] * len(rows)
+        forward = []
+        backward = []
+        for line in sorted(mrt_map.lines):
+            ids = [
+                mrt_map.station_ids[station]
+                for station in mrt_map.lines[line]
+                if station in mrt_map.station_ids
+            ]
+            segment = []
+            for station_id in ids:
+                if segment and not (
+                        (segment[-1], station_id) in along and
+                        (station_id, segment[-1]) in along):
+                    segments.append(segment)
+                    segment = []
+                segment.append(station_id)
+            if segment:
+                segments.append(segment)
+        for index, segment in enumerate(segments):
+            forward_costs = [0]
+            backward_costs = [0]
+            for station_id, next_station_id in zip(segment, segment[1:]):
+                forward_costs.append(
+                    forward_costs[-1] + along[(station_id, next_station_id)]
+                )
+                backward_costs.append(
+                    backward_costs[-1] + along[(next_station_id, station_id)]
+                )
+            forward.append(forward_costs)
+            # backward_costs[i] is the cost from the last station to
+            # position i, reversed to be indexed by position
+            total = backward_costs[-1]
+            backward.append([total - cost for cost in backward_costs])
+            for position, station_id in enumerate(segment):
+                positions[station_id] = (index, position)
+        transfers = [[] for _ in segments]
+        for station_id, row in enumerate(rows):
+            if positions[station_id] is None:
+                continue
+            for next_station_id, weight, kind in row:
+                if kind == TRANSFER:
+                    transfers[positions[station_id][0]].append((
+                        station_id, positions[next_station_id][0],
+                        next_station_id, weight,
+                    ))
+        return cls(
+            segments, positions, forward, backward,
+            [tuple(row) for row in transfers],
+        )
+
+    def __len__(self):
+        return len(self.segments)
+
+    def ride_cost(self, segment, position, next_position):
+        '''Cost of riding segment between two positions
+        '''
+        if next_position >= position:
+            costs = self.forward[segment]
+            return costs[next_position] - costs[position]
+        costs = self.backward[segment]
+        return costs[next_position] - costs[position]
+
+    def ride(self, segment, position, next_position):
+        '''Station ids from position to next_position, both included
+        '''
+        stations = self.segments[segment]
+        if next_position >= position:
+            return stations[position:next_position + 1]
+        return stations[next_position:position + 1][::-1]
+
+    def get_corridor(self, start, end):
+        '''Segments on the sequences with the fewest transfers from start
+        to end, as {segment: number of transfers taken before it}, or None
+        when end can not be reached
+        '''
+        start_segments = set(
+            self.positions[station_id][0] for station_id in start
+            if self.positions[station_id] is not None
+        )
+        end_segments = set(
+            self.positions[station_id][0] for station_id in end
+            if self.positions[station_id] is not None
+        )
+        before = _hops(start_segments, self.next_segments)
+        after = _hops(end_segments, self.previous_segments)
+        fewest = min(
+            (before[segment] for segment in end_segments
+             if segment in before),
+            default=None,
+        )
+        if fewest is None:
+            return None
+        return dict(
+            (segment, hops) for segment, hops in before.items()
+            if segment in after and hops + after[segment] == fewest
+        )
+
+
+def _hops(sources, next_segments):
+    '''Number of transfers from sources to every reachable segment
+    '''
+    hops = dict((segment, 0) for segment in sources)
+    queue = deque(sources)
+    while queue:
+        segment = queue.popleft()
+        for next_segment in next_segments[segment]:
+            if next_segment not in hops:
+                hops[next_segment] = hops[segment] + 1
+                queue.append(next_segment)
+    return hops
+
+
+def fewest_transfers_route(
+        line_graph, start, end, corridor=None, stats=None):
+    '''Find the route with the fewest transfers from any station id in start
+    to any in end, the cheapest among those
+
+    corridor: {segment: transfers before it} to follow, see
+        `LineGraph.get_corridor`, None to follow all the segments
+    stats: SearchStats to count the work of the search in
+
+    Returns (list of station ids, cost) or None when no route is available.
+    '''
+    positions = line_graph.positions
+    # end positions by segment
+    ends = {}
+    for station_id in end:
+        if positions[station_id] is not None:
+            segment, position = positions[station_id]
+            ends.setdefault(segment, []).append(position)
+    best = {}
+    parents = {}
+    pq = []
+    for station_id in start:
+        if positions[station_id] is None:
+            continue
+        state = (station_id, False)
+        best[state] = (0, 0, 0)
+        pq.append((0, 0, 0, state, None))
+    heapq.heapify(pq)
+    if stats is not None:
+        stats.pushes += len(pq)
+    while pq:
+        transfers, cost, steps, state, parent = heapq.heappop(pq)
+        if state in parents:
+            if stats is not None:
+                stats.discarded += 1
+            continue
+        parents[state] = parent
+        if stats is not None:
+            stats.expanded(len(pq) + 1, state)
+        station_id, transferred = state
+        if station_id in end:
+            return _to_route(line_graph, parents, state), cost
+        segment, position = positions[station_id]
+        segment_ends = ends.get(segment, ())
+        # a ride stops at the first end station it reaches
+        lowest = max(
+            (p for p in segment_ends if p < position), default=0,
+        )
+        highest = min(
+            (p for p in segment_ends if p > position),
+            default=len(line_graph.segments[segment]) - 1,
+        )
+        exits = [(p, None, None, 0) for p in segment_ends
+                 if lowest <= p <= highest]
+        if corridor is None or corridor.get(segment) is not None:
+            for exit_id, next_segment, next_station_id, weight in (
+                    line_graph.transfers[segment]):
+                exit_position = positions[exit_id][1]
+                if not lowest <= exit_position <= highest:
+                    continue
+                if transferred and exit_position == position:
+                    if stats is not None:
+                        stats.pruned += 1
+                    continue
+                if corridor is not None and (
+                        corridor.get(next_segment) != transfers + 1):
+                    continue
+                exits.append((
+                    exit_position, next_segment, next_station_id, weight,
+                ))
+        for exit_position, next_segment, next_station_id, weight in exits:
+            ride_cost = cost + line_graph.ride_cost(
+                segment, position, exit_position,
+            )
+            ride_steps = steps + abs(exit_position - position)
+            exit_id = line_graph.segments[segment][exit_position]
+            if next_segment is None:
+                next_state = (exit_id, False)
+                key = (transfers, ride_cost, ride_steps)
+            else:
+                next_state = (next_station_id, True)
+                key = (transfers + 1, ride_cost + weight, ride_steps + 1)
+            if next_state in parents:
+                continue
+            if next_state in best and best[next_state] <= key:
+                continue
+            best[next_state] = key
+            heapq.heappush(pq, key + (next_state, (state, exit_id)))
+            if stats is not None:
+                stats.pushes += 1
+    return None
+
+
+def _to_route(line_graph, parents, state):
+    '''Station ids of the route to state, rides expanded along segments
+
+    parents hold (previous state, station id the segment was left at).
+    '''
+    positions = line_graph.positions
+    route = []
+    while parents[state] is not None:
+        parent, exit_id = parents[state]
+        if state[0] != exit_id:
+            route.append(state[0])
+        segment, position = positions[parent[0]]
+        route.extend(reversed(
+            line_graph.ride(segment, position, positions[exit_id][1])[1:]
+        ))
+        state = parent
+    route.append(state[0])
+    route.reverse()
+    return route
+
+
+@register_strategy('fewest_transfers')
+def fewest_transfers_strategy(
+        mrt_map, start, end, table, limit=None, stats=None):
+    '''Find the route with the fewest transfers on the LineGraph of the
+    CostTable, the cheapest among those
+
+    The LineGraph is built on first use. Only the best route is returned.
+    '''
+    if table.line_graph is None:
+        table.line_graph = LineGraph.compile(mrt_map, table)
+    line_graph = table.line_graph
+    corridor = line_graph.get_corridor(start, end)
+    if corridor is None:
+        return []
+    route = fewest_transfers_route(line_graph, start, end, corridor, stats)
+    if route is None:
+        route = fewest_transfers_route(line_graph, start, end, stats=stats)
+    if route is None:
+        return []
+    return [route]
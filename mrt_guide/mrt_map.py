@@ -9,43 +9,97 @@ could be weighted/unweighted depending on the configuration.
 
 `MRTMap.find_routes` will try to find as many routes as possible without
 considering loops. This is to allow downstream to do different kind of
-processing based on their needs.
+processing based on their needs. The search itself is pluggable: the default
+"exhaustive" strategy enumerates partial routes in cost order, while other
+strategies registered in `mrt_guide.strategies` (e.g. "yen" or "astar") can
+be selected by name.
 
 `MRTMap` does not assume things about constructor param `station_rows`
 and with some filtering on input `station_rows`, `MRTMap` can easily
 deal with Singapore MRT map back into the past or into the future by filtering
-out stations that are built yet by some point of time.
+out stations that are built yet by some point of time. `MRTMap.as_of` does
+this with the Opening Date column: it keeps one snapshot of the map per
+distinct opening date, which shares its Station objects and unchanged
+connections with the full map.
+
+A live map can also be changed in place: stations added or removed, and
+connections, lines or interchanges closed and reopened. Each change only
+touches the connections of the stations involved, in the maps above and in
+the rows of the cached CostTables. Ids of existing stations never change,
+a removed station just keeps its id without any connection. Everything
+that depends on the whole graph (the CompactGraph, route tables, landmarks,
+snapshots) is dropped and built again on next use, and `version` is bumped
+so that caches keyed by it miss.
 '''
+from bisect import bisect_right
 from collections import defaultdict
 from functools import total_ordering
 import heapq
 
 from .station import Station
-from .exceptions import DoNotOperateException
+from .stations_reader import parse_opening_date, StationRow
+from .bounds import remaining_costs
+from .cost_table import CostTable
+from .time_dependent import TimeDependentTable
+from .graph import CompactGraph, DIRECT, TRANSFER
+from .strategies import register_strategy, StrategyFactory
+from .weights import get_profile
+# modules registering more strategies
+from . import alternatives, bidirectional, contraction, hub_graph  # noqa: F401
+from . import k_shortest, landmarks, line_graph, route_table  # noqa: F401
 
 
 @total_ordering
 class StationItem:
-    def __init__(self, cost, station, route, prev_stations):
+    __slots__ = (
+        'cost', 'count', 'station_id', 'transferred', 'transfers', 'parent',
+        'visited',
+    )
+
+    def __init__(self, cost, station_id, parent=None, transferred=False):
         '''Represent an entry in the MRTMap search queue
+
+        Items form a tree through parent pointers so that routes sharing a
+        prefix share its items, and the stations visited so far are kept as
+        a bitset of station ids. Creating an item is O(1) no matter how long
+        the route is; the list of stations is only built by `to_route`.
         '''
         self.cost = cost
-        self.count = len(route)
-        self.station = station
-        self.route = route
-        self.prev_stations = prev_stations
+        self.station_id = station_id
+        self.transferred = transferred
+        self.parent = parent
+        if parent is None:
+            self.count = 0
+            self.transfers = 0
+            self.visited = 1 << station_id
+        else:
+            self.count = parent.count + 1
+            self.transfers = parent.transfers + transferred
+            self.visited = parent.visited | (1 << station_id)
 
     def invalid(self):
-        return self.station in self.prev_stations
+        return (
+            self.parent is not None and
+            (self.parent.visited >> self.station_id) & 1 == 1
+        )
+
+    def has_visited(self, station_id):
+        return (self.visited >> station_id) & 1 == 1
 
-    def to_next(self, weight, next_station):
+    def to_next(self, weight, next_station_id, transferred=False):
         return StationItem(
-            self.cost + weight,
-            next_station,
-            self.route + [self.station],
-            self.prev_stations.union(set([self.station]))
+            self.cost + weight, next_station_id, self, transferred,
         )
 
+    def to_route(self):
+        route = []
+        item = self
+        while item is not None:
+            route.append(item.station_id)
+            item = item.parent
+        route.reverse()
+        return route
+
     def __eq__(self, other):
         return (self.cost, self.count) == (other.cost, other.count)
 
@@ -57,29 +111,99 @@ class StationItem:
 
 
 class MRTMap:
-    def __init__(self, station_rows):
+    def __init__(self, station_rows, base=None, graph=None):
         '''Graph representation for MRT stations
+
+        Besides the `neighbors`/`transfers` maps of `Station`, every station
+        gets a dense integer id (its position in `stations`) and the graph is
+        also kept as a `CompactGraph` over those ids, which is what searches
+        run on.
+
+        base: MRTMap whose equal sets of connections are reused instead of
+            new ones, used for snapshots
+        graph: CompactGraph already built for station_rows, e.g. loaded
+            from a graph file (see `mrt_guide.graph_file`). Searches then
+            only need the stations and their ids, so the name map, lines
+            and connections are built on first use instead
         '''
-        station_name_map = defaultdict(set)
+        station_rows = list(station_rows)
         station_code_map = {}
-        transfers = defaultdict(set)
-        neighbors = defaultdict(set)
-        lines = defaultdict(list)
+        station_list = []
+        station_ids = {}
         for station_row in station_rows:
             code = station_row['Station Code']
-            name = station_row['Station Name']
-            station = Station(code, name)
-            station_name_map[name].add(station)
+            # stations are interned, so the ones of base are reused
+            station = Station(code, station_row['Station Name'])
+            if station not in station_ids:
+                station_ids[station] = len(station_list)
+                station_list.append(station)
             station_code_map[code] = station
+        self.station_rows = station_rows
+        self.station_code_map = station_code_map
+        self.stations = station_list
+        self.station_ids = station_ids
+        # built on first use, see `_indexes`
+        self._station_name_map = None
+        self._connections = None
+        # connections closed by `close_connection`, as {(station id, next
+        # station id): edge kind} in both directions
+        self.closed_connections = {}
+        # number of changes made to the map since it was built
+        self.version = 0
+        self._graph = graph
+        self._cost_tables = {}
+        self._time_dependent_tables = {}
+        # opening date of each station row and sorted distinct opening
+        # dates, parsed on first use by `as_of`
+        self._row_dates = None
+        self._epochs = None
+        self._snapshots = {}
+        if graph is None:
+            self._indexes(base)
+
+    @property
+    def station_name_map(self):
+        '''Stations of each name
+        '''
+        if self._station_name_map is None:
+            station_name_map = defaultdict(set)
+            for station in self.stations:
+                station_name_map[station.name].add(station)
+            self._station_name_map = station_name_map
+        return self._station_name_map
+
+    @property
+    def lines(self):
+        '''Stations of each line ordered by index
+        '''
+        return self._indexes()[0]
+
+    @property
+    def transfers(self):
+        return self._indexes()[1]
+
+    @property
+    def neighbors(self):
+        return self._indexes()[2]
+
+    def _indexes(self, base=None):
+        '''(lines, transfers, neighbors), built on first call
+
+        Changes to the map build them first, so they are built from the
+        stations as they were loaded.
+        '''
+        if self._connections is not None:
+            return self._connections
+        transfers = defaultdict(set)
+        neighbors = defaultdict(set)
+        lines = defaultdict(list)
+        for station in self.stations:
             lines[station.line].append(station)
         # fill in transfer information
-        for stations in station_name_map.values():
-            stations = list(stations)
-            for i, station1 in enumerate(stations):
-                for j, station2 in enumerate(stations):
-                    if i == j:
-                        continue
-                    transfers[station1].add(station2)
+        for stations in self.station_name_map.values():
+            if len(stations) > 1:
+                for station in stations:
+                    transfers[station] = stations - set([station])
         # construct neighbors information
         for stations in lines.values():
             stations.sort(key=lambda x: x.index)
@@ -92,10 +216,304 @@ class MRTMap:
                     next_station = stations[i + 1]
                     neighbors[station].add(next_station)
                     neighbors[next_station].add(station)
-        self.station_name_map = station_name_map
-        self.station_code_map = station_code_map
-        self.transfers = transfers
-        self.neighbors = neighbors
+        if base is not None:
+            _share_sets(self.station_name_map, base.station_name_map)
+            _share_sets(transfers, base.transfers)
+            _share_sets(neighbors, base.neighbors)
+        self._connections = (lines, transfers, neighbors)
+        return self._connections
+
+    @property
+    def graph(self):
+        '''CompactGraph of the map, built again after changes
+        '''
+        if self._graph is None:
+            self._graph = CompactGraph.from_adjacency(
+                self.stations, self.station_ids, self.transfers,
+                self.neighbors,
+            )
+        return self._graph
+
+    def get_edges(self, station_id):
+        '''Yield (next station id, edge kind) from station id
+
+        Same as `CompactGraph.edges` but read from the transfers and
+        neighbors maps, so it is up to date without building the graph.
+        '''
+        station = self.stations[station_id]
+        for kind, connected in [
+                (TRANSFER, self.transfers.get(station, ())),
+                (DIRECT, self.neighbors.get(station, ()))]:
+            for next_station_id in sorted(
+                    self.station_ids[other] for other in connected):
+                yield next_station_id, kind
+
+    def add_station(self, code, name, opening_date=''):
+        '''Add a station to its line and as interchange of stations named
+        the same
+
+        The station is connected between the stations of its line with the
+        closest index below and above it. Returns the new Station.
+        '''
+        if code in self.station_code_map:
+            raise ValueError('{} is already a station'.format(code))
+        self._indexes()
+        station = Station(code, name)
+        station_id = len(self.stations)
+        self.stations.append(station)
+        self.station_ids[station] = station_id
+        self.station_code_map[code] = station
+        self.station_rows.append(StationRow(code, name, opening_date))
+        changed = set([station_id])
+        others = self.station_name_map.get(name, set())
+        self.station_name_map[name] = others | set([station])
+        for other in others:
+            self._connect(self.transfers, station, other)
+            changed.add(self.station_ids[other])
+        line = self.lines[station.line]
+        index = bisect_right([other.index for other in line], station.index)
+        prev_station = line[index - 1] if index > 0 else None
+        next_station = line[index] if index < len(line) else None
+        line.insert(index, station)
+        closed = False
+        if prev_station is not None and next_station is not None:
+            closed = self._reopen(prev_station, next_station) is not None
+            self._disconnect(self.neighbors, prev_station, next_station)
+        for other in (prev_station, next_station):
+            if other is not None:
+                # a closed section stays closed with the station added in
+                if closed:
+                    self._close(station, other, DIRECT)
+                else:
+                    self._connect(self.neighbors, station, other)
+                changed.add(self.station_ids[other])
+        self._changed(changed)
+        return station
+
+    def remove_station(self, code):
+        '''Remove a station, its neighbors on the line get connected
+
+        The map is then the same as built without the row of the station,
+        except for the ids. The connection between the neighbors is closed
+        if one of the connections to the station was.
+        '''
+        self._indexes()
+        station = self._get_station(code)
+        station_id = self.station_ids[station]
+        changed = set([station_id])
+        names = self.station_name_map[station.name] - set([station])
+        if names:
+            self.station_name_map[station.name] = names
+        else:
+            del self.station_name_map[station.name]
+        for connections in (self.transfers, self.neighbors):
+            for other in connections.pop(station, ()):
+                connections[other] = connections[other] - set([station])
+                changed.add(self.station_ids[other])
+        closed = False
+        for pair in [
+                pair for pair in self.closed_connections
+                if pair[0] == station_id]:
+            if self.closed_connections.pop(pair) == DIRECT:
+                closed = True
+            del self.closed_connections[(pair[1], station_id)]
+            changed.add(pair[1])
+        line = self.lines[station.line]
+        index = line.index(station)
+        line.pop(index)
+        if 0 < index < len(line):
+            prev_station, next_station = line[index - 1], line[index]
+            if closed:
+                self._close(prev_station, next_station, DIRECT)
+            else:
+                self._connect(self.neighbors, prev_station, next_station)
+        del self.station_code_map[code]
+        del self.station_ids[station]
+        self.station_rows = [
+            row for row in self.station_rows if row['Station Code'] != code
+        ]
+        self._changed(changed)
+
+    def close_connection(self, code, next_code):
+        '''Close the connection between two stations in both directions
+        '''
+        station = self._get_station(code)
+        next_station = self._get_station(next_code)
+        if next_station in self.transfers.get(station, ()):
+            kind = TRANSFER
+        elif next_station in self.neighbors.get(station, ()):
+            kind = DIRECT
+        else:
+            raise ValueError('{} and {} are not connected'.format(
+                code, next_code,
+            ))
+        self._close(station, next_station, kind)
+        self._changed(set([
+            self.station_ids[station], self.station_ids[next_station],
+        ]))
+
+    def reopen_connection(self, code, next_code):
+        '''Reopen a connection closed by `close_connection`
+        '''
+        station = self._get_station(code)
+        next_station = self._get_station(next_code)
+        kind = self._reopen(station, next_station)
+        if kind is None:
+            raise ValueError('{} and {} are not closed'.format(
+                code, next_code,
+            ))
+        self._connect(
+            self.transfers if kind == TRANSFER else self.neighbors,
+            station, next_station,
+        )
+        self._changed(set([
+            self.station_ids[station], self.station_ids[next_station],
+        ]))
+
+    def close_line(self, line):
+        '''Close all the connections between stations of a line
+        '''
+        for station, next_station in self._line_pairs(line):
+            if next_station in self.neighbors.get(station, ()):
+                self.close_connection(station.code, next_station.code)
+
+    def reopen_line(self, line):
+        for station, next_station in self._line_pairs(line):
+            if (self.station_ids[station], self.station_ids[next_station]) in (
+                    self.closed_connections):
+                self.reopen_connection(station.code, next_station.code)
+
+    def close_interchange(self, name):
+        '''Close the transfers between the stations named name
+        '''
+        for station, other in self._interchange_pairs(name):
+            if other in self.transfers.get(station, ()):
+                self.close_connection(station.code, other.code)
+
+    def reopen_interchange(self, name):
+        for station, other in self._interchange_pairs(name):
+            if (self.station_ids[station], self.station_ids[other]) in (
+                    self.closed_connections):
+                self.reopen_connection(station.code, other.code)
+
+    def _get_station(self, code):
+        station = self.station_code_map.get(code)
+        if station is None:
+            raise ValueError('{} is not a valid station'.format(code))
+        return station
+
+    def _line_pairs(self, line):
+        if line not in self.lines:
+            raise ValueError('{} is not a valid line'.format(line))
+        stations = self.lines[line]
+        return list(zip(stations, stations[1:]))
+
+    def _interchange_pairs(self, name):
+        if name not in self.station_name_map:
+            raise ValueError('{} is not a valid station'.format(name))
+        stations = sorted(
+            self.station_name_map[name], key=lambda x: self.station_ids[x]
+        )
+        return [
+            (station, other)
+            for i, station in enumerate(stations)
+            for other in stations[i + 1:]
+        ]
+
+    @staticmethod
+    def _connect(connections, station, other):
+        # sets are replaced instead of updated as snapshots may share them
+        connections[station] = connections.get(station, set()) | set([other])
+        connections[other] = connections.get(other, set()) | set([station])
+
+    @staticmethod
+    def _disconnect(connections, station, other):
+        connections[station] = connections[station] - set([other])
+        connections[other] = connections[other] - set([station])
+
+    def _close(self, station, next_station, kind):
+        station_id = self.station_ids[station]
+        next_station_id = self.station_ids[next_station]
+        self._disconnect(
+            self.transfers if kind == TRANSFER else self.neighbors,
+            station, next_station,
+        )
+        self.closed_connections[(station_id, next_station_id)] = kind
+        self.closed_connections[(next_station_id, station_id)] = kind
+
+    def _reopen(self, station, next_station):
+        '''Forget the closure of a connection, its kind or None if open
+        '''
+        station_id = self.station_ids[station]
+        next_station_id = self.station_ids[next_station]
+        self.closed_connections.pop((next_station_id, station_id), None)
+        return self.closed_connections.pop((station_id, next_station_id), None)
+
+    def _changed(self, station_ids):
+        '''Update what depends on the connections of station ids
+        '''
+        self.version += 1
+        self._graph = None
+        for table in self._cost_tables.values():
+            table.update(self, station_ids)
+        self._time_dependent_tables.clear()
+        self._row_dates = None
+        self._epochs = None
+        self._snapshots.clear()
+
+    def as_of(self, date):
+        '''Snapshot of the map with the stations opened on or before date
+
+        Snapshots are cached by the latest opening date they include, so
+        all the dates between two openings share one. The map itself is
+        returned when every station is open. Stations without an opening
+        date are always open. Connections closed in the map are closed in
+        the snapshots too.
+        '''
+        if self._epochs is None:
+            self._row_dates = [
+                parse_opening_date(row.get('Opening Date'))
+                for row in self.station_rows
+            ]
+            self._epochs = sorted(set(
+                row_date for row_date in self._row_dates
+                if row_date is not None
+            ))
+        index = bisect_right(self._epochs, date)
+        if index == len(self._epochs):
+            return self
+        epoch = self._epochs[index - 1] if index > 0 else None
+        snapshot = self._snapshots.get(epoch)
+        if snapshot is None:
+            snapshot = MRTMap([
+                row for row, row_date in zip(
+                    self.station_rows, self._row_dates)
+                if row_date is None or (
+                    epoch is not None and row_date <= epoch)
+            ], base=self)
+            self._close_in(snapshot)
+            self._snapshots[epoch] = snapshot
+        return snapshot
+
+    def _close_in(self, snapshot):
+        '''Close in snapshot the connections closed in the map, matched by
+        station code, skipping the stations not open in snapshot
+        '''
+        for (station_id, next_station_id), kind in sorted(
+                self.closed_connections.items()):
+            station = snapshot.station_code_map.get(
+                self.stations[station_id].code
+            )
+            next_station = snapshot.station_code_map.get(
+                self.stations[next_station_id].code
+            )
+            if station is None or next_station is None:
+                continue
+            connections = (
+                snapshot.transfers if kind == TRANSFER else snapshot.neighbors
+            )
+            if next_station in connections.get(station, ()):
+                snapshot._close(station, next_station, kind)
 
     def map_to_stations(self, param):
         if param in self.station_code_map:
@@ -104,59 +522,215 @@ class MRTMap:
             return self.station_name_map[param]
         raise ValueError('{} is not a valid station'.format(param))
 
-    def find_routes(self, start, end, weights, limit=None):
+    def map_to_station_ids(self, param):
+        return set(
+            self.station_ids[station]
+            for station in self.map_to_stations(param)
+        )
+
+    def to_stations(self, station_ids):
+        return [self.stations[station_id] for station_id in station_ids]
+
+    def find_routes(
+            self, start, end, weights, limit=None, strategy='exhaustive',
+            stats=None, bounds=None, options=None):
         '''Find routes from start to end ranked by cost
 
-        Makes use of Dijkistra algorithm and in particular all cycles
-        are of sum which is larger than 0. So for any route, there is no
-        point checking back on a visited station.
-        There are two parts to be take into consideration: cost so far
-        and steps so far. Two are combined as the weight of the route
-        covered so far. Graph is connected and no negative cycles are
-        present. The algorithm will always explore shorter paths so far
-        and exhaust all possible options if needed.
-        '''
-        start = self.map_to_stations(start)
-        end = self.map_to_stations(end)
-        pq = [(StationItem(0, station, [], set())) for station in start]
-        routes = []
-        while pq:
-            station_item = heapq.heappop(pq)
-            if station_item.invalid():
-                continue
-            station = station_item.station
-            if station in end:
-                routes.append((
-                    station_item.route + [station], station_item.cost
-                ))
-                # if limit is specified and met, stop the search
-                if limit is not None and len(routes) >= limit:
-                    break
-                continue
-            connections = self.find_connections(station, weights)
-            for next_station, weight in connections:
-                if next_station in station_item.prev_stations:
-                    continue
-                # Do not take the same hot transfer station if not
-                # to take transfer to another line
-                if (next_station.name == station.name and
-                        station_item.route and
-                        station_item.route[-1].name == station.name):
-                    continue
-                heapq.heappush(
-                    pq,
-                    station_item.to_next(weight, next_station),
+        start: station name or code to start from
+        end: station name or code to end at
+        weights: weights used to cost connections
+        limit: max number of routes to find, None for all
+        strategy: name of a registered search strategy
+        stats: SearchStats to count the work of the search in
+        bounds: SearchBounds limiting the routes wanted and the work spent,
+            only supported by the "exhaustive" and "yen" strategies
+        options: dict of keyword options of the strategy for this query,
+            e.g. the thresholds of "alternatives"
+        '''
+        search = StrategyFactory.get_strategy(strategy)
+        if bounds is not None and not StrategyFactory.is_bounded(strategy):
+            raise ValueError(
+                '{} search strategy does not support bounds'.format(strategy)
+            )
+        kwargs = dict(options or {})
+        unknown = set(kwargs) - StrategyFactory.get_options(strategy)
+        if unknown:
+            raise ValueError(
+                '{} search strategy does not support {}'.format(
+                    strategy, ', '.join(sorted(unknown)),
                 )
-        return routes
+            )
+        start = self.map_to_station_ids(start)
+        end = self.map_to_station_ids(end)
+        table = self.get_cost_table(weights)
+        if stats is not None:
+            kwargs['stats'] = stats
+        if bounds is not None:
+            kwargs['bounds'] = bounds
+        routes = search(self, start, end, table, limit, **kwargs)
+        return [(self.to_stations(route), cost) for route, cost in routes]
+
+    def get_cost_table(self, weights):
+        '''Compiled CostTable for weights
+
+        Tables are cached by the `profile` of the weights, so all the
+        weights of the same kind share a single table. Weights without a
+        profile of their own (see `get_profile`) are compiled on every
+        call.
+        '''
+        profile = get_profile(weights)
+        if profile is None:
+            return CostTable.compile(self, weights)
+        table = self._cost_tables.get(profile)
+        if table is None:
+            table = CostTable.compile(self, weights)
+            self._cost_tables[profile] = table
+        return table
+
+    def get_time_dependent_table(self, schedule):
+        '''Compiled TimeDependentTable for a WeightsSchedule, cached
+        '''
+        table = self._time_dependent_tables.get(id(schedule))
+        if table is None or table.schedule is not schedule:
+            table = TimeDependentTable.compile(self, schedule)
+            self._time_dependent_tables[id(schedule)] = table
+        return table
 
     def find_connections(self, station, weights):
-        for transfer in self.transfers.get(station, []):
-            try:
-                yield transfer, weights.get_transfer_cost(station, transfer)
-            except DoNotOperateException:
-                pass
-        for neighbor in self.neighbors.get(station, []):
-            try:
-                yield neighbor, weights.get_direct_cost(station, neighbor)
-            except DoNotOperateException:
-                pass
+        stations = self.stations
+        for next_station_id, weight, _ in self.find_connection_ids(
+                self.station_ids[station], weights):
+            yield stations[next_station_id], weight
+
+    def find_connection_ids(self, station_id, weights):
+        '''Yield (next station id, weight, edge kind) from station id
+        '''
+        return iter(self.get_cost_table(weights).rows[station_id])
+
+
+def _share_sets(mapping, base_mapping):
+    '''Replace the sets of mapping by the equal ones of base_mapping
+    '''
+    for key, values in mapping.items():
+        base_values = base_mapping.get(key)
+        if base_values is not None and base_values == values:
+            mapping[key] = base_values
+
+
+@register_strategy('exhaustive', bounded=True)
+def exhaustive_routes(
+        mrt_map, start, end, table, limit=None, stats=None, bounds=None):
+    '''Find routes from start to end ranked by cost
+
+    Makes use of Dijkistra algorithm and in particular all cycles
+    are of sum which is larger than 0. So for any route, there is no
+    point checking back on a visited station.
+    There are two parts to be take into consideration: cost so far
+    and steps so far. Two are combined as the weight of the route
+    covered so far. Graph is connected and no negative cycles are
+    present. The algorithm will always explore shorter paths so far
+    and exhaust all possible options if needed.
+
+    With bounds, partial routes which can not reach end within the max
+    cost or number of transfers are not pushed, see `mrt_guide.bounds`.
+    '''
+    if bounds is not None:
+        return _bounded_exhaustive_routes(
+            start, end, table, limit, stats, bounds,
+        )
+    rows = table.rows
+    pq = [StationItem(0, station_id) for station_id in start]
+    if stats is not None:
+        stats.pushes += len(pq)
+    routes = []
+    while pq:
+        station_item = heapq.heappop(pq)
+        if station_item.invalid():
+            if stats is not None:
+                stats.discarded += 1
+            continue
+        if stats is not None:
+            stats.expanded(len(pq) + 1, station_item.station_id)
+        station_id = station_item.station_id
+        if station_id in end:
+            routes.append((station_item.to_route(), station_item.cost))
+            # if limit is specified and met, stop the search
+            if limit is not None and len(routes) >= limit:
+                break
+            continue
+        for next_station_id, weight, kind in rows[station_id]:
+            # Do not take the same hot transfer station if not
+            # to take transfer to another line
+            transferred = kind == TRANSFER
+            if (station_item.has_visited(next_station_id) or
+                    transferred and station_item.transferred):
+                if stats is not None:
+                    stats.pruned += 1
+                continue
+            heapq.heappush(
+                pq,
+                station_item.to_next(weight, next_station_id, transferred),
+            )
+            if stats is not None:
+                stats.pushes += 1
+    return routes
+
+
+def _bounded_exhaustive_routes(start, end, table, limit, stats, bounds):
+    rows = table.rows
+    remaining = remaining_costs(table, end)
+    max_transfers = bounds.max_transfers
+    max_cost = None
+    budget = bounds.get_budget(check_every=64)
+    expansions = 0
+    pq = [
+        StationItem(0, station_id) for station_id in start
+        if remaining[station_id] is not None
+    ]
+    if stats is not None:
+        stats.pushes += len(pq)
+    routes = []
+    while pq:
+        station_item = heapq.heappop(pq)
+        if station_item.invalid():
+            if stats is not None:
+                stats.discarded += 1
+            continue
+        if max_cost is not None and station_item.cost > max_cost:
+            # routes come off the queue by cost, all the others cost more
+            break
+        if budget.exhausted(expansions):
+            if stats is not None:
+                stats.truncated = True
+            break
+        expansions += 1
+        if stats is not None:
+            stats.expanded(len(pq) + 1, station_item.station_id)
+        station_id = station_item.station_id
+        if station_id in end:
+            if not routes:
+                max_cost = bounds.get_max_cost(station_item.cost)
+            routes.append((station_item.to_route(), station_item.cost))
+            if limit is not None and len(routes) >= limit:
+                break
+            continue
+        for next_station_id, weight, kind in rows[station_id]:
+            transferred = kind == TRANSFER
+            bound = remaining[next_station_id]
+            if (station_item.has_visited(next_station_id) or
+                    transferred and station_item.transferred or
+                    bound is None or
+                    max_transfers is not None and
+                    station_item.transfers + transferred > max_transfers or
+                    max_cost is not None and
+                    station_item.cost + weight + bound > max_cost):
+                if stats is not None:
+                    stats.pruned += 1
+                continue
+            heapq.heappush(
+                pq,
+                station_item.to_next(weight, next_station_id, transferred),
+            )
+            if stats is not None:
+                stats.pushes += 1
+    return routes
@@ -1,10 +1,18 @@
 '''A simple wrapper for connecting input reader with MRTMap
 '''
-from datetime import datetime
+from datetime import date, datetime, timedelta
+from pathlib import Path
 
 from .stations_reader import StationReader
+from .batch import BatchRouter, route_in_processes
+from .contraction import ContractionHierarchy
+from .graph_file import file_checksum, GraphFile
 from .mrt_map import MRTMap
-from .weights import WeightsFactory
+from .route_cache import RouteCache
+from .route_table import RouteTable
+from .stats import phase_timer, SearchStats
+from .time_dependent import earliest_arrival, ProfileInterval, route_profile
+from .weights import get_profile, WeightsFactory, WeightsSchedule
 
 
 class PathFinder:
@@ -12,32 +20,389 @@ class PathFinder:
             self,
             data_path,
             reader_cls=StationReader,
-            weights_factory=WeightsFactory):
+            weights_factory=WeightsFactory,
+            cache_size=1024,
+            cache_ttl=None,
+            graph_path=None):
         '''Glue logic needed to read input into graph and seek path
 
         data_path: data file path
         reader_cls: default StationReader, customize if needed
         weights_factory: default WeightsFactory, customize if needed
+        cache_size: max number of cached results, 0 to disable caching
+        cache_ttl: seconds a cached result stays valid, None for no expiry
+        graph_path: graph file to load the map from instead of reading the
+            data file, compiled again when missing or stale, see
+            `mrt_guide.graph_file`
         '''
-        station_rows = reader_cls(data_path).read_stations()
-        mrt_map = MRTMap(station_rows)
-        self.mrt_map = mrt_map
+        self.data_path = data_path
+        self.graph_path = graph_path
+        self.reader_cls = reader_cls
         self.weights_factory = weights_factory
+        self.cache = None
+        self._schedule = None
+        if cache_size:
+            self.cache = RouteCache(cache_size, cache_ttl)
+        self.reload()
 
-    def find_routes(self, start, end, dt=None, limit=None):
+    def reload(self):
+        '''Read the data file again and drop everything derived from it
+
+        Cached results and precomputed route tables are discarded.
+        '''
+        if self.graph_path is None:
+            station_rows = self._read_stations()
+            self.mrt_map = MRTMap(station_rows)
+        else:
+            self.mrt_map = self.compile_graph().to_mrt_map()
+        if self.cache is not None:
+            self.cache.clear()
+
+    def compile_graph(self, force=False):
+        '''GraphFile of the data file, loaded from graph_path if up to date
+
+        The file is compiled and saved to graph_path when missing, invalid,
+        compiled from another data file content or force is True.
+        '''
+        checksum = file_checksum(self.data_path)
+        if not force and Path(self.graph_path).exists():
+            try:
+                graph_file = GraphFile.load(self.graph_path)
+            except ValueError:
+                graph_file = None
+            if graph_file is not None and graph_file.checksum == checksum:
+                return graph_file
+        station_rows = self._read_stations()
+        GraphFile.compile(station_rows, checksum).save(self.graph_path)
+        return GraphFile.load(self.graph_path)
+
+    def precompute_route_tables(self, directory=None):
+        '''Precompute the best route between all stations for all profiles
+
+        Afterwards `find_routes` with limit=1 and no strategy looks the
+        route up in the tables. If directory is given, tables found there
+        are loaded instead, and missing ones or those built from other
+        stations, connections or weights are computed and saved to it.
+        Weights without a profile are skipped.
+        '''
+        for weights in self.weights_factory.get_all_weights():
+            profile = get_profile(weights)
+            if profile is None:
+                # the table is not cached, nothing would use the route table
+                continue
+            table = self.mrt_map.get_cost_table(weights)
+            path = None
+            if directory is not None:
+                path = Path(directory) / '{}.routes'.format(profile)
+            route_table = None
+            if path is not None and path.exists():
+                try:
+                    route_table = RouteTable.load(path)
+                    route_table.check(self.mrt_map, table)
+                except ValueError:
+                    route_table = None
+            if route_table is None:
+                route_table = RouteTable.build(self.mrt_map, table)
+                if path is not None:
+                    route_table.save(path)
+            table.route_table = route_table
+
+    def precompute_hierarchies(self, directory=None):
+        '''Build the ContractionHierarchy of every profile
+
+        Afterwards `find_routes` with limit=1 and no strategy searches the
+        hierarchies, unless route tables are precomputed as well. If
+        directory is given, hierarchies found there are loaded instead, and
+        missing ones or those built from other stations, connections or
+        weights are built and saved to it. Weights without a profile are
+        skipped.
+        '''
+        for weights in self.weights_factory.get_all_weights():
+            profile = get_profile(weights)
+            if profile is None:
+                # the table is not cached, nothing would use the hierarchy
+                continue
+            table = self.mrt_map.get_cost_table(weights)
+            path = None
+            if directory is not None:
+                path = Path(directory) / '{}.ch'.format(profile)
+            hierarchy = None
+            if path is not None and path.exists():
+                try:
+                    hierarchy = ContractionHierarchy.load(path)
+                    hierarchy.check(self.mrt_map, table)
+                except ValueError:
+                    hierarchy = None
+            if hierarchy is None:
+                hierarchy = ContractionHierarchy.build(self.mrt_map, table)
+                if path is not None:
+                    hierarchy.save(path)
+            table.hierarchy = hierarchy
+
+    def find_routes(
+            self, start, end, dt=None, limit=None, strategy=None,
+            time_dependent=False, as_of=None, stats=None, bounds=None,
+            options=None):
         '''Find path between start and end
+
+        strategy: name of a search strategy registered for MRTMap. By
+            default the precomputed route table, or else the precomputed
+            contraction hierarchy, is used for limit=1 when available and
+            without bounds, and the exhaustive search otherwise
+        time_dependent: cost each connection with the weights in effect
+            when it is taken instead of those at dt, see
+            `mrt_guide.time_dependent`. Only the best route is found and
+            its cost is the minutes from dt to the arrival, so it cannot be
+            combined with strategy, bounds, options or a limit above 1
+        as_of: date, datetime or "YYYY-MM-DD" string to route on the
+            network as it was on that date, see `MRTMap.as_of`
+        stats: SearchStats to count the work of the search in, and time
+            the "parse", "weights" and "search" phases of the query
+        bounds: SearchBounds cutting the search short, see
+            `mrt_guide.bounds`. Routes are not cached when the budget runs
+            out. Budgets do not apply to the precomputed route table and
+            hierarchy
+        options: dict of keyword options of the strategy for this query,
+            see `MRTMap.find_routes`
+        '''
+        with phase_timer(stats, 'parse'):
+            as_of = _parse_date(as_of)
+            mrt_map = self.get_map(as_of)
+            if dt is not None:
+                dt = _parse_datetime(dt)
+        if time_dependent:
+            if bounds is not None or options:
+                raise ValueError(
+                    'Time dependent routing does not support bounds or '
+                    'options'
+                )
+            if strategy is not None:
+                raise ValueError(
+                    'Time dependent routing does not support strategies'
+                )
+            if limit not in (None, 1):
+                raise ValueError(
+                    'Time dependent routing only finds the best route'
+                )
+            return self._find_routes_time_dependent(
+                mrt_map, start, end, dt, as_of, stats,
+            )
+        with phase_timer(stats, 'weights'):
+            weights = self.get_weights(dt)
+            # compiled here so that the search phase only times the search
+            table = mrt_map.get_cost_table(weights)
+            strategy, bounds = self._get_strategy(
+                table, limit, strategy, bounds,
+            )
+        with phase_timer(stats, 'search'):
+            cache_key = self._get_cache_key(
+                mrt_map, start, end, weights, limit, strategy, as_of, bounds,
+                options,
+            )
+            if cache_key is not None:
+                routes = self.cache.get(cache_key)
+                if routes is not None:
+                    return list(routes)
+            search_stats = stats
+            if search_stats is None and bounds is not None and (
+                    bounds.has_budget()):
+                # to tell whether the budget was exhausted
+                search_stats = SearchStats()
+            routes = mrt_map.find_routes(
+                start, end, weights, limit=limit, strategy=strategy,
+                stats=search_stats, bounds=bounds, options=options,
+            )
+            if cache_key is not None and not (
+                    search_stats is not None and search_stats.truncated):
+                self.cache.put(cache_key, list(routes))
+            return routes
+
+    def find_route_profile(self, start, end, dt_from, dt_to):
+        '''Best route and arrival for every departure between two datetimes
+
+        Journeys are routed the same as with `time_dependent=True` in
+        `find_routes`. Returns a list of ProfileInterval whose departures
+        and arrivals are datetimes and route a list of stations, see
+        `mrt_guide.time_dependent.route_profile`.
+        '''
+        departure = _parse_datetime(dt_from)
+        window = _parse_datetime(dt_to) - departure
+        if window < timedelta(0):
+            raise ValueError('{} is before {}'.format(dt_to, dt_from))
+        first = WeightsSchedule.to_minute(departure)
+        last = first + int(window.total_seconds()) // 60
+
+        def to_datetime(minute):
+            return departure + timedelta(minutes=minute - first)
+        return [
+            ProfileInterval(
+                to_datetime(interval.departure),
+                to_datetime(interval.last_departure),
+                to_datetime(interval.arrival),
+                to_datetime(interval.last_arrival),
+                self.mrt_map.to_stations(interval.route),
+            )
+            for interval in route_profile(
+                self.mrt_map, self.get_schedule(),
+                self.mrt_map.map_to_station_ids(start),
+                self.mrt_map.map_to_station_ids(end),
+                first, last,
+            )
+        ]
+
+    def find_routes_batch(
+            self, pairs, dt=None, limit=1, strategy=None, chunk_size=1024,
+            workers=1):
+        '''Find routes for many (start, end) or (start, end, dt) pairs
+
+        Yields (start, end, routes) in the order of pairs, with routes None
+        for a pair with an unknown station. See `mrt_guide.batch` for how
+        the work is shared.
+
+        workers: number of processes to spread the work over, 1 to run in
+            the current process and None for the number of CPUs
         '''
+        if workers == 1:
+            router = BatchRouter(self, limit, strategy)
+            return router.route(pairs, dt, chunk_size)
+        return route_in_processes(
+            self, pairs, dt, limit, strategy, chunk_size, workers,
+        )
+
+    def __getstate__(self):
+        # the cache holds a lock and is of no use to another process
+        state = self.__dict__.copy()
+        state['cache'] = None
+        return state
+
+    def get_weights(self, dt=None):
+        '''Weights for the datetime or datetime string dt, simple weights if
+        None
+        '''
+        if dt is None:
+            return self.weights_factory.get_weights()
+        if not isinstance(dt, datetime):
+            dt = _parse_datetime(dt)
+        return self.weights_factory.get_weights(True, dt)
+
+    def get_map(self, as_of=None):
+        '''MRTMap of the network on date as_of, the full network if None
+        '''
+        if as_of is None:
+            return self.mrt_map
+        return self.mrt_map.as_of(as_of)
+
+    def get_schedule(self):
+        '''WeightsSchedule of the weights factory, compiled on first use
+        '''
+        if self._schedule is None:
+            self._schedule = WeightsSchedule.compile(self.weights_factory)
+        return self._schedule
+
+    def _read_stations(self):
+        # stream the rows of readers able to, see `StationReader`
+        reader = self.reader_cls(self.data_path)
+        if hasattr(reader, 'iter_stations'):
+            return reader.iter_stations()
+        return reader.read_stations()
+
+    def _find_routes_time_dependent(
+            self, mrt_map, start, end, dt, as_of, stats=None):
         if dt is None:
-            return self.mrt_map.find_routes(
-                start, end, self.weights_factory.get_weights(), limit=limit,
-            )
-        try:
-            dt = datetime.strptime(dt, '%Y-%m-%dT%H:%M')
-        except ValueError:
-            raise ValueError('Malformatted datetime: {}'.format(datetime))
-        return self.mrt_map.find_routes(
-            start,
-            end,
-            self.weights_factory.get_weights(True, dt),
-            limit=limit,
+            raise ValueError('Time dependent routing needs a datetime')
+        departure = WeightsSchedule.to_minute(dt)
+        start_ids = mrt_map.map_to_station_ids(start)
+        end_ids = mrt_map.map_to_station_ids(end)
+        cache_key = None
+        if self.cache is not None:
+            cache_key = (
+                frozenset(start_ids), frozenset(end_ids),
+                ('minute', departure), 1, 'time_dependent', as_of,
+                self.mrt_map.version,
+            )
+            routes = self.cache.get(cache_key)
+            if routes is not None:
+                return list(routes)
+        with phase_timer(stats, 'weights'):
+            td_table = mrt_map.get_time_dependent_table(self.get_schedule())
+        with phase_timer(stats, 'search'):
+            route = earliest_arrival(
+                td_table, start_ids, end_ids, departure, stats,
+            )
+        routes = []
+        if route is not None:
+            routes.append((
+                mrt_map.to_stations(route[0]), route[1] - departure,
+            ))
+        if cache_key is not None:
+            self.cache.put(cache_key, list(routes))
+        return routes
+
+    def _get_strategy(self, table, limit, strategy, bounds=None):
+        '''(strategy, bounds) of a query
+
+        The precomputed route table or hierarchy answers limit=1 queries
+        whose bounds only set a budget, without the budget as they do not
+        run long.
+        '''
+        if strategy is not None:
+            return strategy, bounds
+        if limit == 1 and (bounds is None or not bounds.limits_routes()):
+            if table.route_table is not None:
+                return 'table', None
+            if table.hierarchy is not None:
+                return 'contraction', None
+        return 'exhaustive', bounds
+
+    def _get_cache_key(
+            self, mrt_map, start, end, weights, limit, strategy, as_of,
+            bounds=None, options=None):
+        '''Key of the query in the cache, None if it can not be cached
+
+        Stations are keyed by the ids they resolve to, so that e.g.
+        "Boon Lay" and "EW27" share an entry. Ids depend on the snapshot,
+        so as_of is part of the key, and so is the version of the full map
+        to miss once it is changed (snapshots are built again at version 0
+        after every change). Weights without a profile can not be told
+        apart and are never cached. Budgets are not part of the key, routes
+        are only cached when the search did not exhaust its budget.
+        '''
+        profile = get_profile(weights)
+        if self.cache is None or profile is None:
+            return None
+        bounds_key = None
+        if bounds is not None:
+            bounds_key = bounds.get_key()
+        return (
+            frozenset(mrt_map.map_to_station_ids(start)),
+            frozenset(mrt_map.map_to_station_ids(end)),
+            profile,
+            limit,
+            strategy,
+            as_of,
+            self.mrt_map.version,
+            bounds_key,
+            tuple(sorted((options or {}).items())),
         )
+
+
+def _parse_datetime(dt):
+    try:
+        return datetime.strptime(dt, '%Y-%m-%dT%H:%M')
+    except ValueError:
+        raise ValueError('Malformatted datetime: {}'.format(dt))
+
+
+def _parse_date(as_of):
+    '''date of a date, datetime or "YYYY-MM-DD" string, None if None
+    '''
+    if as_of is None:
+        return None
+    if isinstance(as_of, datetime):
+        return as_of.date()
+    if isinstance(as_of, date):
+        return as_of
+    try:
+        return datetime.strptime(as_of, '%Y-%m-%d').date()
+    except (TypeError, ValueError):
+        raise ValueError('Malformatted date: {}'.format(as_of))
@@ -0,0 +1,72 @@
+'''Bounded cache of found routes
+
+`RouteCache` is a thread safe LRU cache with an optional time to live. It
+counts hits, misses and evictions so the cache size can be tuned. Keys are
+built by `PathFinder` from the resolved station ids, so a station name and
+its equivalent code share an entry.
+'''
+from collections import OrderedDict
+from threading import Lock
+import time
+
+
+class RouteCache:
+    def __init__(self, maxsize=1024, ttl=None, timer=time.monotonic):
+        '''LRU cache of routes
+
+        maxsize: max number of entries kept
+        ttl: seconds an entry stays valid, None for no expiry
+        timer: clock used for ttl, customize for testing
+        '''
+        if maxsize <= 0:
+            raise ValueError('Cache size must be positive')
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.timer = timer
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries = OrderedDict()
+        self._lock = Lock()
+
+    def get(self, key):
+        '''Cached value for key, None if missing or expired
+        '''
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                expires_at, value = entry
+                if expires_at is None or self.timer() < expires_at:
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return value
+                del self._entries[key]
+            self.misses += 1
+            return None
+
+    def put(self, key, value):
+        expires_at = None
+        if self.ttl is not None:
+            expires_at = self.timer() + self.ttl
+        with self._lock:
+            self._entries[key] = (expires_at, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        with self._lock:
+            return {
+                'size': len(self._entries),
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+            }
+
+    def __len__(self):
+        return len(self._entries)
@@ -0,0 +1,163 @@
+'''Precomputed best routes between all pairs of stations
+
+The network is small enough that the best route between every pair of
+stations can be computed ahead of time for each weights profile. A
+`RouteTable` runs one `shortest_route_tree` per station over a `CostTable`
+and keeps the cost, number of steps and predecessor of every
+(source, state) pair in flat arrays. Looking up the best route is then a
+walk over predecessors, O(route length).
+
+Tables can be saved to and loaded from a binary file. Loading maps the file
+into memory and reads the arrays in place, without parsing or copying.
+'''
+from array import array
+import mmap
+import struct
+
+from .shortest_path import shortest_route_tree, tree_route
+from .strategies import register_strategy
+
+
+MAGIC = b'MRTROUTE'
+VERSION = 2
+# magic, version, number of stations, cost typecode, length of codes,
+# checksum of the CostTable
+HEADER = struct.Struct('<8sHIcxI32s')
+ALIGNMENT = 8
+
+
+class RouteTable:
+    def __init__(self, codes, costs, steps, parents, checksum=b''):
+        '''Best routes from every station to every (station, transferred)
+
+        codes: station codes in station id order, to check compatibility
+        costs/steps/parents: flat sequences indexed by
+            source * 2 * len(codes) + state, see `shortest_route_tree`
+        checksum: `CostTable.get_checksum` of the table it was built for
+        '''
+        self.codes = codes
+        self.costs = costs
+        self.steps = steps
+        self.parents = parents
+        self.checksum = checksum
+        # file the table is mapped from, if loaded
+        self.path = None
+
+    def __reduce__(self):
+        # a mapped table is mapped again by other processes instead of
+        # copying its content, so they share the same pages
+        if self.path is not None:
+            return (RouteTable.load, (self.path,))
+        return (
+            RouteTable,
+            (self.codes, self.costs, self.steps, self.parents, self.checksum),
+        )
+
+    @classmethod
+    def build(cls, mrt_map, table):
+        '''Compute the table for a CostTable of mrt_map
+        '''
+        integral = all(
+            isinstance(weight, int)
+            for row in table.rows for _, weight, _ in row
+        )
+        costs = array('q' if integral else 'd')
+        steps = array('i')
+        parents = array('i')
+        for source in range(len(table)):
+            tree_costs, tree_steps, tree_parents = shortest_route_tree(
+                table, source
+            )
+            costs.extend(tree_costs)
+            steps.extend(tree_steps)
+            parents.extend(tree_parents)
+        codes = [station.code for station in mrt_map.stations]
+        return cls(codes, costs, steps, parents, table.get_checksum())
+
+    def check(self, mrt_map, table=None):
+        '''Raise ValueError if the table was built for another map, or
+        another CostTable if given
+
+        Tables of maps with the same codes but other names, connections or
+        weights only differ by the rows of their CostTable.
+        '''
+        codes = [station.code for station in mrt_map.stations]
+        if codes != self.codes:
+            raise ValueError('Route table does not match the MRT map')
+        if table is not None and table.get_checksum() != self.checksum:
+            raise ValueError('Route table does not match the cost table')
+
+    def find_route(self, start, end):
+        '''Best route from any station id in start to any in end
+
+        Returns (list of station ids, cost) or None if no route.
+        '''
+        return tree_route(self.get_tree, start, end)
+
+    def get_tree(self, source):
+        '''Route tree of source in the format used by `tree_route`
+        '''
+        base = source * 2 * len(self.codes)
+        return self.costs, self.steps, self.parents, base
+
+    def save(self, path):
+        codes = ','.join(self.codes).encode('utf-8')
+        with open(path, 'wb') as ofile:
+            ofile.write(HEADER.pack(
+                MAGIC, VERSION, len(self.codes),
+                self.costs.typecode.encode('ascii'), len(codes),
+                self.checksum,
+            ))
+            ofile.write(codes)
+            for values in (self.costs, self.steps, self.parents):
+                ofile.write(b'\0' * (_align(ofile.tell()) - ofile.tell()))
+                values.tofile(ofile)
+
+    @classmethod
+    def load(cls, path):
+        '''Memory map a table written by `save`
+        '''
+        with open(path, 'rb') as ifile:
+            buffer = mmap.mmap(ifile.fileno(), 0, access=mmap.ACCESS_READ)
+        view = memoryview(buffer)
+        if len(view) < HEADER.size:
+            raise ValueError('Invalid route table file: {}'.format(path))
+        magic, version, size, typecode, codes_len, checksum = (
+            HEADER.unpack_from(view)
+        )
+        if magic != MAGIC or version != VERSION:
+            raise ValueError('Invalid route table file: {}'.format(path))
+        offset = HEADER.size
+        codes = bytes(view[offset:offset + codes_len]).decode('utf-8')
+        offset += codes_len
+        count = size * 2 * size
+        arrays = []
+        for fmt in (typecode.decode('ascii'), 'i', 'i'):
+            offset = _align(offset)
+            end = offset + count * struct.calcsize(fmt)
+            arrays.append(view[offset:end].cast(fmt))
+            offset = end
+        route_table = cls(
+            codes.split(',') if codes else [], *arrays, checksum=checksum
+        )
+        route_table.path = path
+        return route_table
+
+
+def _align(offset):
+    return (offset + ALIGNMENT - 1) // ALIGNMENT * ALIGNMENT
+
+
+@register_strategy('table')
+def table_route(mrt_map, start, end, table, limit=None, stats=None):
+    '''Look up the single best route in the precomputed RouteTable
+
+    The RouteTable of the CostTable is built on first use if it was not
+    precomputed or loaded before. Only the best route is returned.
+    '''
+    if table.route_table is None:
+        table.route_table = RouteTable.build(mrt_map, table)
+    route = table.route_table.find_route(start, end)
+    if route is None:
+        return []
+    return [route]
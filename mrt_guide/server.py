@@ -0,0 +1,325 @@
+'''Asynchronous HTTP service around PathFinder
+
+`RoutingServer` serves `GET /routes?from=&to=&dt=&limit=` with the JSON
+formatter and `GET /metrics` with request counts and latency histograms,
+overall and by phase of the queries (see `SearchStats`).
+It is built on asyncio streams only: connections are kept alive between
+requests (HTTP/1.1), idle connections and slow searches are timed out, and
+searches run in an executor so the event loop keeps accepting requests. A
+process pool can be used to spread searches over CPUs; each worker process
+then gets its own copy of the PathFinder once, when it starts.
+
+A thread running a search can not be stopped from outside, so searches get
+the request timeout as time budget (see `mrt_guide.bounds`) and give their
+worker back once it is over instead of running on after the 504.
+'''
+import asyncio
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from http import HTTPStatus
+import json
+import time
+from urllib.parse import parse_qs, urlsplit
+
+from .bounds import SearchBounds
+from .formatter import FormatterFactory
+from .stats import SearchStats
+
+
+# upper bounds in seconds of the latency histogram buckets
+LATENCY_BUCKETS = (
+    0.001, 0.002, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5,
+)
+MAX_LINE_LENGTH = 8192
+MAX_HEADERS = 100
+
+
+class LatencyHistogram:
+    def __init__(self, buckets=LATENCY_BUCKETS):
+        '''Counts of observed latencies by bucket upper bound
+        '''
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.count = 0
+        self.total = 0.0
+
+    def observe(self, seconds):
+        index = 0
+        while index < len(self.buckets) and seconds > self.buckets[index]:
+            index += 1
+        self.counts[index] += 1
+        self.count += 1
+        self.total += seconds
+
+    def to_dict(self):
+        bounds = [str(bucket) for bucket in self.buckets] + ['+Inf']
+        return {
+            'count': self.count,
+            'sum': self.total,
+            'buckets': dict(zip(bounds, self.counts)),
+        }
+
+
+class RoutingServer:
+    def __init__(
+            self, path_finder, limit=1, request_timeout=5.0,
+            keep_alive_timeout=15.0, workers=None, processes=False):
+        '''HTTP server answering route queries with path_finder
+
+        limit: default and max number of routes per query
+        request_timeout: seconds a search may take before answering 504,
+            also its time budget. Searches cut short by it are not cached
+            by the PathFinder
+        keep_alive_timeout: seconds an idle connection is kept open
+        workers: size of the thread or process pool running searches
+        processes: run searches in processes instead of threads
+        '''
+        self.path_finder = path_finder
+        self.limit = limit
+        self.request_timeout = request_timeout
+        self.keep_alive_timeout = keep_alive_timeout
+        self.formatter = FormatterFactory.get_formatter('json')
+        if processes:
+            self.executor = ProcessPoolExecutor(
+                workers, initializer=_init_worker, initargs=(path_finder,),
+            )
+        else:
+            self.executor = ThreadPoolExecutor(workers)
+        self.processes = processes
+        self.histograms = {
+            '/routes': LatencyHistogram(),
+            '/metrics': LatencyHistogram(),
+        }
+        # latency of the phases of /routes queries
+        self.phase_histograms = {}
+        self.statuses = {}
+        self.server = None
+        self._writers = set()
+
+    async def start(self, host='127.0.0.1', port=8080):
+        self.server = await asyncio.start_server(
+            self.handle_connection, host, port, limit=MAX_LINE_LENGTH,
+        )
+        return self.server
+
+    def run(self, host='127.0.0.1', port=8080):
+        '''Serve until interrupted
+        '''
+        loop = asyncio.get_event_loop()
+        loop.run_until_complete(self.start(host, port))
+        try:
+            loop.run_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            self.close()
+            loop.run_until_complete(self.server.wait_closed())
+
+    def close(self):
+        '''Stop accepting connections and close the open ones
+        '''
+        if self.server is not None:
+            self.server.close()
+        for writer in list(self._writers):
+            writer.close()
+        self.executor.shutdown(wait=False)
+
+    @property
+    def port(self):
+        return self.server.sockets[0].getsockname()[1]
+
+    async def handle_connection(self, reader, writer):
+        self._writers.add(writer)
+        try:
+            while True:
+                try:
+                    request = await asyncio.wait_for(
+                        self.read_request(reader), self.keep_alive_timeout,
+                    )
+                except asyncio.TimeoutError:
+                    break
+                except ValueError:
+                    self.write_response(
+                        writer, HTTPStatus.BAD_REQUEST,
+                        {'error': 'Malformed request'}, False,
+                    )
+                    break
+                if request is None:
+                    break
+                method, target, version, headers = request
+                keep_alive = _is_keep_alive(version, headers)
+                started = time.perf_counter()
+                path, status, body = await self.dispatch(method, target)
+                self.observe(path, status, time.perf_counter() - started)
+                self.write_response(writer, status, body, keep_alive)
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            self._writers.discard(writer)
+            writer.close()
+
+    async def read_request(self, reader):
+        '''(method, target, version, headers) or None if connection closed
+        '''
+        line = await reader.readline()
+        if not line:
+            return None
+        parts = line.decode('latin-1').split()
+        if len(parts) != 3:
+            raise ValueError('Malformed request line')
+        headers = {}
+        while True:
+            line = await reader.readline()
+            if line in (b'\r\n', b'\n', b''):
+                break
+            if len(headers) >= MAX_HEADERS:
+                raise ValueError('Too many headers')
+            name, _, value = line.decode('latin-1').partition(':')
+            headers[name.strip().lower()] = value.strip()
+        length = int(headers.get('content-length', 0) or 0)
+        if length:
+            await reader.readexactly(length)
+        method, target, version = parts
+        return method, target, version, headers
+
+    async def dispatch(self, method, target):
+        '''(path, status, body) of the response to a request
+        '''
+        url = urlsplit(target)
+        if url.path not in ('/routes', '/metrics'):
+            return url.path, HTTPStatus.NOT_FOUND, {'error': 'Not found'}
+        if method != 'GET':
+            return url.path, HTTPStatus.METHOD_NOT_ALLOWED, {
+                'error': 'Method not allowed',
+            }
+        if url.path == '/metrics':
+            return url.path, HTTPStatus.OK, self.metrics()
+        query = parse_qs(url.query)
+        try:
+            start, end, dt, limit = self.parse_query(query)
+            body = await asyncio.wait_for(
+                self.find_routes(start, end, dt, limit),
+                self.request_timeout,
+            )
+        except ValueError as e:
+            return url.path, HTTPStatus.BAD_REQUEST, {'error': str(e)}
+        except asyncio.TimeoutError:
+            return url.path, HTTPStatus.GATEWAY_TIMEOUT, {
+                'error': 'Search timed out',
+            }
+        except Exception as e:
+            return url.path, HTTPStatus.INTERNAL_SERVER_ERROR, {
+                'error': 'Unknown error: {}'.format(str(e)),
+            }
+        return url.path, HTTPStatus.OK, body
+
+    def parse_query(self, query):
+        def get(name, default=None):
+            return query.get(name, [default])[0]
+        start = get('from')
+        end = get('to')
+        if not start or not end:
+            raise ValueError('Both from and to are required')
+        limit = get('limit', str(self.limit))
+        try:
+            limit = int(limit)
+        except ValueError:
+            raise ValueError('Invalid limit: {}'.format(limit))
+        if not 1 <= limit <= self.limit:
+            raise ValueError(
+                'limit must be between 1 and {}'.format(self.limit)
+            )
+        return start, end, get('dt'), limit
+
+    async def find_routes(self, start, end, dt, limit):
+        loop = asyncio.get_event_loop()
+        bounds = None
+        if self.request_timeout:
+            bounds = SearchBounds(time_budget=self.request_timeout)
+        if self.processes:
+            routes, stats = await loop.run_in_executor(
+                self.executor, _find_routes_in_worker, start, end, dt, limit,
+                bounds,
+            )
+        else:
+            routes, stats = await loop.run_in_executor(
+                self.executor, _find_routes, self.path_finder,
+                start, end, dt, limit, bounds,
+            )
+        if stats.truncated:
+            raise asyncio.TimeoutError()
+        with stats.timer('format'):
+            body = self.formatter.format_routes(
+                start, end, routes, dt is None, limit=limit,
+            )
+        for phase, seconds in stats.phases.items():
+            if phase not in self.phase_histograms:
+                self.phase_histograms[phase] = LatencyHistogram()
+            self.phase_histograms[phase].observe(seconds)
+        return body
+
+    def observe(self, path, status, seconds):
+        self.statuses[status.value] = self.statuses.get(status.value, 0) + 1
+        if path in self.histograms:
+            self.histograms[path].observe(seconds)
+
+    def metrics(self):
+        return {
+            'latency': {
+                path: histogram.to_dict()
+                for path, histogram in self.histograms.items()
+            },
+            'phases': {
+                phase: histogram.to_dict()
+                for phase, histogram in self.phase_histograms.items()
+            },
+            'statuses': {
+                str(status): count for status, count in self.statuses.items()
+            },
+        }
+
+    def write_response(self, writer, status, body, keep_alive):
+        '''Write body, a dict or an already formatted JSON string
+        '''
+        if not isinstance(body, str):
+            body = json.dumps(body)
+        payload = body.encode('utf-8')
+        headers = [
+            'HTTP/1.1 {} {}'.format(status.value, status.phrase),
+            'Content-Type: application/json',
+            'Content-Length: {}'.format(len(payload)),
+            'Connection: {}'.format('keep-alive' if keep_alive else 'close'),
+        ]
+        writer.write(
+            ('\r\n'.join(headers) + '\r\n\r\n').encode('latin-1') + payload
+        )
+
+
+def _is_keep_alive(version, headers):
+    connection = headers.get('connection', '').lower()
+    if version == 'HTTP/1.0':
+        return connection == 'keep-alive'
+    return connection != 'close'
+
+
+def _find_routes(path_finder, start, end, dt, limit, bounds=None):
+    stats = SearchStats()
+    routes = path_finder.find_routes(
+        start, end, dt, limit=limit, stats=stats, bounds=bounds,
+    )
+    return routes, stats
+
+
+# PathFinder of the current worker process when searches run in processes
+_worker_path_finder = None
+
+
+def _init_worker(path_finder):
+    global _worker_path_finder
+    _worker_path_finder = path_finder
+
+
+def _find_routes_in_worker(start, end, dt, limit, bounds=None):
+    return _find_routes(_worker_path_finder, start, end, dt, limit, bounds)
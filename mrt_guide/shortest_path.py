@@ -0,0 +1,200 @@
+'''Single best route search used as building block by other strategies
+
+The search runs Dijkstra's algorithm over (station id, transferred) states.
+The extra flag records whether the station was reached by a transfer, so
+the rule of `MRTMap.find_routes` that forbids taking two transfers in a row
+at the same interchange is respected. Routes are ranked by cost first and
+by number of steps second, same as the exhaustive search.
+
+Given a heuristic, a lower bound of the cost left to reach the end from a
+station, `shortest_route` becomes an A* search: states are taken off the
+queue by cost so far plus the bound, which steers the search towards the
+end and leaves most of the far away stations unexpanded.
+'''
+from itertools import count
+import heapq
+
+from .graph import TRANSFER
+
+
+def shortest_route(
+        table, sources, end,
+        banned_stations=frozenset(), banned_edges=frozenset(),
+        heuristic=None, stats=None):
+    '''Find the best route from any of the sources to any station in end
+
+    sources: list of (station id, transferred) to start the search with
+    end: collection of station ids to end the search at
+    table: CostTable to search on
+    banned_stations: station ids not allowed to be part of the route
+    banned_edges: (station id, next station id) pairs not allowed to be taken
+    heuristic: callable giving a lower bound of the cost from a station id
+        to end, None if end can not be reached from it. It must be
+        consistent, i.e. never drop by more than the weight of an edge
+    stats: SearchStats to count the work of the search in
+
+    Returns (list of station ids, cost) or None when no route is available.
+    '''
+    rows = table.rows
+    tie_breaker = count()
+    pq = []
+    best = {}
+    parents = {}
+    for station, transferred in sources:
+        bound = heuristic(station) if heuristic is not None else 0
+        if bound is None:
+            continue
+        state = (station, transferred)
+        best[state] = (0, 0)
+        heapq.heappush(pq, (bound, 0, next(tie_breaker), state, None))
+    if stats is not None:
+        stats.pushes += len(pq)
+    while pq:
+        _, steps, _, state, parent = heapq.heappop(pq)
+        if state in parents:
+            if stats is not None:
+                stats.discarded += 1
+            continue
+        parents[state] = parent
+        if stats is not None:
+            stats.expanded(len(pq) + 1, state)
+        # the first time a state is taken off the queue is with its best key
+        cost = best[state][0]
+        station, transferred = state
+        if station in end:
+            return _to_route(parents, state), cost
+        for next_station, weight, kind in rows[station]:
+            if (next_station in banned_stations or
+                    (station, next_station) in banned_edges):
+                continue
+            is_transfer = kind == TRANSFER
+            if is_transfer and transferred:
+                if stats is not None:
+                    stats.pruned += 1
+                continue
+            next_state = (next_station, is_transfer)
+            if next_state in parents:
+                continue
+            # a station settled under the other state may already be on
+            # the route so far, which would make a loop
+            other_state = (next_station, not is_transfer)
+            if (other_state in parents and
+                    _on_route(parents, state, next_station)):
+                if stats is not None:
+                    stats.pruned += 1
+                continue
+            key = (cost + weight, steps + 1)
+            if next_state in best and best[next_state] <= key:
+                continue
+            bound = 0
+            if heuristic is not None:
+                bound = heuristic(next_station)
+                if bound is None:
+                    continue
+            best[next_state] = key
+            heapq.heappush(pq, (
+                key[0] + bound, key[1], next(tie_breaker), next_state, state,
+            ))
+            if stats is not None:
+                stats.pushes += 1
+    return None
+
+
+def _on_route(parents, state, station):
+    while state is not None:
+        if state[0] == station:
+            return True
+        state = parents[state]
+    return False
+
+
+def _to_route(parents, state):
+    route = []
+    while state is not None:
+        route.append(state[0])
+        state = parents[state]
+    route.reverse()
+    return route
+
+
+def shortest_route_tree(table, source):
+    '''Best routes from source to every station, as a tree over states
+
+    States are numbered `2 * station id + transferred`. Returns lists
+    (costs, steps, parents) indexed by state where parents hold the previous
+    state on the best route, -1 for the source, and steps is -1 for the
+    states which cannot be reached.
+    '''
+    rows = table.rows
+    size = 2 * len(rows)
+    costs = [0] * size
+    steps = [-1] * size
+    parents = [-1] * size
+    settled = [False] * size
+    state = 2 * source
+    steps[state] = 0
+    pq = [(0, 0, state, -1)]
+    while pq:
+        cost, step, state, parent = heapq.heappop(pq)
+        if settled[state]:
+            continue
+        settled[state] = True
+        parents[state] = parent
+        transferred = state & 1
+        for next_station, weight, kind in rows[state >> 1]:
+            is_transfer = kind == TRANSFER
+            if is_transfer and transferred:
+                continue
+            next_state = 2 * next_station + is_transfer
+            if settled[next_state]:
+                continue
+            if (settled[next_state ^ 1] and
+                    _on_tree_route(parents, state, next_station)):
+                continue
+            next_cost = cost + weight
+            if steps[next_state] >= 0 and (
+                    costs[next_state], steps[next_state]) <= (
+                    next_cost, step + 1):
+                continue
+            costs[next_state] = next_cost
+            steps[next_state] = step + 1
+            heapq.heappush(pq, (next_cost, step + 1, next_state, state))
+    return costs, steps, parents
+
+
+def tree_route(get_tree, start, end):
+    '''Best route from any station id in start to any in end out of trees
+
+    get_tree: callable returning (costs, steps, parents, base) of the
+        `shortest_route_tree` of a source, where base is the position of
+        the tree in the sequences
+    Returns (list of station ids, cost) or None if no route.
+    '''
+    best = None
+    for source in sorted(start):
+        costs, steps, parents, base = get_tree(source)
+        for target in sorted(end):
+            for state in (2 * target, 2 * target + 1):
+                step = steps[base + state]
+                if step < 0:
+                    continue
+                key = (costs[base + state], step)
+                if best is None or key < best[0]:
+                    best = (key, parents, base, state)
+    if best is None:
+        return None
+    (cost, _), parents, base, state = best
+    route = []
+    while state >= 0:
+        route.append(state >> 1)
+        state = parents[base + state]
+    route.reverse()
+    return route, cost
+
+
+def _on_tree_route(parents, state, station):
+    while state >= 0:
+        if state >> 1 == station:
+            return True
+        state = parents[state]
+    return False
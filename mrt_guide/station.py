@@ -1,13 +1,48 @@
 '''Representing a Station entity and can be hashed
+
+Stations are immutable and interned: building a Station with the code and
+name of one still alive returns that same instance, so maps built from the
+same rows (e.g. snapshots of `MRTMap.as_of`) share their stations. Equal
+stations are then the same object, which makes equality an identity check
+and the hash is computed once, so sets and dicts of stations never build
+strings.
 '''
+import sys
+from weakref import WeakValueDictionary
+
+
+# live stations by (code, name)
+_stations = WeakValueDictionary()
 
 
 class Station:
-    def __init__(self, code, name):
-        self.code = code
-        self.line = code[:2]
-        self.index = int(code[2:])
-        self.name = name
+    __slots__ = ('code', 'line', 'index', 'name', '_hash', '__weakref__')
+
+    def __new__(cls, code, name):
+        key = (code, name)
+        station = _stations.get(key)
+        if station is None:
+            station = object.__new__(cls)
+            index = int(code[2:])
+            for attr, value in [
+                    ('code', sys.intern(code)),
+                    ('line', sys.intern(code[:2])),
+                    ('index', index),
+                    ('name', sys.intern(name)),
+                    ('_hash', hash(key))]:
+                object.__setattr__(station, attr, value)
+            _stations[key] = station
+        return station
+
+    def __setattr__(self, attr, value):
+        raise AttributeError('Station is immutable')
+
+    def __delattr__(self, attr):
+        raise AttributeError('Station is immutable')
+
+    def __reduce__(self):
+        # unpickled stations are interned as well
+        return (Station, (self.code, self.name))
 
     def __str__(self):
         return 'Station[{},{}]'.format(self.code, self.name)
@@ -16,7 +51,17 @@ class Station:
         return str(self)
 
     def __hash__(self):
-        return hash(str(self))
+        return self._hash
 
     def __eq__(self, other):
-        return str(self) == str(other)
+        if self is other:
+            return True
+        if not isinstance(other, Station):
+            return NotImplemented
+        return self.code == other.code and self.name == other.name
+
+    def __ne__(self, other):
+        result = self.__eq__(other)
+        if result is NotImplemented:
+            return result
+        return not result
@@ -1,20 +1,243 @@
 '''Read input data into memory
+
+Rows are streamed as `StationRow` tuples, which can be read by column name
+like the dicts of `csv.DictReader` (e.g. `row['Station Code']`). How a file
+is read depends on its format: readers of more formats can be plugged in
+with `register_reader`. Formats available are "csv", "csv.gz" (gzip
+compressed csv), "jsonl" (one JSON object per line with the same keys as
+the csv columns) and "gtfs" (a directory of a GTFS feed).
 '''
+from collections import namedtuple
 import csv
+from datetime import datetime
+import gzip
+import json
 from pathlib import Path
+import sys
+
+
+# formats of the Opening Date column, some dates only have month and year
+OPENING_DATE_FORMATS = ['%d %B %Y', '%B %Y']
+# column names of the data file
+COLUMNS = ('Station Code', 'Station Name', 'Opening Date')
+
+
+class StationRow(namedtuple('StationRow', ['code', 'name', 'opening_date'])):
+    '''Row of input data, also indexed by column name
+    '''
+    __slots__ = ()
+
+    def __getitem__(self, key):
+        if isinstance(key, str):
+            try:
+                return tuple.__getitem__(self, COLUMNS.index(key))
+            except ValueError:
+                raise KeyError(key)
+        return tuple.__getitem__(self, key)
+
+    def get(self, key, default=None):
+        try:
+            return self[key]
+        except KeyError:
+            return default
+
+    @classmethod
+    def from_mapping(cls, row):
+        '''StationRow of the columns in a dict like row
+
+        Repeated names and dates are interned so rows share them.
+        '''
+        return cls(
+            row['Station Code'],
+            sys.intern(row['Station Name']),
+            sys.intern(row.get('Opening Date') or ''),
+        )
+
+
+_readers = {}
+_suffixes = {}
+
+
+def register_reader(input_format, suffixes=()):
+    '''Register a reader of a format, a generator function of StationRow
+    taking the data path
+
+    suffixes: file name suffixes of the format, e.g. ".csv"
+    '''
+    def wrapper(func):
+        if input_format in _readers:
+            raise ValueError(
+                'The input format {} has been taken'.format(input_format)
+            )
+        _readers[input_format] = func
+        for suffix in suffixes:
+            _suffixes[suffix] = input_format
+        return func
+    return wrapper
 
 
 class StationReader:
-    def __init__(self, data_path):
+    def __init__(self, data_path, input_format=None):
+        '''Reader of the data at data_path
+
+        input_format: name of a registered format, guessed from the suffix
+            of data_path if None, "gtfs" for directories
+        '''
         data_path = Path(data_path)
         if not data_path.exists():
             raise ValueError('Invalid file path provided')
+        if input_format is None:
+            input_format = _guess_format(data_path)
+        if input_format not in _readers:
+            raise ValueError(
+                '{} is not a valid input format'.format(input_format)
+            )
         self.data_path = data_path
+        self.input_format = input_format
+
+    def iter_stations(self):
+        '''Yield a StationRow for each station of the data
+        '''
+        return _readers[self.input_format](self.data_path)
 
     def read_stations(self):
-        stations = []
-        with open(self.data_path, 'r') as ifile:
-            reader = csv.DictReader(ifile)
-            for row in reader:
-                stations.append(row)
-        return stations
+        return list(self.iter_stations())
+
+
+def _guess_format(data_path):
+    if data_path.is_dir():
+        return 'gtfs'
+    name = data_path.name.lower()
+    for suffix in sorted(_suffixes, key=len, reverse=True):
+        if name.endswith(suffix):
+            return _suffixes[suffix]
+    return 'csv'
+
+
+@register_reader('csv', ['.csv'])
+def read_csv(data_path):
+    with open(data_path, 'r', newline='') as ifile:
+        for row in csv.DictReader(ifile):
+            yield StationRow.from_mapping(row)
+
+
+@register_reader('csv.gz', ['.csv.gz', '.gz'])
+def read_csv_gz(data_path):
+    with gzip.open(data_path, 'rt', newline='') as ifile:
+        for row in csv.DictReader(ifile):
+            yield StationRow.from_mapping(row)
+
+
+@register_reader('jsonl', ['.jsonl'])
+def read_jsonl(data_path):
+    with open(data_path, 'r') as ifile:
+        for line_number, line in enumerate(ifile, 1):
+            if not line.strip():
+                continue
+            try:
+                yield StationRow.from_mapping(json.loads(line))
+            except (KeyError, TypeError, ValueError):
+                raise ValueError('Invalid station at line {} of {}'.format(
+                    line_number, data_path,
+                ))
+
+
+@register_reader('gtfs')
+def read_gtfs(data_path):
+    '''Stations of the routes of a GTFS feed directory
+
+    Every route becomes a line whose stations are the stops of its longest
+    trip in stop_times.txt, so stop_times.txt is streamed and only one
+    trip is kept per route. Stops of the same name are interchanges. Lines
+    are coded by the route_short_name in routes.txt when it is a two
+    character code (e.g. "NS") and numbered otherwise, stations by their
+    position on the line. Trips are looked up in trips.txt, a feed without
+    it gets one line per trip.
+    '''
+    data_path = Path(data_path)
+    stop_names = {}
+    for row in _read_gtfs_file(data_path / 'stops.txt'):
+        stop_names[row['stop_id']] = sys.intern(row['stop_name'])
+    trip_routes = {}
+    if (data_path / 'trips.txt').exists():
+        for row in _read_gtfs_file(data_path / 'trips.txt'):
+            trip_routes[row['trip_id']] = row['route_id']
+    route_names = {}
+    if (data_path / 'routes.txt').exists():
+        for row in _read_gtfs_file(data_path / 'routes.txt'):
+            route_names[row['route_id']] = row.get('route_short_name', '')
+    # longest sequence of stops of each route, in order of first trip
+    patterns = {}
+    trip_id = None
+    stops = []
+    for row in _read_gtfs_file(data_path / 'stop_times.txt'):
+        if row['trip_id'] != trip_id:
+            _add_pattern(patterns, trip_routes.get(trip_id, trip_id), stops)
+            trip_id = row['trip_id']
+            stops = []
+        stops.append((int(row['stop_sequence']), row['stop_id']))
+    _add_pattern(patterns, trip_routes.get(trip_id, trip_id), stops)
+    codes = set(
+        name for name in route_names.values()
+        if len(name) == 2 and name.isalpha()
+    )
+    used = set()
+    numbered = 0
+    for route_id, stops in patterns.items():
+        line = route_names.get(route_id, '')
+        if line not in codes or line in used:
+            line = _line_code(numbered)
+            while line in codes or line in used:
+                numbered += 1
+                line = _line_code(numbered)
+        used.add(line)
+        for index, stop_id in enumerate(stops, 1):
+            if stop_id not in stop_names:
+                raise ValueError('Unknown stop in stop_times.txt: {}'.format(
+                    stop_id,
+                ))
+            yield StationRow(
+                '{}{}'.format(line, index), stop_names[stop_id], '',
+            )
+
+
+def _read_gtfs_file(path):
+    if not path.exists():
+        raise ValueError('Missing GTFS file: {}'.format(path))
+    # feeds are often saved with a byte order mark
+    with open(path, 'r', newline='', encoding='utf-8-sig') as ifile:
+        for row in csv.DictReader(ifile):
+            yield row
+
+
+def _add_pattern(patterns, route_id, stops):
+    if not stops:
+        return
+    # a loop line comes back to its first stop, keep each stop once
+    stops = list(dict.fromkeys(stop_id for _, stop_id in sorted(stops)))
+    if len(stops) > len(patterns.get(route_id, ())):
+        patterns[route_id] = stops
+
+
+def _line_code(index):
+    '''Two letter code of the index-th numbered line, e.g. "AA"
+    '''
+    letters = 'ABCDEFGHIJKLMNOPQRSTUVWXYZ'
+    if index >= len(letters) ** 2:
+        raise ValueError('Too many routes: {}'.format(index + 1))
+    return letters[index // len(letters)] + letters[index % len(letters)]
+
+
+def parse_opening_date(value):
+    '''Date of an Opening Date value, None if empty
+
+    Dates given as month and year are the first of the month.
+    '''
+    if not value:
+        return None
+    for date_format in OPENING_DATE_FORMATS:
+        try:
+            return datetime.strptime(value.strip(), date_format).date()
+        except ValueError:
+            continue
+    raise ValueError('Malformatted opening date: {}'.format(value))
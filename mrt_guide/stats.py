@@ -0,0 +1,98 @@
+'''Counters and timings collected while searching for routes
+
+Pass a `SearchStats` as `stats` to `MRTMap.find_routes` or
+`PathFinder.find_routes` to find out how much work a query did, e.g. to
+check that a goal directed strategy expands fewer stations than the
+exhaustive one, or why a query is slow. Searches only touch it behind an
+`if stats is not None` check, so queries without one pay nothing.
+
+Hooks are called with (event, stats, data) to trace queries as they run:
+"phase" once a phase is timed, with (phase name, seconds), and "expand"
+for every expanded state, with the queue length before it was taken off.
+'''
+from contextlib import contextmanager
+import time
+
+
+class SearchStats:
+    def __init__(self, hooks=()):
+        '''Work done by the searches it is passed to
+
+        expansions: number of search states taken off the queue and expanded
+        pushes: number of entries pushed on the queue
+        discarded: entries taken off the queue and dropped unexpanded, e.g.
+            states already expanded with a better key
+        pruned: connections not followed because of the rules of the
+            routes, e.g. two transfers in a row or back to a visited station
+        peak_queue: largest length of the queue
+        truncated: whether a budget of `SearchBounds` cut a search short
+        phases: seconds spent by phase, e.g. "weights" evaluating weights
+            into a CostTable or "search" running the search strategy
+        hooks: callables of (event, stats, data), see the module
+        '''
+        self.expansions = 0
+        self.pushes = 0
+        self.discarded = 0
+        self.pruned = 0
+        self.peak_queue = 0
+        self.truncated = False
+        self.phases = {}
+        self.hooks = list(hooks)
+
+    def expanded(self, queue_length, state=None):
+        '''Count an expansion with queue_length entries in the queue
+        '''
+        self.expansions += 1
+        if queue_length > self.peak_queue:
+            self.peak_queue = queue_length
+        for hook in self.hooks:
+            hook('expand', self, (queue_length, state))
+
+    @contextmanager
+    def timer(self, phase):
+        '''Add the wall time of the block to phase
+        '''
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            seconds = time.perf_counter() - started
+            self.phases[phase] = self.phases.get(phase, 0.0) + seconds
+            for hook in self.hooks:
+                hook('phase', self, (phase, seconds))
+
+    def __getstate__(self):
+        # hooks may not be picklable and belong to the process they run in
+        state = self.__dict__.copy()
+        state['hooks'] = []
+        return state
+
+    def to_dict(self):
+        return {
+            'expansions': self.expansions,
+            'pushes': self.pushes,
+            'discarded': self.discarded,
+            'pruned': self.pruned,
+            'peak_queue': self.peak_queue,
+            'truncated': self.truncated,
+            'phases': dict(self.phases),
+        }
+
+
+class _NoTimer:
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return False
+
+
+_no_timer = _NoTimer()
+
+
+def phase_timer(stats, phase):
+    '''Context manager timing phase in stats, doing nothing if stats is None
+    '''
+    if stats is None:
+        return _no_timer
+    return stats.timer(phase)
@@ -0,0 +1,67 @@
+'''Registry of route search strategies used by MRTMap
+
+A strategy is a callable taking (mrt_map, start, end, table, limit) where
+start and end are sets of station ids already resolved by
+`MRTMap.map_to_station_ids` and table is the `CostTable` compiled from the
+weights of the query. It returns a list of (list of station ids, cost)
+ranked by cost, which `MRTMap.find_routes` turns back into stations. When
+the caller asks for them, a `SearchStats` is passed as keyword argument
+`stats` for the strategy to count its work in, and strategies registered
+with `bounded=True` are given a `SearchBounds` as keyword argument `bounds`
+when the caller sets one (see `mrt_guide.bounds`). Strategies registered
+with `options` also take those keyword arguments, set per query through the
+`options` of `MRTMap.find_routes`. New strategies can be plugged in with the
+`register_strategy` decorator and selected by name in `MRTMap.find_routes`.
+'''
+
+
+_strategies = {}
+_bounded = set()
+_options = {}
+
+
+def register_strategy(strategy_type, bounded=False, options=()):
+    '''Register a search strategy with a given name. Retrive via StrategyFactory
+
+    bounded: whether the strategy takes a `bounds` keyword argument
+    options: names of the other keyword arguments the strategy takes
+    '''
+    def wrapper(func):
+        if strategy_type in _strategies:
+            raise ValueError(
+                'The strategy type {} has been taken'.format(strategy_type)
+            )
+        _strategies[strategy_type] = func
+        if bounded:
+            _bounded.add(strategy_type)
+        _options[strategy_type] = frozenset(options)
+        return func
+    return wrapper
+
+
+class StrategyFactory:
+    '''Factory for getting different route search strategies
+    '''
+    @staticmethod
+    def get_strategy(strategy_type):
+        if strategy_type not in _strategies:
+            raise ValueError(
+                '{} is not a valid search strategy'.format(strategy_type)
+            )
+        return _strategies[strategy_type]
+
+    @staticmethod
+    def is_bounded(strategy_type):
+        '''Whether the strategy supports SearchBounds
+        '''
+        return strategy_type in _bounded
+
+    @staticmethod
+    def get_options(strategy_type):
+        '''Names of the keyword options the strategy takes
+        '''
+        return _options.get(strategy_type, frozenset())
+
+    @staticmethod
+    def get_strategy_types():
+        return sorted(_strategies)
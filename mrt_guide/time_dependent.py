@@ -0,0 +1,243 @@
+'''Time dependent routing across the regimes of a WeightsSchedule
+
+A static search costs the whole journey with the weights in effect at the
+departure time. Here every connection is costed with the weights in effect
+when the traveller is at the station it leaves from, so a journey starting
+at 21:50 finds the lines closed at 22:00 closed when it gets to them.
+
+`TimeDependentTable` evaluates every regime of the schedule over the graph
+once, like `CostTable` does for a single weights. Regimes change abruptly,
+so leaving a minute later can arrive earlier (e.g. right after the end of
+peak hours). Waiting at a station is therefore allowed: the arrival time
+over a connection is the earliest over leaving now or at any later regime
+change, which makes arrival times non decreasing in departure times (FIFO)
+and the time dependent Dijkstra search below exact.
+
+`route_profile` answers a whole window of departure times. As long as a
+journey does not cross a regime change, the best route is the one of the
+static search with the weights of the regime. So only one static search is
+run per regime, and time dependent searches only for the departures close
+enough to a change for the journey to cross it.
+'''
+from itertools import count
+from math import ceil
+import heapq
+
+from .exceptions import DoNotOperateException
+from .graph import TRANSFER
+from .shortest_path import _on_route, _to_route, shortest_route
+from .weights import MINUTES_IN_WEEK
+
+
+class TimeDependentTable:
+    def __init__(self, schedule, rows):
+        '''Adjacency with a cost per regime of schedule
+
+        rows: list indexed by station id of tuples of (next station id,
+            edge kind, tuple of weights by regime, None when closed)
+        '''
+        self.schedule = schedule
+        self.rows = rows
+
+    @classmethod
+    def compile(cls, mrt_map, schedule):
+        '''Evaluate every weights of schedule over the connections of mrt_map
+
+        Connections closed in every regime are left out.
+        '''
+        stations = mrt_map.stations
+        graph = mrt_map.graph
+        rows = []
+        for station_id, station in enumerate(stations):
+            row = []
+            for next_station_id, kind in graph.edges(station_id):
+                next_station = stations[next_station_id]
+                costs = []
+                for weights in schedule.weights_list:
+                    try:
+                        if kind == TRANSFER:
+                            costs.append(weights.get_transfer_cost(
+                                station, next_station
+                            ))
+                        else:
+                            costs.append(weights.get_direct_cost(
+                                station, next_station
+                            ))
+                    except DoNotOperateException:
+                        costs.append(None)
+                if any(cost is not None for cost in costs):
+                    row.append((next_station_id, kind, tuple(costs)))
+            rows.append(tuple(row))
+        return cls(schedule, rows)
+
+    def __len__(self):
+        return len(self.rows)
+
+    def get_arrival(self, costs, minute):
+        '''Earliest arrival over a connection left at minute or later
+        '''
+        regimes = self.schedule.regimes
+        until_change = self.schedule.until_change
+        cost = costs[regimes[int(minute) % MINUTES_IN_WEEK]]
+        arrival = None if cost is None else minute + cost
+        change = int(minute) + until_change[int(minute) % MINUTES_IN_WEEK]
+        while arrival is None or change < arrival:
+            week_minute = change % MINUTES_IN_WEEK
+            cost = costs[regimes[week_minute]]
+            if cost is not None and (
+                    arrival is None or change + cost < arrival):
+                arrival = change + cost
+            change += until_change[week_minute]
+        return arrival
+
+
+def earliest_arrival(td_table, start, end, departure, stats=None):
+    '''Find the route from any station id in start arriving the earliest at
+    any station id in end
+
+    departure: minute of the week (see `WeightsSchedule.to_minute`) to
+        leave at, minutes past the end of the week wrap around
+    stats: SearchStats to count the work of the search in
+
+    Routes arriving at the same time are ranked by number of steps. Returns
+    (list of station ids, arrival minute) or None if no route is available.
+    '''
+    rows = td_table.rows
+    get_arrival = td_table.get_arrival
+    tie_breaker = count()
+    pq = []
+    best = {}
+    parents = {}
+    for station_id in start:
+        state = (station_id, False)
+        best[state] = (departure, 0)
+        heapq.heappush(pq, (departure, 0, next(tie_breaker), state, None))
+    if stats is not None:
+        stats.pushes += len(pq)
+    while pq:
+        minute, steps, _, state, parent = heapq.heappop(pq)
+        if state in parents:
+            if stats is not None:
+                stats.discarded += 1
+            continue
+        parents[state] = parent
+        if stats is not None:
+            stats.expanded(len(pq) + 1, state)
+        station_id, transferred = state
+        if station_id in end:
+            return _to_route(parents, state), minute
+        for next_station_id, kind, costs in rows[station_id]:
+            is_transfer = kind == TRANSFER
+            if is_transfer and transferred:
+                if stats is not None:
+                    stats.pruned += 1
+                continue
+            next_state = (next_station_id, is_transfer)
+            if next_state in parents:
+                continue
+            other_state = (next_station_id, not is_transfer)
+            if (other_state in parents and
+                    _on_route(parents, state, next_station_id)):
+                if stats is not None:
+                    stats.pruned += 1
+                continue
+            key = (get_arrival(costs, minute), steps + 1)
+            if next_state in best and best[next_state] <= key:
+                continue
+            best[next_state] = key
+            heapq.heappush(
+                pq, key + (next(tie_breaker), next_state, state)
+            )
+            if stats is not None:
+                stats.pushes += 1
+    return None
+
+
+class ProfileInterval:
+    def __init__(
+            self, departure, last_departure, arrival, last_arrival, route):
+        '''Departures from departure to last_departure sharing a route
+
+        The arrival time goes linearly from arrival to last_arrival over
+        the interval: it grows with the departure while the route can be
+        taken right away and stays the same while it waits for a regime.
+        '''
+        self.departure = departure
+        self.last_departure = last_departure
+        self.arrival = arrival
+        self.last_arrival = last_arrival
+        self.route = route
+
+    def __repr__(self):
+        return 'ProfileInterval[{}-{},{}-{},{}]'.format(
+            self.departure, self.last_departure,
+            self.arrival, self.last_arrival, self.route,
+        )
+
+    def extend(
+            self, departure, last_departure, arrival, last_arrival, route):
+        '''Extend with the following departures, True if they continue it
+        '''
+        if route != self.route or departure != self.last_departure + 1:
+            return False
+        slopes = set([arrival - self.last_arrival])
+        if last_departure > departure:
+            slopes.add(
+                (last_arrival - arrival) / (last_departure - departure)
+            )
+        if self.last_departure > self.departure:
+            slopes.add(
+                (self.last_arrival - self.arrival) /
+                (self.last_departure - self.departure)
+            )
+        if len(slopes) > 1:
+            return False
+        self.last_departure = last_departure
+        self.last_arrival = last_arrival
+        return True
+
+
+def route_profile(mrt_map, schedule, start, end, first, last, stats=None):
+    '''Earliest arrival and route for every departure minute in a window
+
+    first, last: minutes of the week of the first and last departure,
+        last may go past the end of the week
+    stats: SearchStats to count the work of all the searches in
+
+    Returns a list of ProfileInterval ordered by departure. Departures
+    without any route are left out.
+    '''
+    td_table = mrt_map.get_time_dependent_table(schedule)
+    sources = [(station_id, False) for station_id in start]
+    static_routes = {}
+    intervals = []
+    minute = first
+    while minute <= last:
+        week_minute = minute % MINUTES_IN_WEEK
+        regime = schedule.regimes[week_minute]
+        change = minute + schedule.until_change[week_minute]
+        if regime not in static_routes:
+            table = mrt_map.get_cost_table(schedule.weights_list[regime])
+            static_routes[regime] = shortest_route(
+                table, sources, end, stats=stats,
+            )
+        static_route = static_routes[regime]
+        if static_route is not None and minute + static_route[1] < change:
+            # departures whose journey ends before the change
+            route, cost = static_route
+            last_static = min(last, ceil(change - cost) - 1)
+            piece = (
+                minute, last_static, minute + cost, last_static + cost,
+                route,
+            )
+            minute = last_static + 1
+        else:
+            found = earliest_arrival(td_table, start, end, minute, stats)
+            if found is None:
+                minute += 1
+                continue
+            piece = (minute, minute, found[1], found[1], found[0])
+            minute += 1
+        if not intervals or not intervals[-1].extend(*piece):
+            intervals.append(ProfileInterval(*piece))
+    return intervals
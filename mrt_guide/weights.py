@@ -1,9 +1,17 @@
 '''Represent weights/minutes to take to complete commute or transfer
+
+`WeightsSchedule` compiles the choice of weights made by a factory for every
+minute of the week into a lookup table, for searches which need the weights
+at many points in time.
 '''
+from array import array
+from datetime import datetime, timedelta
+
 from .exceptions import DoNotOperateException
 
 
 SECONDS_IN_HOUR = 3600
+MINUTES_IN_WEEK = 7 * 24 * 60
 
 
 class WeightsFactory:
@@ -30,8 +38,22 @@ class WeightsFactory:
         else:
             return NormalWeights()
 
+    @staticmethod
+    def get_all_weights():
+        '''One weights of each profile the factory can return
+        '''
+        return [
+            SimpleWeights(), PeakHourWeights(), NightWeights(),
+            NormalWeights(),
+        ]
+
 
 class Weights:
+    # name shared by all the weights giving the same costs, used by MRTMap
+    # to cache the compiled CostTable. None disables caching. Subclasses
+    # do not inherit it, see `get_profile`.
+    profile = None
+
     def __init__(self):
         pass
 
@@ -42,7 +64,22 @@ class Weights:
         raise NotImplementedError('To be implemented')
 
 
+def get_profile(weights):
+    '''Profile of weights, None unless set on the weights themselves or by
+    their own class
+
+    A subclass of e.g. PeakHourWeights may change the costs, so it has to
+    name a profile of its own to get its tables cached.
+    '''
+    profile = getattr(weights, '__dict__', {}).get('profile')
+    if profile is None:
+        profile = type(weights).__dict__.get('profile')
+    return profile
+
+
 class SimpleWeights(Weights):
+    profile = 'simple'
+
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
 
@@ -54,6 +91,8 @@ class SimpleWeights(Weights):
 
 
 class PeakHourWeights(Weights):
+    profile = 'peak'
+
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
         self.peak_busy = set(['NS', 'NE'])
@@ -72,6 +111,8 @@ class PeakHourWeights(Weights):
 
 
 class NightWeights(Weights):
+    profile = 'night'
+
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
         self.night_stop = set(['DT', 'CG', 'CE'])
@@ -99,6 +140,8 @@ class NightWeights(Weights):
 
 
 class NormalWeights(Weights):
+    profile = 'normal'
+
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
         self.normal_fast = set(['DT', 'TE'])
@@ -114,3 +157,63 @@ class NormalWeights(Weights):
                 neighbor.line in self.normal_fast):
             return self.normal_fast_wait
         return self.normal_wait
+
+
+class WeightsSchedule:
+    def __init__(self, weights_list, regimes, until_change):
+        '''Weights in effect at every minute of the week
+
+        weights_list: distinct weights of the schedule, one per regime
+        regimes: array indexed by minute of the week (0 is Monday 00:00) of
+            the position in weights_list of the weights in effect
+        until_change: array indexed by minute of the week of the minutes
+            until the regime changes, MINUTES_IN_WEEK if it never does
+        '''
+        self.weights_list = weights_list
+        self.regimes = regimes
+        self.until_change = until_change
+
+    @classmethod
+    def compile(cls, weights_factory=WeightsFactory):
+        '''Ask weights_factory for the weights of every minute of the week
+
+        Weights of the same class are considered the same regime.
+        '''
+        weights_list = []
+        regime_ids = {}
+        regimes = array('B')
+        # any Monday will do
+        monday = datetime(2019, 1, 7)
+        for minute in range(MINUTES_IN_WEEK):
+            weights = weights_factory.get_weights(
+                True, monday + timedelta(minutes=minute)
+            )
+            regime = regime_ids.get(type(weights))
+            if regime is None:
+                regime = regime_ids[type(weights)] = len(weights_list)
+                weights_list.append(weights)
+            regimes.append(regime)
+        until_change = array('H', [MINUTES_IN_WEEK]) * MINUTES_IN_WEEK
+        # walk the week backward twice so changes wrap around Sunday night
+        next_change = None
+        for minute in range(2 * MINUTES_IN_WEEK - 1, -1, -1):
+            minute %= MINUTES_IN_WEEK
+            following = (minute + 1) % MINUTES_IN_WEEK
+            if regimes[following] != regimes[minute]:
+                next_change = minute + 1
+            if next_change is not None:
+                until_change[minute] = (
+                    next_change - minute - 1
+                ) % MINUTES_IN_WEEK + 1
+        return cls(weights_list, regimes, until_change)
+
+    def get_weights(self, minute):
+        '''Weights in effect at minute, counted from Monday 00:00
+        '''
+        return self.weights_list[self.regimes[int(minute) % MINUTES_IN_WEEK]]
+
+    @staticmethod
+    def to_minute(dt):
+        '''Minute of the week of datetime dt
+        '''
+        return dt.weekday() * 24 * 60 + dt.hour * 60 + dt.minute
@@ -0,0 +1,120 @@
+import os
+from pathlib import Path
+
+import pytest
+
+from mrt_guide.alternatives import AlternativeRoutes
+from mrt_guide.path_finder import PathFinder
+from mrt_guide.stats import SearchStats
+from mrt_guide.weights import NormalWeights
+
+from .test_bounds import get_mrt_map
+
+
+def get_rides(stations):
+    return set(
+        (station, next_station)
+        for station, next_station in zip(stations, stations[1:])
+        if station.name != next_station.name
+    )
+
+
+class TestAlternativeRoutes:
+    def test_invalid_parameters(self):
+        for kwargs in [
+                {'max_overlap': 1.5}, {'max_stretch': 0.5}, {'penalty': 1},
+                {'max_runs': 0}]:
+            with pytest.raises(ValueError):
+                AlternativeRoutes(**kwargs)
+
+    def test_dissimilar_routes(self):
+        mrt_map = get_mrt_map()
+        weights = NormalWeights()
+        best = mrt_map.find_routes(
+            'Woodlands', 'Changi Airport', weights, limit=1,
+        )
+        yen_stats = SearchStats()
+        mrt_map.find_routes(
+            'Woodlands', 'Changi Airport', weights, limit=3, strategy='yen',
+            stats=yen_stats,
+        )
+        stats = SearchStats()
+        routes = mrt_map.find_routes(
+            'Woodlands', 'Changi Airport', weights, limit=3,
+            strategy='alternatives', stats=stats,
+        )
+        assert len(routes) == 3
+        assert routes[0] == best[0]
+        assert [cost for _, cost in routes] == sorted(
+            cost for _, cost in routes
+        )
+        for i, (stations, cost) in enumerate(routes):
+            assert cost <= best[0][1] * 1.5
+            rides = get_rides(stations)
+            for other, _ in routes[:i]:
+                assert len(rides & get_rides(other)) <= len(rides) * 0.5
+        assert stats.expansions < yen_stats.expansions
+
+    def test_limits(self):
+        mrt_map = get_mrt_map()
+        table = mrt_map.get_cost_table(NormalWeights())
+        start = mrt_map.map_to_station_ids('Boon Lay')
+        end = mrt_map.map_to_station_ids('Little India')
+        strategy = AlternativeRoutes(max_overlap=0, max_runs=1)
+        assert len(strategy(mrt_map, start, end, table)) == 1
+        strict = AlternativeRoutes(max_overlap=0, max_runs=20)
+        loose = AlternativeRoutes(max_overlap=1, max_runs=20)
+        assert len(strict(mrt_map, start, end, table)) < len(
+            loose(mrt_map, start, end, table)
+        )
+        routes = mrt_map.find_routes(
+            'Boon Lay', 'Boon Lay', NormalWeights(),
+            strategy='alternatives',
+        )
+        assert len(routes) == 1
+
+    def test_options(self):
+        mrt_map = get_mrt_map()
+        weights = NormalWeights()
+        table = mrt_map.get_cost_table(weights)
+        start = mrt_map.map_to_station_ids('Boon Lay')
+        end = mrt_map.map_to_station_ids('Little India')
+        strict = AlternativeRoutes(max_overlap=0, max_runs=20)
+        expected = [
+            (mrt_map.to_stations(route), cost)
+            for route, cost in strict(mrt_map, start, end, table)
+        ]
+        routes = mrt_map.find_routes(
+            'Boon Lay', 'Little India', weights, strategy='alternatives',
+            options={'max_overlap': 0, 'max_runs': 20},
+        )
+        assert routes == expected
+        # the registered strategy keeps its defaults
+        assert len(mrt_map.find_routes(
+            'Boon Lay', 'Little India', weights, strategy='alternatives',
+            options={'max_runs': 20},
+        )) > len(routes)
+        for strategy, options in [
+                ('alternatives', {'max_overlap': 2}),
+                ('alternatives', {'overlap': 0}),
+                ('yen', {'max_overlap': 0})]:
+            with pytest.raises(ValueError):
+                mrt_map.find_routes(
+                    'Boon Lay', 'Little India', weights, strategy=strategy,
+                    options=options,
+                )
+
+    def test_path_finder_options(self):
+        data_path = (Path(
+            os.path.realpath(__file__)
+        ) / Path('../../data/StationMap.csv')).resolve()
+        finder = PathFinder(data_path)
+        routes = finder.find_routes(
+            'Boon Lay', 'Little India', strategy='alternatives',
+            options={'max_overlap': 0, 'max_runs': 20},
+        )
+        assert routes != finder.find_routes(
+            'Boon Lay', 'Little India', strategy='alternatives',
+            options={'max_overlap': 1, 'max_runs': 20},
+        )
+        assert len(finder.cache) == 2
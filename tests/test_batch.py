@@ -0,0 +1,106 @@
+import os
+from pathlib import Path
+
+import pytest
+
+from mrt_guide.batch import BatchRouter, _shard_by_origin
+from mrt_guide.path_finder import PathFinder
+
+
+def get_path_finder():
+    data_path = (Path(
+        os.path.realpath(__file__)
+    ) / Path('../data/test_mrt_map.csv')).resolve()
+    return PathFinder(data_path, cache_size=0)
+
+
+class TestBatch:
+    def test_same_as_find_routes(self):
+        finder = get_path_finder()
+        pairs = [
+            ('test1', 'test5'), ('NS2', 'test5'), ('test1', 'test7'),
+            ('test1', 'test5', '2019-06-19T8:00'), ('EW1', 'test1'),
+            ('test1', 'test1'), ('test6', 'EW2', '2019-06-19T23:00'),
+        ]
+        results = list(finder.find_routes_batch(pairs, chunk_size=3))
+        assert [(start, end) for start, end, _ in results] == [
+            (pair[0], pair[1]) for pair in pairs
+        ]
+        for pair, (_, _, routes) in zip(pairs, results):
+            dt = pair[2] if len(pair) > 2 else None
+            expected = finder.find_routes(pair[0], pair[1], dt, limit=1)
+            assert routes == expected
+        finder.precompute_route_tables()
+        assert list(finder.find_routes_batch(pairs)) == results
+
+    def test_with_limit(self):
+        finder = get_path_finder()
+        pairs = [('test1', 'test5'), ('test2', 'test7')]
+        results = finder.find_routes_batch(
+            pairs, dt='2019-06-19T8:00', limit=3, strategy='yen'
+        )
+        for (start, end), (_, _, routes) in zip(pairs, results):
+            expected = finder.find_routes(
+                start, end, '2019-06-19T8:00', limit=3
+            )
+            assert [cost for _, cost in routes] == [
+                cost for _, cost in expected
+            ]
+
+    def test_shares_route_trees(self):
+        finder = get_path_finder()
+        router = BatchRouter(finder)
+        list(router.route([
+            ('NS1', 'test5'), ('NS1', 'test7'),
+            ('NS1', 'test5', '2019-06-19T12:00'),
+            ('NS1', 'test5', '2019-06-19T13:00'),
+        ]))
+        # one tree for each of the simple and normal profiles
+        assert len(router._trees) == 2
+
+    def test_invalid_input(self):
+        finder = get_path_finder()
+        with pytest.raises(ValueError):
+            list(finder.find_routes_batch([('test1', 'test5', 'INVALID')]))
+
+    def test_unknown_station(self):
+        finder = get_path_finder()
+        pairs = [
+            ('test1', 'test5'), ('test1', 'NO_EXISTING'),
+            ('NO_EXISTING', 'test5'), ('test2', 'test7'),
+        ]
+        for workers in [1, 2]:
+            results = list(finder.find_routes_batch(pairs, workers=workers))
+            assert [(start, end) for start, end, _ in results] == pairs
+            assert results[1][2] is None
+            assert results[2][2] is None
+            for index in [0, 3]:
+                start, end, routes = results[index]
+                expected = finder.find_routes(start, end, limit=1)
+                assert routes[0][1] == expected[0][1]
+
+    def test_with_workers(self):
+        finder = get_path_finder()
+        pairs = [
+            ('test1', 'test5'), ('NS2', 'test5'), ('test1', 'test7'),
+            ('test1', 'test5', '2019-06-19T8:00'), ('EW1', 'test1'),
+            ('test1', 'test1'), ('test6', 'EW2', '2019-06-19T23:00'),
+        ] * 3
+        expected = list(finder.find_routes_batch(pairs))
+        for workers in [2, 3]:
+            results = finder.find_routes_batch(
+                pairs, chunk_size=5, workers=workers
+            )
+            assert list(results) == expected
+        expected = list(finder.find_routes_batch(pairs, limit=2))
+        results = finder.find_routes_batch(pairs, limit=2, workers=2)
+        assert list(results) == expected
+
+    def test_shard_by_origin(self):
+        chunk = [('a', 'x'), ('b', 'x'), ('a', 'y'), ('c', 'x'), ('a', 'z')]
+        shards = _shard_by_origin(chunk, 2)
+        assert shards == [
+            [(0, ('a', 'x')), (2, ('a', 'y')), (4, ('a', 'z'))],
+            [(1, ('b', 'x')), (3, ('c', 'x'))],
+        ]
+        assert len(_shard_by_origin(chunk[:1], 4)) == 1
@@ -0,0 +1,58 @@
+import os
+from pathlib import Path
+
+from mrt_guide.mrt_map import MRTMap
+from mrt_guide.stats import SearchStats
+from mrt_guide.stations_reader import StationReader
+from mrt_guide.weights import NightWeights, NormalWeights, SimpleWeights
+
+from .test_k_shortest import get_route_keys
+from .test_mrt_map import get_station_row, MockedNormalWeight
+
+
+class TestBidirectional:
+    def test_same_as_exhaustive(self):
+        mrt_map = MRTMap([
+            get_station_row(['NS1', 'test1', '10 March 1990']),
+            get_station_row(['NS2', 'test2', '10 March 1990']),
+            get_station_row(['TE1', 'test1', '10 March 1990']),
+            get_station_row(['TE2', 'test3', '10 March 1990']),
+            get_station_row(['CC1', 'test3', '10 March 1990']),
+            get_station_row(['DT1', 'test3', '10 March 1990']),
+            get_station_row(['TE3', 'test2', '10 March 1990']),
+            get_station_row(['TE4', 'test4', '10 March 1990']),
+            get_station_row(['CG1', 'testn', '10 March 1990']),
+        ])
+        weights = MockedNormalWeight()
+        for start, end in [
+                ('NS1', 'NS2'), ('test1', 'test2'), ('NS1', 'test4'),
+                ('test1', 'test1'), ('NS1', 'TE1'), ('TE4', 'test3'),
+                ('CC1', 'DT1'), ('test4', 'test1')]:
+            expected = mrt_map.find_routes(start, end, weights, limit=1)
+            routes = mrt_map.find_routes(
+                start, end, weights, strategy='bidirectional',
+            )
+            assert get_route_keys(routes) == get_route_keys(expected)
+        assert mrt_map.find_routes(
+            'NS1', 'CG1', weights, strategy='bidirectional',
+        ) == []
+
+    def test_fewer_expansions(self):
+        data_path = (Path(
+            os.path.realpath(__file__)
+        ) / Path('../../data/StationMap.csv')).resolve()
+        mrt_map = MRTMap(StationReader(data_path).read_stations())
+        for weights in [SimpleWeights(), NormalWeights(), NightWeights()]:
+            stats = SearchStats()
+            expected_stats = SearchStats()
+            routes = mrt_map.find_routes(
+                'Buona Vista', 'Woodlands', weights,
+                strategy='bidirectional', stats=stats,
+            )
+            expected = mrt_map.find_routes(
+                'Buona Vista', 'Woodlands', weights, limit=1,
+                strategy='yen', stats=expected_stats,
+            )
+            assert routes[0][1] == expected[0][1]
+            assert len(routes[0][0]) == len(expected[0][0])
+            assert 0 < stats.expansions < expected_stats.expansions
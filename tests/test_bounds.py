@@ -0,0 +1,133 @@
+import os
+from pathlib import Path
+
+import pytest
+
+from mrt_guide.bounds import remaining_costs, SearchBounds
+from mrt_guide.mrt_map import MRTMap
+from mrt_guide.path_finder import PathFinder
+from mrt_guide.stations_reader import StationReader
+from mrt_guide.stats import SearchStats
+from mrt_guide.weights import NormalWeights
+
+from .test_k_shortest import get_route_keys
+
+
+def get_mrt_map():
+    data_path = (Path(
+        os.path.realpath(__file__)
+    ) / Path('../../data/StationMap.csv')).resolve()
+    return MRTMap(StationReader(data_path).read_stations())
+
+
+def count_transfers(stations):
+    return sum(
+        1 for station, next_station in zip(stations, stations[1:])
+        if station.name == next_station.name
+    )
+
+
+class TestSearchBounds:
+    def test_invalid_bounds(self):
+        for kwargs in [
+                {'max_cost_ratio': 0.5}, {'max_transfers': -1},
+                {'max_expansions': 0}, {'time_budget': 0}]:
+            with pytest.raises(ValueError):
+                SearchBounds(**kwargs)
+        with pytest.raises(ValueError):
+            get_mrt_map().find_routes(
+                'Boon Lay', 'Little India', NormalWeights(),
+                strategy='astar', bounds=SearchBounds(max_transfers=1),
+            )
+
+    def test_remaining_costs(self):
+        mrt_map = get_mrt_map()
+        table = mrt_map.get_cost_table(NormalWeights())
+        end = mrt_map.map_to_station_ids('Little India')
+        remaining = remaining_costs(table, end)
+        for station_id in end:
+            assert remaining[station_id] == 0
+        start = mrt_map.map_to_station_ids('Boon Lay')
+        routes = mrt_map.find_routes(
+            'Boon Lay', 'Little India', NormalWeights(), limit=1,
+        )
+        assert min(remaining[station_id] for station_id in start) == (
+            routes[0][1]
+        )
+
+    def test_same_as_filtered(self):
+        mrt_map = get_mrt_map()
+        weights = NormalWeights()
+        everything = mrt_map.find_routes(
+            'Boon Lay', 'Little India', weights, limit=30,
+        )
+        expected = [
+            (stations, cost) for stations, cost in everything
+            if count_transfers(stations) <= 1
+        ]
+        expected = [
+            (stations, cost) for stations, cost in expected
+            if cost <= expected[0][1] * 1.2
+        ]
+        assert 0 < len(expected) < len(everything)
+        bounds = SearchBounds(max_cost_ratio=1.2, max_transfers=1)
+        for strategy in ['exhaustive', 'yen']:
+            stats = SearchStats()
+            routes = mrt_map.find_routes(
+                'Boon Lay', 'Little India', weights, strategy=strategy,
+                stats=stats, bounds=bounds,
+            )
+            assert get_route_keys(routes) == get_route_keys(expected)
+            assert not stats.truncated
+        stats = SearchStats()
+        mrt_map.find_routes(
+            'Boon Lay', 'Little India', weights, limit=len(expected),
+            stats=stats,
+        )
+        bounded_stats = SearchStats()
+        mrt_map.find_routes(
+            'Boon Lay', 'Little India', weights, stats=bounded_stats,
+            bounds=bounds,
+        )
+        assert bounded_stats.expansions < stats.expansions
+
+    def test_budget(self):
+        mrt_map = get_mrt_map()
+        for strategy in ['exhaustive', 'yen']:
+            stats = SearchStats()
+            routes = mrt_map.find_routes(
+                'Boon Lay', 'Little India', NormalWeights(), limit=10,
+                strategy=strategy, stats=stats,
+                bounds=SearchBounds(max_expansions=50),
+            )
+            assert stats.truncated
+            assert len(routes) < 10
+
+    def test_path_finder(self):
+        data_path = (Path(
+            os.path.realpath(__file__)
+        ) / Path('../../data/StationMap.csv')).resolve()
+        finder = PathFinder(data_path)
+        bounds = SearchBounds(max_cost_ratio=1.5)
+        routes = finder.find_routes(
+            'Boon Lay', 'Little India', '2019-01-31T16:00', limit=1,
+            bounds=bounds,
+        )
+        assert routes == finder.find_routes(
+            'Boon Lay', 'Little India', '2019-01-31T16:00', limit=1,
+            bounds=bounds,
+        )
+        assert len(finder.cache) == 1
+        # routes found within the budget are cached, not those cut short
+        finder.find_routes(
+            'Boon Lay', 'Little India', '2019-01-31T16:00', limit=1,
+            bounds=SearchBounds(time_budget=1),
+        )
+        assert len(finder.cache) == 2
+        stats = SearchStats()
+        finder.find_routes(
+            'Boon Lay', 'Little India', '2019-01-31T16:00', limit=5,
+            bounds=SearchBounds(max_expansions=5), stats=stats,
+        )
+        assert stats.truncated
+        assert len(finder.cache) == 2
@@ -0,0 +1,120 @@
+import os
+import pickle
+from pathlib import Path
+
+import pytest
+
+from mrt_guide.contraction import ContractionHierarchy
+from mrt_guide.mrt_map import MRTMap
+from mrt_guide.path_finder import PathFinder
+from mrt_guide.weights import NightWeights, NormalWeights, SimpleWeights
+
+from .test_bounds import get_mrt_map as get_real_map
+from .test_hub_graph import get_mrt_map
+from .test_k_shortest import get_route_keys
+from .test_mrt_map import get_station_row, MockedNormalWeight
+
+
+class TestContractionHierarchy:
+    def test_same_as_exhaustive(self):
+        mrt_map = get_mrt_map()
+        for weights in [MockedNormalWeight(), NightWeights()]:
+            for start, end in [
+                    ('NS1', 'NS3'), ('test1', 'test2'), ('NS1', 'test4'),
+                    ('test3', 'test3'), ('NS2', 'DT1'), ('CC2', 'test3'),
+                    ('hub', 'test2'), ('test1', 'testn')]:
+                expected = mrt_map.find_routes(
+                    start, end, weights, limit=1,
+                )
+                routes = mrt_map.find_routes(
+                    start, end, weights, strategy='contraction',
+                )
+                assert get_route_keys(routes) == get_route_keys(expected)
+
+    def test_real_map(self):
+        mrt_map = get_real_map()
+        weights = NormalWeights()
+        table = mrt_map.get_cost_table(weights)
+        hierarchy = ContractionHierarchy.build(mrt_map, table)
+        # shortcuts are added on top of the edges of both states
+        assert hierarchy.count_edges() > sum(len(row) for row in table.rows)
+        table.hierarchy = hierarchy
+        for start, end in [
+                ('Boon Lay', 'Little India'), ('Pasir Ris', 'Jurong East'),
+                ('Woodlands', 'Changi Airport'), ('Punggol', 'HarbourFront'),
+                ('Bugis', 'Bugis')]:
+            expected = mrt_map.find_routes(start, end, weights, limit=1)
+            routes = mrt_map.find_routes(
+                start, end, weights, strategy='contraction',
+            )
+            assert get_route_keys(routes) == get_route_keys(expected)
+
+    def test_save_and_load(self, tmp_path):
+        mrt_map = get_mrt_map()
+        table = mrt_map.get_cost_table(NormalWeights())
+        hierarchy = ContractionHierarchy.build(mrt_map, table)
+        path = tmp_path / 'normal.ch'
+        hierarchy.save(path)
+        loaded = ContractionHierarchy.load(path)
+        loaded.check(mrt_map)
+        assert loaded.codes == hierarchy.codes
+        assert list(loaded.ranks) == list(hierarchy.ranks)
+        for values, expected in zip(
+                loaded.up + loaded.down, hierarchy.up + hierarchy.down):
+            assert list(values) == list(expected)
+        start = mrt_map.map_to_station_ids('test1')
+        end = mrt_map.map_to_station_ids('test4')
+        assert loaded.find_route(table, start, end) == (
+            hierarchy.find_route(table, start, end)
+        )
+        with pytest.raises(ValueError):
+            loaded.check(MRTMap([
+                get_station_row(['NS1', 'test1', '10 March 1990']),
+            ]))
+        loaded.check(mrt_map, table)
+        with pytest.raises(ValueError):
+            loaded.check(mrt_map, mrt_map.get_cost_table(SimpleWeights()))
+        path.write_bytes(b'garbage' * 10)
+        with pytest.raises(ValueError):
+            ContractionHierarchy.load(path)
+
+    def test_pickle(self, tmp_path):
+        mrt_map = get_mrt_map()
+        table = mrt_map.get_cost_table(NormalWeights())
+        hierarchy = ContractionHierarchy.build(mrt_map, table)
+        copied = pickle.loads(pickle.dumps(hierarchy))
+        assert copied.path is None
+        assert list(copied.up[1]) == list(hierarchy.up[1])
+        path = tmp_path / 'normal.ch'
+        hierarchy.save(path)
+        copied = pickle.loads(pickle.dumps(ContractionHierarchy.load(path)))
+        assert copied.path == path
+        assert list(copied.down[3]) == list(hierarchy.down[3])
+
+    def test_path_finder(self, tmp_path):
+        data_path = (Path(
+            os.path.realpath(__file__)
+        ) / Path('../data/test_mrt_map.csv')).resolve()
+        finder = PathFinder(data_path)
+        finder.precompute_hierarchies(tmp_path)
+        assert len(list(tmp_path.iterdir())) == 4
+        finder = PathFinder(data_path)
+        # a hierarchy of other weights saved under the profile is rebuilt
+        (tmp_path / 'simple.ch').write_bytes(
+            (tmp_path / 'normal.ch').read_bytes()
+        )
+        finder.precompute_hierarchies(tmp_path)
+        table = finder.mrt_map.get_cost_table(finder.get_weights())
+        assert table.hierarchy.path is None
+        table = finder.mrt_map.get_cost_table(NightWeights())
+        assert table.hierarchy.path is not None
+        routes = finder.find_routes('test1', 'test5', limit=1)
+        assert len(routes) == 1
+        assert len(routes[0][0]) == 6
+        assert routes[0][1] == 4
+        routes = finder.find_routes(
+            'test1', 'test5', dt='2019-06-19T8:00', limit=1
+        )
+        assert len(routes) == 1
+        assert len(routes[0][0]) == 6
+        assert routes[0][1] == 59
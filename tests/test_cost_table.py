@@ -0,0 +1,74 @@
+from mrt_guide.cost_table import CostTable
+from mrt_guide.graph import DIRECT, TRANSFER
+from mrt_guide.mrt_map import MRTMap
+from mrt_guide.weights import NightWeights, NormalWeights
+
+from .test_mrt_map import get_station_row, MockedNormalWeight
+
+
+class SlowWeights(NormalWeights):
+    def get_direct_cost(self, station, neighbor):
+        return 2 * super().get_direct_cost(station, neighbor)
+
+
+class SlowProfileWeights(SlowWeights):
+    profile = 'slow'
+
+
+def get_mrt_map():
+    return MRTMap([
+        get_station_row(['NS1', 'test1', '10 March 1990']),
+        get_station_row(['NS2', 'test2', '10 March 1990']),
+        get_station_row(['DT1', 'test2', '10 March 1990']),
+        get_station_row(['DT2', 'test3', '10 March 1990']),
+    ])
+
+
+class TestCostTable:
+    def test_compile(self):
+        table = CostTable.compile(get_mrt_map(), NormalWeights())
+        assert len(table) == 4
+        assert table.rows[0] == ((1, 10, DIRECT),)
+        assert table.rows[1] == ((2, 10, TRANSFER), (0, 10, DIRECT))
+        assert table.rows[2] == ((1, 10, TRANSFER), (3, 8, DIRECT))
+        assert table.get_cost(2, 3) == 8
+        assert table.get_cost(0, 3) is None
+
+    def test_closed_connections_are_pruned(self):
+        table = CostTable.compile(get_mrt_map(), NightWeights())
+        assert table.rows[0] == ((1, 10, DIRECT),)
+        assert table.rows[1] == ((0, 10, DIRECT),)
+        assert table.rows[2] == ()
+        assert table.rows[3] == ()
+        assert table.get_cost(1, 2) is None
+
+    def test_cached_by_profile(self):
+        mrt_map = get_mrt_map()
+        table = mrt_map.get_cost_table(NightWeights())
+        assert mrt_map.get_cost_table(NightWeights()) is table
+        assert mrt_map.get_cost_table(NormalWeights()) is not table
+        # weights without profile are not cached
+        assert mrt_map.get_cost_table(MockedNormalWeight()) is not (
+            mrt_map.get_cost_table(MockedNormalWeight())
+        )
+
+    def test_subclass_profile(self):
+        mrt_map = get_mrt_map()
+        table = mrt_map.get_cost_table(NormalWeights())
+        # subclasses do not share the tables of their parent class
+        slow_table = mrt_map.get_cost_table(SlowWeights())
+        assert slow_table is not table
+        assert slow_table.get_cost(2, 3) == 16
+        assert mrt_map.get_cost_table(SlowWeights()) is not slow_table
+        # unless they name a profile of their own
+        slow_table = mrt_map.get_cost_table(SlowProfileWeights())
+        assert mrt_map.get_cost_table(SlowProfileWeights()) is slow_table
+        assert slow_table.get_cost(2, 3) == 16
+
+    def test_reverse_rows(self):
+        table = CostTable.compile(get_mrt_map(), NightWeights())
+        reverse_rows = table.get_reverse_rows()
+        assert reverse_rows == [
+            ((1, 10, DIRECT),), ((0, 10, DIRECT),), (), (),
+        ]
+        assert table.get_reverse_rows() is reverse_rows
@@ -1,6 +1,8 @@
+import json
+
 from mrt_guide.station import Station
 from mrt_guide.formatter import (
-    FormatterFactory, ConsoleFormatter
+    FormatterFactory, ConsoleFormatter, JsonFormatter
 )
 
 
@@ -10,6 +12,8 @@ class TestFormatter:
         assert isinstance(formatter, ConsoleFormatter)
         formatter = FormatterFactory.get_formatter('console')
         assert isinstance(formatter, ConsoleFormatter)
+        formatter = FormatterFactory.get_formatter('json')
+        assert isinstance(formatter, JsonFormatter)
         formatter = FormatterFactory.get_formatter('__no_existing__')
         assert isinstance(formatter, ConsoleFormatter)
 
@@ -74,3 +78,32 @@ class TestFormatter:
         assert response[5] == (
             'Take CC line from Station[CC22,test2] to Station[CC21,test3]'
         )
+
+    def test_json_formatter(self):
+        start = Station('EW12', 'test1')
+        end = Station('CC21', 'test3')
+        formatter = JsonFormatter()
+        response = json.loads(formatter.format_routes(start, end, []))
+        assert response == {
+            'start': str(start), 'end': str(end), 'routes': [],
+        }
+        routes = [
+            ([start, Station('TE1', 'test1'), Station('TE2', 'test2')], 5),
+            ([start, Station('EW13', 'test2')], 7),
+        ]
+        response = json.loads(formatter.format_routes(
+            start, end, routes, simple=False, limit=1,
+        ))
+        assert response['routes'] == [{
+            'stations': ['EW12', 'TE1', 'TE2'],
+            'steps': [
+                {'type': 'transfer', 'line': 'TE'},
+                {'type': 'take', 'line': 'TE', 'from': 'TE1', 'to': 'TE2'},
+            ],
+            'cost': 5,
+        }]
+        response = json.loads(formatter.format_routes(
+            start, end, routes, limit=2,
+        ))
+        assert len(response['routes']) == 2
+        assert 'cost' not in response['routes'][1]
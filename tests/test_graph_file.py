@@ -0,0 +1,96 @@
+import os
+import pickle
+from pathlib import Path
+import shutil
+
+import pytest
+
+from mrt_guide.graph_file import file_checksum, GraphFile
+from mrt_guide.mrt_map import MRTMap
+from mrt_guide.path_finder import PathFinder
+from mrt_guide.stations_reader import StationRow
+
+from .test_mrt_map import get_station_row, MockedNormalWeight
+
+
+def get_station_rows():
+    return [
+        get_station_row(['NS1', 'test1', '10 March 1990']),
+        get_station_row(['NS2', 'test2', '10 March 1990']),
+        get_station_row(['DT1', 'test2', '']),
+        get_station_row(['DT2', 'test3', '10 March 1990']),
+    ]
+
+
+class TestGraphFile:
+    def test_save_and_load(self, tmp_path):
+        graph_file = GraphFile.compile(get_station_rows(), b'1' * 32)
+        path = tmp_path / 'test.graph'
+        graph_file.save(path)
+        loaded = GraphFile.load(path)
+        assert loaded.checksum == b'1' * 32
+        assert loaded.station_rows == [
+            StationRow.from_mapping(row) for row in get_station_rows()
+        ]
+        assert loaded.station_rows[2]['Opening Date'] == ''
+        for name in ('offsets', 'targets', 'edge_kinds'):
+            assert list(getattr(loaded.graph, name)) == list(
+                getattr(graph_file.graph, name)
+            )
+        mrt_map = loaded.to_mrt_map()
+        assert mrt_map.graph is loaded.graph
+        routes = mrt_map.find_routes('NS1', 'DT2', MockedNormalWeight())
+        assert len(routes) == 1
+        copied = pickle.loads(pickle.dumps(loaded.graph))
+        assert copied.path == path
+        assert list(copied.targets) == list(loaded.graph.targets)
+        path.write_bytes(b'garbage' * 10)
+        with pytest.raises(ValueError):
+            GraphFile.load(path)
+
+    def test_lazy_indexes(self, tmp_path):
+        path = tmp_path / 'test.graph'
+        GraphFile.compile(get_station_rows()).save(path)
+        mrt_map = GraphFile.load(path).to_mrt_map()
+        routes = mrt_map.find_routes('NS1', 'DT2', MockedNormalWeight())
+        assert len(routes) == 1
+        # searches by code only need the stations and the graph
+        assert mrt_map._station_name_map is None
+        assert mrt_map._connections is None
+        expected = MRTMap(get_station_rows())
+        assert mrt_map.station_name_map == expected.station_name_map
+        assert mrt_map._connections is None
+        assert mrt_map.transfers == expected.transfers
+        assert mrt_map.neighbors == expected.neighbors
+        assert mrt_map.lines == expected.lines
+        # changes build the maps first
+        expected.add_station('NS3', 'test3')
+        expected.remove_station('NS1')
+        changed = GraphFile.load(path).to_mrt_map()
+        changed.add_station('NS3', 'test3')
+        changed.remove_station('NS1')
+        assert changed.transfers == expected.transfers
+        assert changed.neighbors == expected.neighbors
+        assert changed.station_name_map == expected.station_name_map
+
+    def test_path_finder(self, tmp_path):
+        data_path = tmp_path / 'test_mrt_map.csv'
+        shutil.copy((Path(
+            os.path.realpath(__file__)
+        ) / Path('../data/test_mrt_map.csv')).resolve(), data_path)
+        graph_path = tmp_path / 'test_mrt_map.graph'
+        finder = PathFinder(data_path, graph_path=graph_path)
+        assert graph_path.exists()
+        expected = PathFinder(data_path).find_routes('test1', 'test5')
+        assert finder.find_routes('test1', 'test5') == expected
+        graph_file = GraphFile.load(graph_path)
+        assert not graph_file.is_stale(data_path)
+        assert graph_file.checksum == file_checksum(data_path)
+
+        # a changed data file is compiled again
+        with open(data_path, 'a') as ofile:
+            ofile.write('NS99,test99,10 March 2090\n')
+        assert graph_file.is_stale(data_path)
+        finder = PathFinder(data_path, graph_path=graph_path)
+        assert 'NS99' in finder.mrt_map.station_code_map
+        assert not GraphFile.load(graph_path).is_stale(data_path)
@@ -0,0 +1,63 @@
+from mrt_guide.graph import TRANSFER
+from mrt_guide.hub_graph import HubGraph
+from mrt_guide.mrt_map import MRTMap
+from mrt_guide.weights import NightWeights, NormalWeights
+
+from .test_k_shortest import get_route_keys
+from .test_mrt_map import get_station_row, MockedNormalWeight
+
+
+def get_mrt_map():
+    return MRTMap([
+        get_station_row(['NS1', 'test1', '10 March 1990']),
+        get_station_row(['NS2', 'hub', '10 March 1990']),
+        get_station_row(['NS3', 'test2', '10 March 1990']),
+        get_station_row(['EW1', 'test3', '10 March 1990']),
+        get_station_row(['EW2', 'hub', '10 March 1990']),
+        get_station_row(['CC1', 'hub', '10 March 1990']),
+        get_station_row(['CC2', 'test4', '10 March 1990']),
+        get_station_row(['DT1', 'hub', '10 March 1990']),
+        get_station_row(['DT2', 'test2', '10 March 1990']),
+        get_station_row(['TE1', 'test5', '10 March 1990']),
+        get_station_row(['TE2', 'test6', '10 March 1990']),
+        get_station_row(['CG1', 'testn', '10 March 1990']),
+    ])
+
+
+class TestHubGraph:
+    def test_compile(self):
+        mrt_map = get_mrt_map()
+        table = mrt_map.get_cost_table(NormalWeights())
+        hub_graph = HubGraph.compile(mrt_map, table)
+        transfers = sum(
+            1 for row in table.rows for _, _, kind in row if kind == TRANSFER
+        )
+        assert transfers == 14
+        # 12 stations, 6 boarded nodes and a hub with 8 edges for the 12
+        # transfers of "hub", "test2" keeps its 2 transfers
+        assert len(hub_graph) == 19
+        assert hub_graph.node_stations[-1] == -1
+        assert hub_graph.count_edges() == (
+            sum(len(row) for row in table.rows) - transfers + 8 + 2 +
+            # direct edges out of the boarded nodes
+            7
+        )
+        # DT is closed at night, a hub of 3 lines saves no edges
+        table = mrt_map.get_cost_table(NightWeights())
+        hub_graph = HubGraph.compile(mrt_map, table)
+        assert -1 not in hub_graph.node_stations
+
+    def test_same_as_exhaustive(self):
+        mrt_map = get_mrt_map()
+        for weights in [MockedNormalWeight(), NightWeights()]:
+            for start, end in [
+                    ('NS1', 'NS3'), ('test1', 'test2'), ('NS1', 'test4'),
+                    ('test3', 'test3'), ('NS2', 'DT1'), ('CC2', 'test3'),
+                    ('hub', 'test2'), ('test1', 'testn')]:
+                expected = mrt_map.find_routes(
+                    start, end, weights, limit=1,
+                )
+                routes = mrt_map.find_routes(
+                    start, end, weights, strategy='hub',
+                )
+                assert get_route_keys(routes) == get_route_keys(expected)
@@ -0,0 +1,63 @@
+import os
+from pathlib import Path
+
+from mrt_guide.mrt_map import MRTMap
+from mrt_guide.stations_reader import StationReader
+from mrt_guide.weights import NormalWeights, SimpleWeights
+
+from .test_mrt_map import get_station_row, MockedNormalWeight
+
+
+def get_route_keys(routes):
+    return [(cost, len(stations)) for stations, cost in routes]
+
+
+class TestKShortest:
+    def test_same_as_exhaustive(self):
+        mrt_map = MRTMap([
+            get_station_row(['NS1', 'test1', '10 March 1990']),
+            get_station_row(['NS2', 'test2', '10 March 1990']),
+            get_station_row(['TE1', 'test1', '10 March 1990']),
+            get_station_row(['TE2', 'test3', '10 March 1990']),
+            get_station_row(['CC1', 'test3', '10 March 1990']),
+            get_station_row(['DT1', 'test3', '10 March 1990']),
+            get_station_row(['TE3', 'test2', '10 March 1990']),
+            get_station_row(['TE4', 'test4', '10 March 1990']),
+        ])
+        for start, end in [
+                ('NS1', 'NS2'), ('test1', 'test2'), ('NS1', 'test4'),
+                ('test1', 'test1'), ('NS1', 'TE1')]:
+            expected = mrt_map.find_routes(start, end, MockedNormalWeight())
+            routes = mrt_map.find_routes(
+                start, end, MockedNormalWeight(), strategy='yen'
+            )
+            assert get_route_keys(routes) == get_route_keys(expected)
+            assert len(set(tuple(stations) for stations, _ in routes)) == (
+                len(routes)
+            )
+
+    def test_with_limit(self):
+        data_path = (Path(
+            os.path.realpath(__file__)
+        ) / Path('../../data/StationMap.csv')).resolve()
+        mrt_map = MRTMap(StationReader(data_path).read_stations())
+        for weights in [SimpleWeights(), NormalWeights()]:
+            expected = mrt_map.find_routes(
+                'Boon Lay', 'Little India', weights, limit=5
+            )
+            routes = mrt_map.find_routes(
+                'Boon Lay', 'Little India', weights, limit=5, strategy='yen'
+            )
+            assert len(routes) == 5
+            assert get_route_keys(routes) == get_route_keys(expected)
+            assert routes[0][0] == expected[0][0]
+
+    def test_no_route(self):
+        mrt_map = MRTMap([
+            get_station_row(['NS1', 'test1', '10 March 1990']),
+            get_station_row(['CG1', 'testn', '10 March 1990']),
+        ])
+        routes = mrt_map.find_routes(
+            'NS1', 'CG1', SimpleWeights(), strategy='yen'
+        )
+        assert routes == []
@@ -0,0 +1,81 @@
+import os
+from pathlib import Path
+
+from mrt_guide.landmarks import Landmarks
+from mrt_guide.mrt_map import MRTMap
+from mrt_guide.stats import SearchStats
+from mrt_guide.stations_reader import StationReader
+from mrt_guide.weights import NightWeights, NormalWeights, SimpleWeights
+
+from .test_mrt_map import get_station_row, MockedNormalWeight
+
+
+def get_mrt_map():
+    return MRTMap([
+        get_station_row(['NS1', 'test1', '10 March 1990']),
+        get_station_row(['NS2', 'test2', '10 March 1990']),
+        get_station_row(['TE1', 'test1', '10 March 1990']),
+        get_station_row(['TE2', 'test3', '10 March 1990']),
+        get_station_row(['CC1', 'test3', '10 March 1990']),
+        get_station_row(['DT1', 'test3', '10 March 1990']),
+        get_station_row(['TE3', 'test2', '10 March 1990']),
+        get_station_row(['TE4', 'test4', '10 March 1990']),
+        get_station_row(['CG1', 'testn', '10 March 1990']),
+    ])
+
+
+class TestLandmarks:
+    def test_lower_bound(self):
+        mrt_map = get_mrt_map()
+        table = mrt_map.get_cost_table(MockedNormalWeight())
+        landmarks = Landmarks.build(table, 3)
+        assert len(landmarks.landmark_ids) == 3
+        for station in mrt_map.stations:
+            start = mrt_map.station_ids[station]
+            for end in mrt_map.station_name_map:
+                heuristic = landmarks.get_heuristic(
+                    mrt_map.map_to_station_ids(end)
+                )
+                routes = mrt_map.find_routes(
+                    station.code, end, MockedNormalWeight(), limit=1,
+                )
+                if routes:
+                    assert heuristic(start) <= routes[0][1]
+                else:
+                    assert heuristic(start) is None
+
+    def test_same_as_exhaustive(self):
+        mrt_map = get_mrt_map()
+        weights = MockedNormalWeight()
+        for start, end in [
+                ('NS1', 'NS2'), ('test1', 'test2'), ('NS1', 'test4'),
+                ('test1', 'test1'), ('NS1', 'TE1'), ('TE4', 'test3')]:
+            expected = mrt_map.find_routes(start, end, weights, limit=1)
+            routes = mrt_map.find_routes(
+                start, end, weights, limit=1, strategy='astar',
+            )
+            assert routes == expected
+        assert mrt_map.find_routes(
+            'NS1', 'CG1', weights, strategy='astar',
+        ) == []
+
+    def test_fewer_expansions(self):
+        data_path = (Path(
+            os.path.realpath(__file__)
+        ) / Path('../../data/StationMap.csv')).resolve()
+        mrt_map = MRTMap(StationReader(data_path).read_stations())
+        for weights in [SimpleWeights(), NormalWeights(), NightWeights()]:
+            stats = SearchStats()
+            expected_stats = SearchStats()
+            routes = mrt_map.find_routes(
+                'Boon Lay', 'Punggol', weights, limit=1,
+                strategy='astar', stats=stats,
+            )
+            expected = mrt_map.find_routes(
+                'Boon Lay', 'Punggol', weights, limit=1,
+                strategy='yen', stats=expected_stats,
+            )
+            assert routes[0][1] == expected[0][1]
+            assert len(routes[0][0]) == len(expected[0][0])
+            assert 0 < stats.expansions < expected_stats.expansions
+            assert mrt_map.get_cost_table(weights).landmarks is not None
@@ -0,0 +1,54 @@
+from mrt_guide.line_graph import LineGraph
+from mrt_guide.stats import SearchStats
+from mrt_guide.weights import NightWeights
+
+from .test_bounds import count_transfers
+from .test_hub_graph import get_mrt_map
+from .test_mrt_map import MockedNormalWeight
+
+
+class TestLineGraph:
+    def test_compile(self):
+        mrt_map = get_mrt_map()
+        table = mrt_map.get_cost_table(MockedNormalWeight())
+        line_graph = LineGraph.compile(mrt_map, table)
+        # one segment per line
+        assert len(line_graph) == 6
+        segment, position = line_graph.positions[
+            mrt_map.station_ids[mrt_map.station_code_map['NS3']]
+        ]
+        assert position == 2
+        assert line_graph.ride_cost(segment, 0, 2) == (
+            line_graph.ride_cost(segment, 2, 0)
+        )
+        assert len(line_graph.ride(segment, 2, 0)) == 3
+        # DT is closed at night
+        table = mrt_map.get_cost_table(NightWeights())
+        line_graph = LineGraph.compile(mrt_map, table)
+        assert len(line_graph) == 7
+
+    def test_same_as_exhaustive(self):
+        mrt_map = get_mrt_map()
+        for weights in [MockedNormalWeight(), NightWeights()]:
+            for start, end in [
+                    ('NS1', 'NS3'), ('test1', 'test2'), ('NS1', 'test4'),
+                    ('test3', 'test3'), ('NS2', 'DT1'), ('CC2', 'test3'),
+                    ('hub', 'test2'), ('test1', 'testn')]:
+                routes = mrt_map.find_routes(start, end, weights)
+                stats = SearchStats()
+                found = mrt_map.find_routes(
+                    start, end, weights, strategy='fewest_transfers',
+                    stats=stats,
+                )
+                if not routes:
+                    assert found == []
+                    continue
+                expected = min(
+                    (count_transfers(stations), cost)
+                    for stations, cost in routes
+                )
+                assert len(found) == 1
+                stations, cost = found[0]
+                assert (count_transfers(stations), cost) == expected
+                assert found[0] in routes
+                assert stats.expansions > 0
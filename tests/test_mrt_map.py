@@ -1,8 +1,12 @@
 from collections import OrderedDict
+from datetime import date
 
 import pytest
 
-from mrt_guide.mrt_map import MRTMap
+from mrt_guide.cost_table import CostTable
+from mrt_guide.mrt_map import MRTMap, StationItem
+from mrt_guide.station import Station
+from mrt_guide.graph import DIRECT, TRANSFER
 
 
 class MockedSimpleWeight:
@@ -175,3 +179,205 @@ class TestMRTMap:
             'NS1', 'CG1', MockedSimpleWeight(), limit=1
         )
         assert len(routes) == 0
+
+    def test_invalid_strategy(self):
+        mrt_map = MRTMap([
+            get_station_row(['NS1', 'test1', '10 March 1990']),
+            get_station_row(['NS2', 'test2', '10 March 1990']),
+        ])
+        with pytest.raises(ValueError):
+            mrt_map.find_routes(
+                'NS1', 'NS2', MockedSimpleWeight(), strategy='__no_existing__'
+            )
+
+    def test_station_item(self):
+        item = StationItem(0, 0)
+        assert item.count == 0
+        assert not item.invalid()
+        assert item.has_visited(0)
+        next_item = item.to_next(2, 1)
+        assert next_item.parent is item
+        assert next_item.cost == 2
+        assert next_item.count == 1
+        assert not next_item.transferred
+        assert next_item.has_visited(0) and next_item.has_visited(1)
+        assert item < next_item
+        back_item = next_item.to_next(2, 0, transferred=True)
+        assert back_item.invalid()
+        assert back_item.transferred
+        assert back_item.to_route() == [0, 1, 0]
+        with pytest.raises(AttributeError):
+            item.route = []
+
+    def test_compact_graph(self):
+        mrt_map = MRTMap([
+            get_station_row(['NS1', 'test1', '10 March 1990']),
+            get_station_row(['NS2', 'test2', '10 March 1990']),
+            get_station_row(['TE1', 'test1', '10 March 1990']),
+        ])
+        assert [station.code for station in mrt_map.stations] == [
+            'NS1', 'NS2', 'TE1'
+        ]
+        assert mrt_map.station_ids[Station('TE1', 'test1')] == 2
+        assert len(mrt_map.graph) == 3
+        assert list(mrt_map.graph.edges(0)) == [(2, TRANSFER), (1, DIRECT)]
+        assert list(mrt_map.graph.edges(1)) == [(0, DIRECT)]
+        assert list(mrt_map.graph.edges(2)) == [(0, TRANSFER)]
+        assert list(mrt_map.find_connection_ids(0, MockedNormalWeight())) == [
+            (2, 10, TRANSFER), (1, 10, DIRECT)
+        ]
+        assert mrt_map.map_to_station_ids('test1') == set([0, 2])
+
+    def test_as_of(self):
+        mrt_map = MRTMap([
+            get_station_row(['NS1', 'test1', '10 March 1990']),
+            get_station_row(['NS2', 'test2', '10 March 1990']),
+            get_station_row(['NS3', 'test3', 'December 2019']),
+            get_station_row(['TE1', 'test1', '10 March 1990']),
+            get_station_row(['TE2', 'test3', '28 August 2021']),
+            get_station_row(['TE3', 'test4', '28 August 2021']),
+        ])
+        assert mrt_map.as_of(date(2022, 1, 1)) is mrt_map
+        assert mrt_map.as_of(date(1990, 3, 9)).stations == []
+        snapshot = mrt_map.as_of(date(2020, 1, 1))
+        assert [station.code for station in snapshot.stations] == [
+            'NS1', 'NS2', 'NS3', 'TE1',
+        ]
+        # dates without the day are the first of the month
+        assert mrt_map.as_of(date(2019, 12, 1)) is snapshot
+        assert mrt_map.as_of(date(2019, 11, 30)) is not snapshot
+        with pytest.raises(ValueError):
+            snapshot.find_routes('NS1', 'TE3', MockedSimpleWeight())
+        routes = snapshot.find_routes(
+            'test1', 'test3', MockedSimpleWeight(), limit=1,
+        )
+        assert len(routes[0][0]) == 3
+        routes = mrt_map.find_routes(
+            'test1', 'test3', MockedSimpleWeight(), limit=1,
+        )
+        assert len(routes[0][0]) == 2
+        # stations and unchanged connections are shared with the full map
+        station = mrt_map.station_code_map['NS1']
+        assert snapshot.station_code_map['NS1'] is station
+        assert snapshot.neighbors[station] is mrt_map.neighbors[station]
+        assert snapshot.transfers[station] is mrt_map.transfers[station]
+
+    def test_add_and_remove_station(self):
+        mrt_map = MRTMap([
+            get_station_row(['NS1', 'test1', '10 March 1990']),
+            get_station_row(['NS3', 'test3', '10 March 1990']),
+            get_station_row(['DT1', 'test2', '10 March 1990']),
+        ])
+        weights = MockedNormalWeight()
+        weights.profile = 'normal'
+        table = mrt_map.get_cost_table(weights)
+        assert mrt_map.find_routes('NS1', 'DT1', weights) == []
+        station = mrt_map.add_station('NS2', 'test2', '1 May 2020')
+        assert mrt_map.version == 1
+        assert mrt_map.station_ids[station] == 3
+        assert mrt_map.neighbors[station] == set([
+            mrt_map.station_code_map['NS1'], mrt_map.station_code_map['NS3'],
+        ])
+        assert mrt_map.get_cost_table(weights) is table
+        assert table.rows == CostTable.compile(mrt_map, weights).rows
+        assert table.rows == CostTable.compile(
+            MRTMap(mrt_map.station_rows), weights
+        ).rows
+        assert len(mrt_map.find_routes('NS1', 'DT1', weights)) == 1
+        assert mrt_map.as_of(date(2000, 1, 1)).find_routes(
+            'NS1', 'NS3', weights
+        )[0][1] == 10
+        with pytest.raises(ValueError):
+            mrt_map.add_station('NS2', 'test2')
+
+        mrt_map.remove_station('NS2')
+        assert 'test2' in mrt_map.station_name_map
+        assert table.rows == CostTable.compile(mrt_map, weights).rows
+        assert table.rows[3] == ()
+        assert mrt_map.find_routes('NS1', 'NS3', weights)[0][1] == 10
+        assert len(mrt_map.station_rows) == 3
+        with pytest.raises(ValueError):
+            mrt_map.remove_station('NS2')
+
+    def test_close_connection(self):
+        mrt_map = MRTMap([
+            get_station_row(['NS1', 'test1', '10 March 1990']),
+            get_station_row(['NS2', 'test2', '10 March 1990']),
+            get_station_row(['NS3', 'test3', '10 March 1990']),
+            get_station_row(['DT1', 'test1', '10 March 1990']),
+            get_station_row(['DT2', 'test3', '10 March 1990']),
+        ])
+        weights = MockedNormalWeight()
+        weights.profile = 'normal'
+        table = mrt_map.get_cost_table(weights)
+        mrt_map.close_connection('NS1', 'NS2')
+        assert table.rows == CostTable.compile(mrt_map, weights).rows
+        routes = mrt_map.find_routes('NS1', 'NS3', weights)
+        assert len(routes) == 1
+        assert [station.code for station in routes[0][0]] == [
+            'NS1', 'DT1', 'DT2', 'NS3',
+        ]
+        # closed connections of a removed station stay closed
+        mrt_map.remove_station('NS2')
+        assert mrt_map.closed_connections == {(0, 2): DIRECT, (2, 0): DIRECT}
+        mrt_map.reopen_connection('NS1', 'NS3')
+        assert mrt_map.find_routes('NS1', 'NS3', weights, limit=1)[0][1] == 10
+        assert table.rows == CostTable.compile(mrt_map, weights).rows
+        with pytest.raises(ValueError):
+            mrt_map.reopen_connection('NS1', 'NS3')
+        with pytest.raises(ValueError):
+            mrt_map.close_connection('NS1', 'DT2')
+
+    def test_close_line_and_interchange(self):
+        mrt_map = MRTMap([
+            get_station_row(['NS1', 'test1', '10 March 1990']),
+            get_station_row(['NS2', 'test2', '10 March 1990']),
+            get_station_row(['NS3', 'test3', '10 March 1990']),
+            get_station_row(['DT1', 'test1', '10 March 1990']),
+            get_station_row(['DT2', 'test3', '10 March 1990']),
+        ])
+        weights = MockedNormalWeight()
+        weights.profile = 'normal'
+        table = mrt_map.get_cost_table(weights)
+        mrt_map.close_line('DT')
+        assert len(mrt_map.find_routes('NS1', 'NS3', weights)) == 1
+        mrt_map.close_interchange('test1')
+        assert mrt_map.find_routes('DT1', 'NS3', weights) == []
+        assert table.rows == CostTable.compile(mrt_map, weights).rows
+        mrt_map.reopen_line('DT')
+        mrt_map.reopen_interchange('test1')
+        assert mrt_map.closed_connections == {}
+        assert table.rows == CostTable.compile(
+            MRTMap(mrt_map.station_rows), weights
+        ).rows
+        with pytest.raises(ValueError):
+            mrt_map.close_line('XX')
+        with pytest.raises(ValueError):
+            mrt_map.close_interchange('test9')
+
+    def test_as_of_with_closures(self):
+        mrt_map = MRTMap([
+            get_station_row(['NS1', 'test1', '10 March 1990']),
+            get_station_row(['NS2', 'test2', '10 March 1990']),
+            get_station_row(['NS3', 'test3', '10 March 1990']),
+            get_station_row(['DT1', 'test1', '10 March 1990']),
+            get_station_row(['DT2', 'test3', '10 March 1990']),
+            get_station_row(['DT3', 'test4', '28 August 2021']),
+        ])
+        weights = MockedSimpleWeight()
+        mrt_map.close_connection('NS1', 'NS2')
+        mrt_map.close_interchange('test1')
+        mrt_map.close_connection('DT2', 'DT3')
+        snapshot = mrt_map.as_of(date(2020, 1, 1))
+        assert snapshot is not mrt_map
+        assert mrt_map.find_routes('NS1', 'NS3', weights) == []
+        assert snapshot.find_routes('NS1', 'NS3', weights) == []
+        assert len(snapshot.closed_connections) == 4
+        station = mrt_map.station_code_map['NS1']
+        assert snapshot.neighbors[station] == mrt_map.neighbors[station]
+        mrt_map.reopen_interchange('test1')
+        snapshot = mrt_map.as_of(date(2020, 1, 1))
+        routes = snapshot.find_routes('NS1', 'NS3', weights)
+        assert [station.code for station in routes[0][0]] == [
+            'NS1', 'DT1', 'DT2', 'NS3',
+        ]
@@ -1,9 +1,11 @@
+from datetime import date, datetime
 import os
 from pathlib import Path
 
 import pytest
 
 from mrt_guide.path_finder import PathFinder
+from mrt_guide.stats import SearchStats
 
 
 class TestPathFinder:
@@ -66,3 +68,125 @@ class TestPathFinder:
         assert len(routes) == 1
         assert len(routes[0][0]) == 6
         assert routes[0][1] == 59
+
+    def test_find_path_with_strategy(self):
+        data_path = (Path(
+            os.path.realpath(__file__)
+        ) / Path('../data/test_mrt_map.csv')).resolve()
+        finder = PathFinder(data_path)
+        expected = finder.find_routes('test1', 'test5', dt='2019-06-19T8:00')
+        routes = finder.find_routes(
+            'test1', 'test5', dt='2019-06-19T8:00', strategy='yen'
+        )
+        assert [cost for _, cost in routes] == [
+            cost for _, cost in expected
+        ]
+        routes = finder.find_routes('test1', 'test5', limit=1, strategy='yen')
+        assert len(routes) == 1
+        assert len(routes[0][0]) == 6
+        assert routes[0][1] == 4
+
+    def test_cache(self):
+        data_path = (Path(
+            os.path.realpath(__file__)
+        ) / Path('../data/test_mrt_map.csv')).resolve()
+        finder = PathFinder(data_path, cache_size=2)
+        routes = finder.find_routes('test2', 'test5')
+        assert finder.cache.stats()['misses'] == 1
+        # station name and its code share the same entry
+        assert finder.find_routes('NS2', 'EW1') == routes
+        assert finder.cache.stats()['hits'] == 1
+        finder.find_routes('test2', 'test5', dt='2019-06-19T8:00')
+        finder.find_routes('test2', 'test5', limit=1)
+        assert finder.cache.stats()['evictions'] == 1
+        finder.reload()
+        assert len(finder.cache) == 0
+        finder = PathFinder(data_path, cache_size=0)
+        assert finder.cache is None
+        assert finder.find_routes('NS2', 'EW1') == routes
+
+    def test_as_of(self):
+        data_path = (Path(
+            os.path.realpath(__file__)
+        ) / Path('../../data/StationMap.csv')).resolve()
+        finder = PathFinder(data_path)
+        with pytest.raises(ValueError):
+            finder.find_routes('Punggol', 'Woodlands', as_of='yesterday')
+        # Woodlands North opened on 31 December 2019
+        with pytest.raises(ValueError):
+            finder.find_routes(
+                'Woodlands North', 'Woodlands', as_of='2019-12-30',
+            )
+        routes = finder.find_routes(
+            'Woodlands North', 'Woodlands', limit=1, as_of='2021-01-01',
+        )
+        assert len(routes[0][0]) == 2
+        # Downtown line stage 1 opened on 22 December 2013
+        routes = finder.find_routes(
+            'Bugis', 'Chinatown', limit=1, as_of=date(2013, 1, 1),
+        )
+        assert all(station.line != 'DT' for station in routes[0][0])
+        assert finder.find_routes(
+            'Bugis', 'Chinatown', limit=1, as_of=datetime(2013, 1, 1, 8),
+        ) == routes
+
+    def test_stats(self):
+        data_path = (Path(
+            os.path.realpath(__file__)
+        ) / Path('../data/test_mrt_map.csv')).resolve()
+        finder = PathFinder(data_path)
+        stats = SearchStats()
+        finder.find_routes(
+            'test1', 'test5', dt='2019-06-19T08:00', limit=1, stats=stats,
+        )
+        assert sorted(stats.phases) == ['parse', 'search', 'weights']
+        assert stats.expansions > 0
+        stats = SearchStats()
+        finder.find_routes(
+            'test1', 'test5', dt='2019-06-19T08:00', time_dependent=True,
+            stats=stats,
+        )
+        assert sorted(stats.phases) == ['parse', 'search', 'weights']
+        assert stats.expansions > 0
+
+    def test_cache_as_of_after_change(self):
+        data_path = (Path(
+            os.path.realpath(__file__)
+        ) / Path('../../data/StationMap.csv')).resolve()
+        finder = PathFinder(data_path)
+        routes = finder.find_routes(
+            'Pioneer', 'Jurong East', limit=1, as_of='2019-01-01',
+        )
+        assert routes[0][1] == 4
+        td_routes = finder.find_routes(
+            'Pioneer', 'Jurong East', '2019-01-31T16:00',
+            time_dependent=True, as_of='2019-01-01',
+        )
+        # snapshots are built again after the change, the cache must miss
+        finder.mrt_map.add_station('NS0', 'Boon Lay')
+        routes = finder.find_routes(
+            'Pioneer', 'Jurong East', limit=1, as_of='2019-01-01',
+        )
+        assert routes[0][1] == 2
+        assert finder.find_routes(
+            'Pioneer', 'Jurong East', '2019-01-31T16:00',
+            time_dependent=True, as_of='2019-01-01',
+        ) != td_routes
+
+    def test_stats_phases(self):
+        data_path = (Path(
+            os.path.realpath(__file__)
+        ) / Path('../data/test_mrt_map.csv')).resolve()
+        for limit in [1, 3, None]:
+            finder = PathFinder(data_path)
+            tables = []
+
+            def hook(event, stats, data):
+                # the cost table is compiled by the end of the weights phase
+                if event == 'phase' and data[0] == 'weights':
+                    tables.append(len(finder.mrt_map._cost_tables))
+            finder.find_routes(
+                'test1', 'test5', dt='2019-06-19T08:00', limit=limit,
+                stats=SearchStats(hooks=[hook]),
+            )
+            assert tables == [1]
@@ -0,0 +1,44 @@
+import pytest
+
+from mrt_guide.route_cache import RouteCache
+
+
+class MockedTimer:
+    def __init__(self):
+        self.now = 0
+
+    def __call__(self):
+        return self.now
+
+
+class TestRouteCache:
+    def test_lru(self):
+        cache = RouteCache(2)
+        cache.put('a', 1)
+        cache.put('b', 2)
+        assert cache.get('a') == 1
+        cache.put('c', 3)
+        assert cache.get('b') is None
+        assert cache.get('a') == 1
+        assert cache.get('c') == 3
+        assert len(cache) == 2
+        assert cache.stats() == {
+            'size': 2, 'hits': 3, 'misses': 1, 'evictions': 1,
+        }
+        cache.clear()
+        assert len(cache) == 0
+        assert cache.get('a') is None
+
+    def test_ttl(self):
+        timer = MockedTimer()
+        cache = RouteCache(2, ttl=10, timer=timer)
+        cache.put('a', 1)
+        timer.now = 9
+        assert cache.get('a') == 1
+        timer.now = 10
+        assert cache.get('a') is None
+        assert len(cache) == 0
+
+    def test_invalid_size(self):
+        with pytest.raises(ValueError):
+            RouteCache(0)
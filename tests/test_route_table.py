@@ -0,0 +1,131 @@
+import os
+import pickle
+from pathlib import Path
+
+import pytest
+
+from mrt_guide.mrt_map import MRTMap
+from mrt_guide.path_finder import PathFinder
+from mrt_guide.route_table import RouteTable
+from mrt_guide.weights import NormalWeights, SimpleWeights
+
+from .test_mrt_map import get_station_row, MockedNormalWeight
+
+
+def get_mrt_map():
+    return MRTMap([
+        get_station_row(['NS1', 'test1', '10 March 1990']),
+        get_station_row(['NS2', 'test2', '10 March 1990']),
+        get_station_row(['TE1', 'test1', '10 March 1990']),
+        get_station_row(['TE2', 'test3', '10 March 1990']),
+        get_station_row(['CC1', 'test3', '10 March 1990']),
+        get_station_row(['DT1', 'test3', '10 March 1990']),
+        get_station_row(['TE3', 'test2', '10 March 1990']),
+        get_station_row(['TE4', 'test4', '10 March 1990']),
+        get_station_row(['CG1', 'testn', '10 March 1990']),
+    ])
+
+
+class TestRouteTable:
+    def test_same_as_exhaustive(self):
+        mrt_map = get_mrt_map()
+        weights = MockedNormalWeight()
+        table = mrt_map.get_cost_table(weights)
+        route_table = RouteTable.build(mrt_map, table)
+        for start, end in [
+                ('NS1', 'NS2'), ('test1', 'test2'), ('NS1', 'test4'),
+                ('test1', 'test1'), ('NS1', 'TE1'), ('TE4', 'test3')]:
+            expected = mrt_map.find_routes(start, end, weights, limit=1)
+            route, cost = route_table.find_route(
+                mrt_map.map_to_station_ids(start),
+                mrt_map.map_to_station_ids(end),
+            )
+            assert cost == expected[0][1]
+            assert mrt_map.to_stations(route) == expected[0][0]
+        assert route_table.find_route(
+            mrt_map.map_to_station_ids('NS1'),
+            mrt_map.map_to_station_ids('CG1'),
+        ) is None
+
+    def test_table_strategy(self):
+        mrt_map = get_mrt_map()
+        routes = mrt_map.find_routes(
+            'test1', 'test2', NormalWeights(), strategy='table'
+        )
+        assert len(routes) == 1
+        assert len(routes[0][0]) == 2
+        assert routes[0][1] == 10
+        assert mrt_map.get_cost_table(NormalWeights()).route_table is not None
+        routes = mrt_map.find_routes(
+            'NS1', 'CG1', NormalWeights(), strategy='table'
+        )
+        assert routes == []
+
+    def test_save_and_load(self, tmp_path):
+        mrt_map = get_mrt_map()
+        table = mrt_map.get_cost_table(NormalWeights())
+        route_table = RouteTable.build(mrt_map, table)
+        path = tmp_path / 'normal.routes'
+        route_table.save(path)
+        loaded = RouteTable.load(path)
+        loaded.check(mrt_map)
+        assert loaded.codes == route_table.codes
+        assert list(loaded.costs) == list(route_table.costs)
+        assert list(loaded.steps) == list(route_table.steps)
+        assert list(loaded.parents) == list(route_table.parents)
+        with pytest.raises(ValueError):
+            loaded.check(MRTMap([
+                get_station_row(['NS1', 'test1', '10 March 1990']),
+            ]))
+        loaded.check(mrt_map, table)
+        with pytest.raises(ValueError):
+            loaded.check(mrt_map, mrt_map.get_cost_table(SimpleWeights()))
+        # same codes with other interchanges
+        other_map = MRTMap([
+            dict(row, **{'Station Name': 'other'})
+            if row['Station Code'] == 'TE1' else row
+            for row in mrt_map.station_rows
+        ])
+        loaded.check(other_map)
+        with pytest.raises(ValueError):
+            loaded.check(other_map, other_map.get_cost_table(NormalWeights()))
+        path.write_bytes(b'garbage' * 10)
+        with pytest.raises(ValueError):
+            RouteTable.load(path)
+
+    def test_path_finder(self, tmp_path):
+        data_path = (Path(
+            os.path.realpath(__file__)
+        ) / Path('../data/test_mrt_map.csv')).resolve()
+        finder = PathFinder(data_path)
+        finder.precompute_route_tables(tmp_path)
+        assert len(list(tmp_path.iterdir())) == 4
+        finder = PathFinder(data_path)
+        # a table of other weights saved under the profile is built again
+        (tmp_path / 'simple.routes').write_bytes(
+            (tmp_path / 'normal.routes').read_bytes()
+        )
+        finder.precompute_route_tables(tmp_path)
+        routes = finder.find_routes('test1', 'test5', limit=1)
+        assert len(routes) == 1
+        assert len(routes[0][0]) == 6
+        assert routes[0][1] == 4
+        routes = finder.find_routes(
+            'test1', 'test5', dt='2019-06-19T8:00', limit=1
+        )
+        assert len(routes) == 1
+        assert len(routes[0][0]) == 6
+        assert routes[0][1] == 59
+
+    def test_pickle(self, tmp_path):
+        mrt_map = get_mrt_map()
+        table = mrt_map.get_cost_table(NormalWeights())
+        route_table = RouteTable.build(mrt_map, table)
+        copied = pickle.loads(pickle.dumps(route_table))
+        assert copied.path is None
+        assert list(copied.costs) == list(route_table.costs)
+        path = tmp_path / 'normal.routes'
+        route_table.save(path)
+        copied = pickle.loads(pickle.dumps(RouteTable.load(path)))
+        assert copied.path == path
+        assert list(copied.parents) == list(route_table.parents)
@@ -0,0 +1,172 @@
+import asyncio
+import json
+import os
+from pathlib import Path
+import time
+
+from mrt_guide.path_finder import PathFinder
+from mrt_guide.server import LatencyHistogram, RoutingServer
+
+
+def get_path_finder(data_path='../data/test_mrt_map.csv'):
+    data_path = (Path(
+        os.path.realpath(__file__)
+    ) / Path(data_path)).resolve()
+    return PathFinder(data_path)
+
+
+async def request(reader, writer, target, method='GET', close=False):
+    writer.write((
+        '{} {} HTTP/1.1\r\nHost: localhost\r\n{}\r\n'.format(
+            method, target, 'Connection: close\r\n' if close else '',
+        )
+    ).encode('latin-1'))
+    status = int((await reader.readline()).split()[1])
+    headers = {}
+    while True:
+        line = (await reader.readline()).decode('latin-1').strip()
+        if not line:
+            break
+        name, _, value = line.partition(':')
+        headers[name.lower()] = value.strip()
+    body = await reader.readexactly(int(headers['content-length']))
+    return status, headers, json.loads(body.decode('utf-8'))
+
+
+def run_with_server(server, client):
+    loop = asyncio.new_event_loop()
+    try:
+        loop.run_until_complete(server.start('127.0.0.1', 0))
+
+        async def run_client():
+            reader, writer = await asyncio.open_connection(
+                '127.0.0.1', server.port
+            )
+            try:
+                return await client(reader, writer)
+            finally:
+                writer.close()
+        return loop.run_until_complete(run_client())
+    finally:
+        server.close()
+        loop.run_until_complete(server.server.wait_closed())
+        # let the connection handlers see the closed connections
+        loop.run_until_complete(asyncio.sleep(0.01))
+        loop.close()
+
+
+class TestServer:
+    def test_routes(self):
+        server = RoutingServer(get_path_finder(), limit=2)
+
+        async def client(reader, writer):
+            status, headers, body = await request(
+                reader, writer, '/routes?from=test1&to=test5'
+            )
+            assert status == 200
+            assert headers['connection'] == 'keep-alive'
+            assert body['start'] == 'test1'
+            assert len(body['routes']) == 2
+            assert body['routes'][0]['stations'] == [
+                'NS1', 'NS2', 'NS3', 'EW3', 'EW2', 'EW1',
+            ]
+            assert 'cost' not in body['routes'][0]
+            # same connection is kept alive
+            status, _, body = await request(
+                reader, writer,
+                '/routes?from=test1&to=test5&dt=2019-06-19T8:00&limit=1',
+            )
+            assert status == 200
+            assert len(body['routes']) == 1
+            assert body['routes'][0]['cost'] == 59
+            for target in [
+                    '/routes?from=test1', '/routes?from=test1&to=NONE',
+                    '/routes?from=test1&to=test5&limit=3',
+                    '/routes?from=test1&to=test5&limit=x',
+                    '/routes?from=test1&to=test5&dt=INVALID']:
+                status, _, body = await request(reader, writer, target)
+                assert status == 400
+                assert 'error' in body
+            status, _, _ = await request(reader, writer, '/no_existing')
+            assert status == 404
+            status, _, _ = await request(
+                reader, writer, '/routes?from=test1&to=test5', 'POST'
+            )
+            assert status == 405
+            status, headers, body = await request(
+                reader, writer, '/metrics', close=True
+            )
+            assert status == 200
+            assert headers['connection'] == 'close'
+            assert body['latency']['/routes']['count'] == 8
+            assert sorted(body['phases']) == [
+                'format', 'parse', 'search', 'weights',
+            ]
+            assert body['phases']['format']['count'] == 2
+            assert body['statuses'] == {'200': 2, '400': 5, '404': 1, '405': 1}
+            assert await reader.read() == b''
+        run_with_server(server, client)
+
+    def test_timeout(self):
+        server = RoutingServer(
+            get_path_finder(), request_timeout=0, keep_alive_timeout=0.1,
+        )
+
+        async def client(reader, writer):
+            status, _, body = await request(
+                reader, writer, '/routes?from=test1&to=test5'
+            )
+            assert status == 504
+            # idle connection is closed by the server
+            assert await reader.read() == b''
+        run_with_server(server, client)
+
+    def test_timeout_frees_worker(self):
+        server = RoutingServer(
+            get_path_finder('../../data/StationMap.csv'), limit=1000,
+            request_timeout=0.5, workers=1,
+        )
+
+        async def client(reader, writer):
+            started = time.perf_counter()
+            status, _, _ = await request(
+                reader, writer,
+                '/routes?from=Boon%20Lay&to=Changi%20Airport&limit=1000',
+            )
+            assert status == 504
+            # the only worker is free again soon after the timeout
+            status, _, _ = await request(
+                reader, writer, '/routes?from=Boon%20Lay&to=Jurong%20East',
+            )
+            assert status == 200
+            assert time.perf_counter() - started < 2
+        run_with_server(server, client)
+
+    def test_cache_and_route_table(self):
+        path_finder = get_path_finder('../../data/StationMap.csv')
+        path_finder.precompute_route_tables()
+        server = RoutingServer(path_finder, limit=2)
+
+        async def client(reader, writer):
+            for target in [
+                    '/routes?from=Boon%20Lay&to=Punggol&limit=1',
+                    '/routes?from=Boon%20Lay&to=Punggol&limit=2']:
+                for _ in range(2):
+                    status, _, _ = await request(reader, writer, target)
+                    assert status == 200
+        run_with_server(server, client)
+        # the route table answers limit=1, a repeated request is cached
+        assert path_finder.cache.stats()['hits'] == 2
+        assert path_finder.cache.stats()['misses'] == 2
+        assert len(path_finder.cache) == 2
+        assert server.metrics()['phases']['search']['count'] == 4
+
+    def test_latency_histogram(self):
+        histogram = LatencyHistogram((0.1, 1))
+        for seconds in [0.05, 0.1, 0.5, 2]:
+            histogram.observe(seconds)
+        assert histogram.to_dict() == {
+            'count': 4,
+            'sum': 2.65,
+            'buckets': {'0.1': 2, '1': 1, '+Inf': 1},
+        }
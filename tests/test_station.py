@@ -1,3 +1,7 @@
+import pickle
+
+import pytest
+
 from mrt_guide.station import Station
 
 
@@ -14,3 +18,15 @@ class TestStation:
         station1 = Station('NS1', 'Jurong East')
         station2 = Station('NS1', 'Jurong East')
         assert set([station1]) == set([station2])
+
+    def test_interned(self):
+        station = Station('NS1', 'Jurong East')
+        assert Station('NS1', 'Jurong East') is station
+        assert Station('NS1', 'Jurong West') is not station
+        assert Station('NS1', 'Jurong West') != station
+        assert station != 'Station[NS1,Jurong East]'
+        assert pickle.loads(pickle.dumps(station)) is station
+        with pytest.raises(AttributeError):
+            station.name = 'Jurong West'
+        with pytest.raises(AttributeError):
+            station.extra = 1
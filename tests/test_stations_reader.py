@@ -1,9 +1,13 @@
+from datetime import date
+import gzip
 import os
 from pathlib import Path
 
 import pytest
 
-from mrt_guide.stations_reader import StationReader
+from mrt_guide.stations_reader import (
+    parse_opening_date, StationReader, StationRow,
+)
 
 
 class TestStationsReader:
@@ -25,3 +29,77 @@ class TestStationsReader:
         ) / Path('../data/test_stations.csvno')).resolve()
         with pytest.raises(ValueError):
             StationReader(data_path)
+
+    def test_parse_opening_date(self):
+        assert parse_opening_date('10 March 1990') == date(1990, 3, 10)
+        assert parse_opening_date('December 2019') == date(2019, 12, 1)
+        assert parse_opening_date('') is None
+        assert parse_opening_date(None) is None
+        with pytest.raises(ValueError):
+            parse_opening_date('sometime')
+
+    def test_station_row(self):
+        row = StationRow('NS1', 'Jurong East', '10 March 1990')
+        assert row['Station Code'] == 'NS1'
+        assert row[1] == 'Jurong East'
+        assert row.get('Opening Date') == '10 March 1990'
+        assert row.get('Line') is None
+        with pytest.raises(KeyError):
+            row['Line']
+
+    def test_formats(self, tmp_path):
+        rows = [
+            StationRow('NS1', 'Jurong East', '10 March 1990'),
+            StationRow('EW24', 'Jurong East', ''),
+        ]
+        csv_gz_path = tmp_path / 'stations.csv.gz'
+        with gzip.open(csv_gz_path, 'wt') as ofile:
+            ofile.write('Station Code,Station Name,Opening Date\n')
+            ofile.write('NS1,Jurong East,10 March 1990\nEW24,Jurong East,\n')
+        jsonl_path = tmp_path / 'stations.jsonl'
+        jsonl_path.write_text(
+            '{"Station Code": "NS1", "Station Name": "Jurong East",'
+            ' "Opening Date": "10 March 1990"}\n\n'
+            '{"Station Code": "EW24", "Station Name": "Jurong East"}\n'
+        )
+        for path, input_format in [
+                (csv_gz_path, 'csv.gz'), (jsonl_path, 'jsonl')]:
+            reader = StationReader(path)
+            assert reader.input_format == input_format
+            assert list(reader.iter_stations()) == rows
+        jsonl_path.write_text('{"Station Name": "Jurong East"}\n')
+        with pytest.raises(ValueError):
+            StationReader(jsonl_path).read_stations()
+        with pytest.raises(ValueError):
+            StationReader(jsonl_path, input_format='xml')
+
+    def test_gtfs(self, tmp_path):
+        (tmp_path / 'stops.txt').write_text(
+            'stop_id,stop_name\n'
+            '1,Jurong East\n2,Clementi\n3,Bukit Batok\n4,Jurong East\n'
+            '5,Chinese Garden\n'
+        )
+        (tmp_path / 'routes.txt').write_text(
+            'route_id,route_short_name\nr1,EW\nr2,North South Line\n'
+        )
+        (tmp_path / 'trips.txt').write_text(
+            'route_id,trip_id\nr1,t1\nr1,t2\nr2,t3\n'
+        )
+        (tmp_path / 'stop_times.txt').write_text(
+            'trip_id,stop_id,stop_sequence\n'
+            't1,2,2\nt1,1,1\n'
+            't2,5,1\nt2,1,2\nt2,2,3\n'
+            't3,4,1\nt3,3,2\nt3,4,3\n'
+        )
+        reader = StationReader(tmp_path)
+        assert reader.input_format == 'gtfs'
+        assert reader.read_stations() == [
+            StationRow('EW1', 'Chinese Garden', ''),
+            StationRow('EW2', 'Jurong East', ''),
+            StationRow('EW3', 'Clementi', ''),
+            StationRow('AA1', 'Jurong East', ''),
+            StationRow('AA2', 'Bukit Batok', ''),
+        ]
+        (tmp_path / 'stops.txt').write_text('stop_id,stop_name\n1,A\n')
+        with pytest.raises(ValueError):
+            reader.read_stations()
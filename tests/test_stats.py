@@ -0,0 +1,67 @@
+import pickle
+
+from mrt_guide.mrt_map import MRTMap
+from mrt_guide.stats import phase_timer, SearchStats
+
+from .test_mrt_map import get_station_row, MockedNormalWeight
+
+
+def get_mrt_map():
+    return MRTMap([
+        get_station_row(['NS1', 'test1', '10 March 1990']),
+        get_station_row(['NS2', 'test2', '10 March 1990']),
+        get_station_row(['NS3', 'test3', '10 March 1990']),
+        get_station_row(['DT1', 'test2', '10 March 1990']),
+        get_station_row(['DT2', 'test3', '10 March 1990']),
+        get_station_row(['CC1', 'test2', '10 March 1990']),
+    ])
+
+
+class TestSearchStats:
+    def test_counters(self):
+        mrt_map = get_mrt_map()
+        for strategy in ['exhaustive', 'yen', 'astar', 'bidirectional', 'hub']:
+            stats = SearchStats()
+            mrt_map.find_routes(
+                'NS1', 'test3', MockedNormalWeight(), limit=1,
+                strategy=strategy, stats=stats,
+            )
+            assert stats.expansions > 0
+            assert stats.pushes >= stats.expansions + stats.discarded
+            assert 0 < stats.peak_queue <= stats.pushes
+        stats = SearchStats()
+        routes = mrt_map.find_routes(
+            'NS1', 'test3', MockedNormalWeight(), stats=stats,
+        )
+        assert len(routes) == 2
+        # NS1 is never visited again and no transfer follows another one
+        assert stats.pruned > 0
+        assert stats.to_dict()['pushes'] == stats.pushes
+
+    def test_hooks(self):
+        events = []
+
+        def hook(event, stats, data):
+            events.append((event, data))
+        stats = SearchStats([hook])
+        with stats.timer('search'):
+            get_mrt_map().find_routes(
+                'NS1', 'NS2', MockedNormalWeight(), stats=stats,
+            )
+        assert events[0] == ('expand', (1, 0))
+        assert events[-1][0] == 'phase'
+        assert events[-1][1][0] == 'search'
+        assert stats.phases['search'] == events[-1][1][1]
+        assert len(events) == stats.expansions + 1
+        copied = pickle.loads(pickle.dumps(stats))
+        assert copied.hooks == []
+        assert copied.expansions == stats.expansions
+
+    def test_phase_timer(self):
+        stats = SearchStats()
+        for _ in range(2):
+            with phase_timer(stats, 'parse'):
+                pass
+        assert list(stats.phases) == ['parse']
+        with phase_timer(None, 'parse'):
+            pass
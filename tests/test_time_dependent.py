@@ -0,0 +1,171 @@
+from datetime import datetime, timedelta
+import os
+from pathlib import Path
+
+import pytest
+
+from mrt_guide.mrt_map import MRTMap
+from mrt_guide.path_finder import PathFinder
+from mrt_guide.stats import SearchStats
+from mrt_guide.time_dependent import earliest_arrival, route_profile
+from mrt_guide.weights import NightWeights, PeakHourWeights, WeightsSchedule
+
+from .test_mrt_map import get_station_row
+
+
+def get_data_path():
+    return (Path(
+        os.path.realpath(__file__)
+    ) / Path('../../data/StationMap.csv')).resolve()
+
+
+class MockedWeightsFactory:
+    '''Peak hours until minute 30 of every hour, night afterwards
+    '''
+    @staticmethod
+    def get_weights(complex_cost=False, dt=None):
+        if dt.minute < 30:
+            return PeakHourWeights()
+        return NightWeights()
+
+
+class TestTimeDependent:
+    def test_compile(self):
+        mrt_map = MRTMap([
+            get_station_row(['NS1', 'test1', '10 March 1990']),
+            get_station_row(['NS2', 'test2', '10 March 1990']),
+            get_station_row(['DT1', 'test2', '10 March 1990']),
+        ])
+        schedule = WeightsSchedule.compile(MockedWeightsFactory)
+        table = mrt_map.get_time_dependent_table(schedule)
+        assert mrt_map.get_time_dependent_table(schedule) is table
+        assert len(table) == 3
+        assert table.rows[0] == ((1, 0, (12, 10)),)
+        assert table.rows[1] == ((2, 1, (15, None)), (0, 0, (12, 10)))
+        # leaving at minute 25, waiting until the night regime is faster
+        assert table.get_arrival((12, 10), 25) == 37
+        assert table.get_arrival((12, 10), 15) == 27
+        # closed at night, wait for the next hour
+        assert table.get_arrival((15, None), 40) == 75
+
+    def test_lines_close_during_journey(self):
+        mrt_map = MRTMap([
+            get_station_row(['NS1', 'test1', '10 March 1990']),
+            get_station_row(['NS2', 'test2', '10 March 1990']),
+            get_station_row(['NS3', 'test3', '10 March 1990']),
+            get_station_row(['DT1', 'test1', '10 March 1990']),
+            get_station_row(['DT2', 'test3', '10 March 1990']),
+        ])
+        schedule = WeightsSchedule.compile(MockedWeightsFactory)
+        table = mrt_map.get_time_dependent_table(schedule)
+        start = mrt_map.map_to_station_ids('test1')
+        end = mrt_map.map_to_station_ids('test3')
+        # DT is the shortest way in peak hours and closed at night
+        route, arrival = earliest_arrival(table, start, end, 0)
+        assert mrt_map.to_stations(route)[-1].code == 'DT2'
+        assert arrival == 10
+        route, arrival = earliest_arrival(table, start, end, 25)
+        assert mrt_map.to_stations(route)[-1].code == 'DT2'
+        assert arrival == 35
+        stats = SearchStats()
+        route, arrival = earliest_arrival(table, start, end, 30, stats)
+        assert [station.code for station in mrt_map.to_stations(route)] == [
+            'NS1', 'NS2', 'NS3',
+        ]
+        assert arrival == 50
+        assert stats.expansions > 0
+
+    def test_find_routes(self):
+        finder = PathFinder(get_data_path(), cache_size=0)
+        with pytest.raises(ValueError):
+            finder.find_routes('Boon Lay', 'Expo', time_dependent=True)
+        for kwargs in [{'limit': 2}, {'strategy': 'exhaustive'}]:
+            with pytest.raises(ValueError):
+                finder.find_routes(
+                    'Boon Lay', 'Expo', '2019-01-31T12:00',
+                    time_dependent=True, **kwargs
+                )
+        assert finder.find_routes(
+            'Boon Lay', 'Expo', '2019-01-31T12:00', limit=1,
+            time_dependent=True,
+        )
+        # same as the static search when the journey stays within a regime
+        for dt in ['2019-01-31T12:00', '2019-02-02T14:00']:
+            for start, end in [
+                    ('Boon Lay', 'Little India'),
+                    ('Buona Vista', 'Woodlands')]:
+                routes = finder.find_routes(
+                    start, end, dt, time_dependent=True,
+                )
+                expected = finder.find_routes(start, end, dt, limit=1)
+                assert routes[0][1] == expected[0][1]
+        # CG closes at 22:00 before the journey gets there
+        routes = finder.find_routes(
+            'Boon Lay', 'Changi Airport', '2019-01-31T21:30',
+            time_dependent=True,
+        )
+        expected = finder.find_routes(
+            'Boon Lay', 'Changi Airport', '2019-01-31T21:30', limit=1,
+        )
+        assert routes[0][1] > expected[0][1]
+        assert routes[0][0][-1].code == 'CG2'
+
+    def test_route_profile(self):
+        mrt_map = MRTMap([
+            get_station_row(['NS1', 'test1', '10 March 1990']),
+            get_station_row(['NS2', 'test2', '10 March 1990']),
+            get_station_row(['NS3', 'test3', '10 March 1990']),
+            get_station_row(['DT1', 'test1', '10 March 1990']),
+            get_station_row(['DT2', 'test3', '10 March 1990']),
+        ])
+        schedule = WeightsSchedule.compile(MockedWeightsFactory)
+        start = mrt_map.map_to_station_ids('test1')
+        end = mrt_map.map_to_station_ids('test3')
+        intervals = route_profile(mrt_map, schedule, start, end, 0, 70)
+        table = mrt_map.get_time_dependent_table(schedule)
+        for minute in range(71):
+            interval = [
+                interval for interval in intervals
+                if interval.departure <= minute <= interval.last_departure
+            ][0]
+            route, arrival = earliest_arrival(table, start, end, minute)
+            assert interval.route == route
+            assert interval.arrival + (
+                interval.last_arrival - interval.arrival
+            ) * (minute - interval.departure) / max(
+                1, interval.last_departure - interval.departure
+            ) == arrival
+        # DT in peak hours, NS at night until waiting for DT to open is as
+        # fast, and DT again in the next hour
+        assert [
+            (interval.departure, interval.last_departure)
+            for interval in intervals
+        ] == [(0, 29), (30, 49), (50, 59), (60, 70)]
+        assert intervals[0].arrival == 10
+        assert intervals[0].last_arrival == 39
+        assert intervals[1].arrival == 50
+        assert intervals[2].arrival == intervals[2].last_arrival == 70
+
+    def test_find_route_profile(self):
+        finder = PathFinder(get_data_path())
+        with pytest.raises(ValueError):
+            finder.find_route_profile(
+                'Boon Lay', 'Expo', '2019-01-31T19:00', '2019-01-31T17:00',
+            )
+        intervals = finder.find_route_profile(
+            'Boon Lay', 'Little India', '2019-01-31T17:00',
+            '2019-01-31T19:00',
+        )
+        assert intervals[0].departure == datetime(2019, 1, 31, 17)
+        assert intervals[-1].last_departure == datetime(2019, 1, 31, 19)
+        for interval in intervals:
+            assert interval.route[0].name == 'Boon Lay'
+            assert interval.route[-1].name == 'Little India'
+            routes = finder.find_routes(
+                'Boon Lay', 'Little India',
+                interval.departure.strftime('%Y-%m-%dT%H:%M'),
+                time_dependent=True,
+            )
+            assert interval.departure + timedelta(
+                minutes=routes[0][1]
+            ) == interval.arrival
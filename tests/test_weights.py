@@ -4,7 +4,7 @@ import pytest
 
 from mrt_guide.weights import (
     SimpleWeights, NightWeights, NormalWeights,
-    PeakHourWeights, WeightsFactory
+    PeakHourWeights, WeightsFactory, WeightsSchedule
 )
 from mrt_guide.station import Station
 from mrt_guide.exceptions import DoNotOperateException
@@ -121,3 +121,37 @@ class TestWeights:
         assert weights.get_direct_cost(
             get_station('EW21'), get_station('EW22')
         ) == 10
+
+    def test_all_weights(self):
+        profiles = [
+            weights.profile for weights in WeightsFactory.get_all_weights()
+        ]
+        assert sorted(profiles) == ['night', 'normal', 'peak', 'simple']
+
+    def test_profiles(self):
+        profiles = [
+            SimpleWeights.profile, PeakHourWeights.profile,
+            NightWeights.profile, NormalWeights.profile,
+        ]
+        assert None not in profiles
+        assert len(set(profiles)) == 4
+
+    def test_schedule(self):
+        schedule = WeightsSchedule.compile()
+        assert len(schedule.weights_list) == 3
+        for dt in [
+                datetime(2019, 6, 19, 12), datetime(2019, 6, 19, 6),
+                datetime(2019, 6, 19, 21, 59), datetime(2019, 6, 22, 7),
+                datetime(2019, 6, 23, 23, 59)]:
+            weights = schedule.get_weights(WeightsSchedule.to_minute(dt))
+            assert isinstance(
+                weights, type(WeightsFactory.get_weights(True, dt))
+            )
+        minute = WeightsSchedule.to_minute(datetime(2019, 6, 19, 21, 50))
+        assert schedule.until_change[minute] == 10
+        # changes wrap around from Sunday night to Monday morning
+        minute = WeightsSchedule.to_minute(datetime(2019, 6, 23, 23))
+        assert schedule.until_change[minute] == 7 * 60
+        assert schedule.get_weights(minute + 7 * 24 * 60) is (
+            schedule.get_weights(minute)
+        )